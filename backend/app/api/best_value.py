@@ -0,0 +1,54 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+
+from app import best_value, schemas, suggest
+from app.catalog import offer_catalog
+from app.serialization import json_response
+from app.units import to_base_qty
+
+router = APIRouter(tags=["optimizer"])
+
+BEST_VALUE_MAX_K = 100
+# products matched by `q` that are ranked together
+BEST_VALUE_MAX_PRODUCTS = 200
+
+
+@router.get("/products/best-value", response_model=List[schemas.BestValueGroup])
+async def best_value_offers(
+    response: Response,
+    product: Optional[List[str]] = Query(None, description="Product names; one group per product and base unit."),
+    q: Optional[str] = Query(None, min_length=1, description="Rank the offers of all products matching `q` together."),
+    unit: Optional[str] = Query(None, description="Only offers sold by this unit's base unit, e.g. `kg` or `l`."),
+    k: int = Query(5, ge=1, le=BEST_VALUE_MAX_K, description="Offers per group."),
+):
+    """
+    The ``k`` offers with the lowest price per base unit (g, ml or piece),
+    for each ``product`` or across the products whose names match ``q``
+    (as ``/search/suggest`` matches them). Each base unit is ranked on its
+    own. Served from a ranking precomputed with the offer catalog; does
+    not read store_offers.
+    """
+    if (product is None) == (q is None):
+        raise HTTPException(status_code=400, detail="Pass either `product` or `q`.")
+    base_unit = to_base_qty(1.0, unit)[1] if unit else None
+
+    # A catalog rebuild reads the database; keep it off the event loop.
+    snapshot = offer_catalog.current() or await run_in_threadpool(offer_catalog.get)
+    # The catalog listener builds the ranking; should it not have, rank off the loop too.
+    if best_value.index_built(snapshot):
+        index = best_value.best_value_index(snapshot)
+    else:
+        index = await run_in_threadpool(best_value.best_value_index, snapshot)
+    if product is not None:
+        groups = [group for name in product for group in index.best(name, k, base_unit)]
+    else:
+        if not suggest.index_built(snapshot):
+            await run_in_threadpool(suggest.suggest_index, snapshot)
+        names = suggest.suggest_index(snapshot).suggest(q, BEST_VALUE_MAX_PRODUCTS)
+        groups = index.best_of(names, q, k, base_unit)
+    if not groups:
+        raise HTTPException(status_code=404, detail="No offers found.")
+    response.headers["Cache-Control"] = f"public, max-age={int(offer_catalog.ttl)}"
+    return json_response(groups, response)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.timing import metrics
+
+router = APIRouter(tags=["ops"])
+
+# Prometheus text exposition format
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Request latency histograms per route, method, /optimize mode and status,
+    and per named phase, in the Prometheus text format. Empty unless
+    REQUEST_TIMING_ENABLED is set.
+    """
+    return PlainTextResponse(metrics.render(), media_type=METRICS_MEDIA_TYPE)
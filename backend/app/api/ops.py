@@ -0,0 +1,65 @@
+import os
+import time
+from datetime import date
+from typing import Dict
+
+from fastapi import APIRouter, Response
+
+from app import best_value, suggest
+from app.catalog import offer_catalog
+from app.db import pool_status
+from app.http_cache import listing_cache
+from app.response_cache import response_cache
+
+router = APIRouter(prefix="/ops", tags=["ops"])
+
+
+@router.get("/pool", response_model=Dict[str, dict])
+def get_pool_status():
+    """
+    Connection pool occupancy (size, checked in/out, overflow) and counters
+    of connections opened, checked out and invalidated, per database engine.
+    """
+    return pool_status()
+
+
+@router.get("/cache", response_model=dict)
+def get_cache_status():
+    """
+    /optimize response cache: backend, entries, bytes held, and hit, miss,
+    uncacheable and eviction counters since startup.
+    """
+    return response_cache.stats()
+
+
+@router.get("/ready", response_model=dict)
+def get_readiness(response: Response):
+    """
+    Warm state of the worker that answers: 200 once the offer catalog holds
+    today's offers (or is disabled), 503 before. Reports the catalog
+    version, size and whether it is mapped from the shared snapshot file,
+    and which derived structures are built. No database access.
+    """
+    snapshot = offer_catalog.snapshot
+    ready = not offer_catalog.enabled or (snapshot is not None and snapshot.built_on == date.today())
+    catalog = None
+    if offer_catalog.enabled and snapshot is not None:
+        catalog = {
+            "version": snapshot.version,
+            "built_on": snapshot.built_on.isoformat(),
+            "products": len(snapshot.products),
+            "offers": snapshot.offer_count,
+            "mapped_from": snapshot.mapped_from,
+            "patched": snapshot.changes is not None,
+            "age_seconds": round(time.monotonic() - snapshot.built_at, 1),
+        }
+    if not ready:
+        response.status_code = 503
+    return {
+        "ready": ready,
+        "pid": os.getpid(),
+        "catalog": catalog,
+        "suggest_index": snapshot is not None and suggest.index_built(snapshot),
+        "best_value_index": snapshot is not None and best_value.index_built(snapshot),
+        "listings": listing_cache.versions(),
+    }
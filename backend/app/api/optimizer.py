@@ -1,465 +1,578 @@
 from datetime import date
-from typing import Dict, List
-import math
+from typing import Dict, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_, text
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app import models, schemas
-from app.db import get_db
+from app import schemas
+from app.catalog import (
+    CatalogSnapshot,
+    ProductOffers,
+    catalog_version,
+    load_snapshot,
+    offer_catalog,
+    read_catalog_state,
+)
+from app.db import get_db, get_read_db
+from app.engine import BasketCosts, CostCache, RequestedItem, cheapest_single_store
+from app.http_cache import conditional_response, listing_cache
+from app.response_cache import response_cache
+from app.pagination import NDJSON_MEDIA_TYPE, decode_cursor, iter_ndjson, set_next_page
+from app.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, profiler
+from app.search import SEARCH_SORT_KEY, search_query, search_sort_key
+from app.serialization import json_response
+from app.store_subset import best_store_subset
+from app.timing import span
 
 router = APIRouter(tags=["optimizer"])
 
 
-@router.post("/optimize", response_model=schemas.OptimizationResponse)
-def optimize_grocery_list(
+def _offer_snapshot(db: Session, requested_names: List[str]) -> CatalogSnapshot:
+    """Use the in-memory catalog when enabled, otherwise query the requested products."""
+    if offer_catalog.enabled:
+        with span("catalog"):
+            return offer_catalog.get()
+    return load_snapshot(db, date.today(), set(requested_names))
+
+
+def _assigned_product(
+    name: str,
+    offers: ProductOffers,
+    i: int,
+    packages: int,
+    item: RequestedItem,
+) -> Dict:
+    """An AssignedProduct, as response content (see ``app.serialization``)."""
+    # If units align, return the offer package size as the assignment
+    # quantity together with the number of packages required. Otherwise
+    # return the requested quantity and a single package.
+    if item.base_unit == offers.base_units[i]:
+        quantity, unit, required_packages = float(offers.quantities[i]), offers.units[i], int(packages)
+    else:
+        quantity, unit, required_packages = item.quantity, item.unit or offers.units[i], 1
+    product = {
+        "product_name": name,
+        "store_name": offers.stores[i],
+        "price": float(offers.prices[i]),
+        "offer_id": int(offers.ids[i]),
+        "quantity": quantity,
+        "unit": unit,
+        "valid_from": offers.valid_from[i],
+        "valid_until": offers.valid_until[i],
+        "image": offers.images[i],
+    }
+    return {"product": product, "required_packages": required_packages}
+
+
+def _optimization_response(
+    mode: schemas.OptimizationMode,
+    total_price: float,
+    stores: List[str],
+    items: List[Dict],
+    search_nodes: Optional[int] = None,
+    search_exhaustive: Optional[bool] = None,
+    ranked_stores: Optional[List[Dict]] = None,
+    ranked_offers: Optional[Dict[str, List[Dict]]] = None,
+) -> Dict:
+    """An OptimizationResponse, as response content."""
+    return {
+        "mode": mode.value,
+        "total_price": float(total_price),
+        "stores": stores,
+        "items": items,
+        "search_nodes": search_nodes,
+        "search_exhaustive": search_exhaustive,
+        "ranked_stores": ranked_stores,
+        "ranked_offers": ranked_offers,
+    }
+
+
+# Search nodes of a max_stores request (about 40 us each): with independently
+# priced stores an exact search can take seconds, the budget keeps it to tens
+# of milliseconds and returns the best combination found.
+MAX_STORES_NODE_BUDGET = 500
+
+
+def _optimize_max_stores(
+    basket: BasketCosts,
+    requested_names: List[str],
+    max_stores: int,
+    store_visit_cost: float,
+) -> Dict:
+    for name in requested_names:
+        if name not in basket.columns:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No offers found for product '{name}'.",
+            )
+
+    result = best_store_subset(
+        basket.cost, basket.column_weights(requested_names), max_stores, store_visit_cost,
+        MAX_STORES_NODE_BUDGET,
+    )
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No combination of at most {max_stores} stores has all requested products.",
+        )
+
+    chosen = np.asarray(result.rows)
+    assignments: List[Dict] = []
+    used_stores: List[str] = []
+    total = 0.0
+    for name in requested_names:
+        col = basket.columns[name]
+        # cheapest among the chosen stores; ties go to the earlier store
+        row = int(chosen[np.argmin(basket.cost[chosen, col])])
+        total += float(basket.cost[row, col])
+        assignments.append(_assigned_product(
+            name,
+            basket.products[name],
+            int(basket.offer_index[row, col]),
+            basket.packages[row, col],
+            basket.items[name],
+        ))
+        store = basket.store_name(row)
+        if store not in used_stores:
+            used_stores.append(store)
+
+    return _optimization_response(
+        schemas.OptimizationMode.MAX_STORES, total, used_stores, assignments, result.nodes, result.exhaustive,
+    )
+
+
+def cache_scope(snapshot: Optional[CatalogSnapshot]):
+    """
+    Response-cache scope: the catalog version and date of ``snapshot``, or
+    the last polled version and today when offers are read per request.
+    """
+    if snapshot is not None:
+        return snapshot.version, snapshot.built_on
+    return catalog_version.current(), date.today()
+
+
+# upper bound of the `top` query parameter
+TOP_MAX = 20
+# upper bound of the `max_stores` query parameter
+MAX_STORES_MAX = 10
+
+
+class OptimizeOptions:
+    """Query parameters shared by /optimize and /optimize/batch."""
+
+    def __init__(
+        self,
+        mode: schemas.OptimizationMode = Query(
+            schemas.OptimizationMode.SINGLE_STORE,
+            description="single_store = one store with all items; "
+                        "multi_store = cheapest combination across stores; "
+                        "max_stores = cheapest combination of at most max_stores stores",
+        ),
+        max_stores: int = Query(
+            2, ge=1, le=MAX_STORES_MAX, description="max_stores mode: maximum number of stores to visit",
+        ),
+        store_visit_cost: float = Query(
+            0.0, ge=0, description="max_stores mode: fixed cost added per store visited",
+        ),
+        top: int = Query(
+            0, ge=0, le=TOP_MAX,
+            description="single_store: also rank the `top` cheapest stores (ranked_stores); "
+                        "multi_store: the cheapest offer at each of the `top` cheapest stores "
+                        "per product (ranked_offers)",
+        ),
+    ):
+        self.mode = mode
+        self.max_stores = max_stores
+        self.store_visit_cost = store_visit_cost
+        self.top = top
+
+
+def optimize_basket(
     payload: schemas.GroceryListRequest,
-    mode: schemas.OptimizationMode = Query(
-        schemas.OptimizationMode.SINGLE_STORE,
-        description="single_store = one store with all items; "
-                    "multi_store = cheapest combination across stores",
-    ),
-    db: Session = Depends(get_db),
-):
+    snapshot: CatalogSnapshot,
+    options: OptimizeOptions,
+    cache: Optional[CostCache] = None,
+) -> Dict:
     """
-    mode = single_store:
-        - pick the single store that can provide ALL requested products
-        - minimize total price
-
-    mode = multi_store:
-        - for each product, pick the cheapest offer across ALL stores
-        - different products can come from different stores
+    Optimize one grocery list against ``snapshot``; the modes are described
+    on ``optimize_grocery_list``. ``cache`` is shared by batch requests.
+    Returns the OptimizationResponse as response content.
     """
+    mode = options.mode
     if not payload.items:
         raise HTTPException(
             status_code=400,
             detail="Grocery list must contain at least one item.",
         )
 
-    today = date.today()
     requested_names = [item.name for item in payload.items]
-    # Map product name -> requested quantity and unit
-    requested_qty: Dict[str, float] = {item.name: float(item.quantity) for item in payload.items}
-    requested_unit: Dict[str, str] = {item.name: item.unit for item in payload.items}
-
-    def _normalize_unit(unit: str) -> str:
-        if not unit:
-            return unit
-        u = unit.strip().lower()
-        if u in ("g", "gram", "grams", "gramm", "gramm.", "gramm(s)", "gramm(s)", "gramm"):
-            return "g"
-        if u in ("kg", "kilogram", "kilograms", "kg."):
-            return "kg"
-        if u in ("l", "liter", "litre", "liters", "litres", "l."):
-            return "l"
-        if u in ("ml", "milliliter", "millilitre", "milliliters", "millilitres", "ml."):
-            return "ml"
-        if u in ("piece", "pieces", "stk", "pcs", "stück"):
-            return "piece"
-        return u
-
-    def _to_base_qty(qty: float, unit: str):
-        u = _normalize_unit(unit)
-        if u == "kg":
-            return qty * 1000.0, "g"
-        if u == "g":
-            return qty, "g"
-        if u == "l":
-            return qty * 1000.0, "ml"
-        if u == "ml":
-            return qty, "ml"
-        # pieces remain as-is
-        if u == "piece":
-            return qty, "piece"
-        # unknown unit: return original and mark base as raw
-        return qty, u
-
-    # Fetch all offers for requested products that are still valid
-    offers = (
-        db.query(models.StoreOffer)
-        .filter(
-            and_(
-                models.StoreOffer.product_name.in_(requested_names),
-                models.StoreOffer.valid_until >= today,
-            )
-        )
-        .all()
-    )
-
-    if not offers:
-        raise HTTPException(
-            status_code=404,
-            detail="No offers found for any requested products.",
-        )
-
-    # store -> product -> cheapest offer in that store
-    store_product_map: Dict[str, Dict[str, models.StoreOffer]] = {}
-
-    # product -> global cheapest offer (for multi_store)
-    product_global_cheapest: Dict[str, models.StoreOffer] = {}
-
-    for offer in offers:
-        store = offer.store_name
-        product = offer.product_name
-
-        # Determine cost to satisfy the requested quantity for this product (if requested)
-        req_qty = float(requested_qty.get(product, 1.0)) if product in requested_qty else None
-        req_unit = requested_unit.get(product) if product in requested_unit else None
-
-        try:
-            offer_qty_base, offer_base_unit = _to_base_qty(float(offer.quantity), offer.unit)
-        except Exception:
-            offer_qty_base, offer_base_unit = float(offer.quantity), offer.unit
-
-        def _cost_for_offer(offer_qty_base, offer_base_unit, offer_price, req_qty, req_unit):
-            try:
-                if req_qty is None:
-                    return float(offer_price)
-                req_qty_base, req_base_unit = _to_base_qty(req_qty, req_unit)
-                if req_base_unit == offer_base_unit and offer_qty_base > 0:
-                    packages = math.ceil(req_qty_base / offer_qty_base)
-                    return float(offer_price) * packages
-                else:
-                    # fallback to naive multiplication or package count when units string matches
-                    if (req_unit or "").strip().lower() == (offer.unit or "").strip().lower() and float(offer.quantity) > 0:
-                        packages = math.ceil(req_qty / float(offer.quantity))
-                        return float(offer_price) * packages
-                    return float(offer_price) * req_qty
-            except Exception:
-                return float(offer_price) * (req_qty if req_qty is not None else 1.0)
-
-        try:
-            offer_cost_for_request = _cost_for_offer(offer_qty_base, offer_base_unit, float(offer.price), req_qty, req_unit)
-        except Exception:
-            offer_cost_for_request = float(offer.price)
-
-        # per-store cheapest (compare by unit price when possible)
-        store_entry = store_product_map.setdefault(store, {})
-        existing_store_offer = store_entry.get(product)
-        if existing_store_offer is None:
-            store_entry[product] = offer
-        else:
-            ex_req_qty = float(requested_qty.get(product, 1.0)) if product in requested_qty else None
-            ex_req_unit = requested_unit.get(product) if product in requested_unit else None
-            try:
-                ex_qty_base, ex_base_unit = _to_base_qty(float(existing_store_offer.quantity), existing_store_offer.unit)
-            except Exception:
-                ex_qty_base, ex_base_unit = float(existing_store_offer.quantity), existing_store_offer.unit
-
-            ex_cost_for_request = _cost_for_offer(ex_qty_base, ex_base_unit, float(existing_store_offer.price), ex_req_qty, ex_req_unit)
-
-            if offer_cost_for_request < ex_cost_for_request:
-                store_entry[product] = offer
-
-        # global cheapest per product (compare by unit price)
-        existing_global_offer = product_global_cheapest.get(product)
-        if existing_global_offer is None:
-            product_global_cheapest[product] = offer
-        else:
-            try:
-                ex_qty_base, ex_base_unit = _to_base_qty(float(existing_global_offer.quantity), existing_global_offer.unit)
-            except Exception:
-                ex_qty_base, ex_base_unit = float(existing_global_offer.quantity), existing_global_offer.unit
-
-            ex_cost_for_request = _cost_for_offer(ex_qty_base, ex_base_unit, float(existing_global_offer.price), req_qty, req_unit)
-
-            if offer_cost_for_request < ex_cost_for_request:
-                product_global_cheapest[product] = offer
+    items = [RequestedItem(item.name, float(item.quantity), item.unit) for item in payload.items]
 
     # ---------- SINGLE_STORE mode ---------- #
     if mode == schemas.OptimizationMode.SINGLE_STORE:
-        best_store_name = None
-        best_total_price = None
-        best_assignments: List[schemas.ItemAssignment] = []
-
-        for store, products_map in store_product_map.items():
-            # Does this store have all requested products?
-            if not all(name in products_map for name in requested_names):
-                continue
-
-            total = 0.0
-            assignments: List[schemas.ItemAssignment] = []
-
-            for name in requested_names:
-                offer = products_map[name]
-                price_f = float(offer.price)
-                qty_req = requested_qty.get(name, 1.0)
-                req_unit = requested_unit.get(name)
-
-                # convert requested and offer quantities to a common base when possible
-                req_qty_base, req_base_unit = _to_base_qty(qty_req, req_unit)
-                offer_qty_base, offer_base_unit = _to_base_qty(float(offer.quantity), offer.unit)
-
-                if req_base_unit == offer_base_unit and offer_qty_base > 0:
-                    packages = math.ceil(req_qty_base / offer_qty_base)
-                    cost = price_f * packages
-                else:
-                    # fallback: if units strings match, use simple division, else assume price is per unit
-                    try:
-                        if (req_unit or "").strip().lower() == (offer.unit or "").strip().lower() and float(offer.quantity) > 0:
-                            packages = math.ceil(qty_req / float(offer.quantity))
-                            cost = price_f * packages
-                        else:
-                            cost = price_f * qty_req
-                    except Exception:
-                        cost = price_f * qty_req
-
-                total += cost
-                # If units align (same base unit or same normalized unit), return the
-                # offer package size as the assignment quantity and set package_count
-                # to the required number of packages. Otherwise return the requested
-                # quantity and package_count=1.
-                normalized_req_unit = _normalize_unit(req_unit or "")
-                normalized_offer_unit = _normalize_unit(offer.unit or "")
-                if req_base_unit == offer_base_unit or normalized_req_unit == normalized_offer_unit:
-                            item = schemas.ItemAssignment(
-                                product_name=name,
-                                store_name=store,
-                                price=price_f,
-                                offer_id=offer.id,
-                                quantity=float(offer.quantity),
-                                unit=offer.unit,
-                                valid_from=offer.valid_from,
-                                valid_until=offer.valid_until,
-                                image=offer.image,
-                            )
-                            assignments.append(schemas.AssignedProduct(product=item, required_packages=packages))
-                else:
-                    item = schemas.ItemAssignment(
-                        product_name=name,
-                        store_name=store,
-                        price=price_f,
-                        offer_id=offer.id,
-                        quantity=qty_req,
-                        unit=req_unit or offer.unit,
-                        valid_from=offer.valid_from,
-                        valid_until=offer.valid_until,
-                        image=offer.image,
-                    )
-                    assignments.append(schemas.AssignedProduct(product=item, required_packages=1))
-
-            if best_total_price is None or total < best_total_price:
-                best_total_price = total
-                best_store_name = store
-                best_assignments = assignments
-
-        if best_store_name is None:
+        with span("costs"):
+            choice = cheapest_single_store(snapshot, items, requested_names, max(options.top, 1))
+
+        if choice is None:
+            if not any(snapshot.get(name) for name in requested_names):
+                raise HTTPException(
+                    status_code=404,
+                    detail="No offers found for any requested products.",
+                )
             raise HTTPException(
                 status_code=404,
                 detail="No single store has all requested products.",
             )
 
-        return schemas.OptimizationResponse(
-            mode=mode,
-            total_price=best_total_price,
-            stores=[best_store_name],
-            items=best_assignments,
+        requested = {item.name: item for item in items}
+        best_assignments: List[Dict] = []
+        for name in requested_names:
+            i, packages = choice.picks[name]
+            best_assignments.append(_assigned_product(
+                name, snapshot.get(name), i, packages, requested[name],
+            ))
+
+        ranked_stores = None
+        if options.top:
+            ranked_stores = [
+                {"store_name": snapshot.stores[store], "total_price": total} for store, total in choice.ranked
+            ]
+        return _optimization_response(
+            mode, choice.total, [snapshot.stores[choice.store]], best_assignments, ranked_stores=ranked_stores,
+        )
+
+    with span("costs"):
+        basket = BasketCosts(snapshot, items, cache)
+
+    if not basket:
+        raise HTTPException(
+            status_code=404,
+            detail="No offers found for any requested products.",
         )
 
+    # ---------- MAX_STORES mode ---------- #
+    if mode == schemas.OptimizationMode.MAX_STORES:
+        return _optimize_max_stores(basket, requested_names, options.max_stores, options.store_visit_cost)
+
     # ---------- MULTI_STORE mode ---------- #
-    # Recompute per-product cheapest offers explicitly from the full offers list.
-    # This avoids depending on an earlier map that may have been populated
-    # in a way that doesn't guarantee the true per-product minimum by total
-    # cost-to-satisfy-request.
-    assignments: List[schemas.ItemAssignment] = []
+    assignments: List[Dict] = []
     used_stores: List[str] = []
     total = 0.0
 
     for name in requested_names:
-        # find all offers for this product and pick the one with minimal
-        # cost to satisfy the requested quantity (package-aware)
-        best_offer = None
-        best_cost = None
-        best_packages = 1
-
-        for offer in offers:
-            if offer.product_name != name:
-                continue
-
-            price_f = float(offer.price)
-            qty_req = requested_qty.get(name, 1.0)
-            req_unit = requested_unit.get(name)
-
-            try:
-                req_qty_base, req_base_unit = _to_base_qty(qty_req, req_unit)
-            except Exception:
-                req_qty_base, req_base_unit = qty_req, req_unit
-
-            try:
-                offer_qty_base, offer_base_unit = _to_base_qty(float(offer.quantity), offer.unit)
-            except Exception:
-                offer_qty_base, offer_base_unit = float(offer.quantity), offer.unit
-
-            try:
-                if req_base_unit == offer_base_unit and offer_qty_base > 0:
-                    packages = math.ceil(req_qty_base / offer_qty_base)
-                    cost = price_f * packages
-                else:
-                    if (req_unit or "").strip().lower() == (offer.unit or "").strip().lower() and float(offer.quantity) > 0:
-                        packages = math.ceil(qty_req / float(offer.quantity))
-                        cost = price_f * packages
-                    else:
-                        cost = price_f * qty_req
-            except Exception:
-                packages = 1
-                cost = price_f * (qty_req if qty_req is not None else 1.0)
-
-            if best_cost is None or cost < best_cost:
-                best_cost = cost
-                best_offer = offer
-                best_packages = packages
-
-        if best_offer is None:
+        if name not in basket.cheapest:
             raise HTTPException(
                 status_code=404,
                 detail=f"No offers found for product '{name}'.",
             )
 
+        best_cost, best_packages, i = basket.cheapest[name]
+        offers = basket.products[name]
+
         # record selection
         total += best_cost
-        normalized_req_unit = _normalize_unit(requested_unit.get(name) or "")
-        normalized_offer_unit = _normalize_unit(best_offer.unit or "")
-
-        if (req_base_unit == offer_base_unit) or (normalized_req_unit == normalized_offer_unit):
-            item = schemas.ItemAssignment(
-                product_name=name,
-                store_name=best_offer.store_name,
-                price=float(best_offer.price),
-                offer_id=best_offer.id,
-                quantity=float(best_offer.quantity),
-                unit=best_offer.unit,
-                valid_from=best_offer.valid_from,
-                valid_until=best_offer.valid_until,
-                image=best_offer.image,
-            )
-            assignments.append(schemas.AssignedProduct(product=item, required_packages=best_packages))
-        else:
-            item = schemas.ItemAssignment(
-                product_name=name,
-                store_name=best_offer.store_name,
-                price=float(best_offer.price),
-                offer_id=best_offer.id,
-                quantity=requested_qty.get(name),
-                unit=requested_unit.get(name),
-                valid_from=best_offer.valid_from,
-                valid_until=best_offer.valid_until,
-                image=best_offer.image,
-            )
-            assignments.append(schemas.AssignedProduct(product=item, required_packages=1))
+        assignments.append(_assigned_product(name, offers, i, best_packages, basket.items[name]))
+
+        if offers.stores[i] not in used_stores:
+            used_stores.append(offers.stores[i])
+
+    ranked_offers = None
+    if options.top:
+        ranked_offers = {
+            name: [
+                _assigned_product(name, basket.products[name], i, packages, basket.items[name])
+                for i, packages in basket.product_costs[name].ranked(options.top)
+            ]
+            for name in requested_names
+        }
+    return _optimization_response(mode, total, used_stores, assignments, ranked_offers=ranked_offers)
+
+
+def optimize_baskets(
+    payload: schemas.BatchGroceryListRequest,
+    snapshot: CatalogSnapshot,
+    options: OptimizeOptions,
+) -> List[Dict]:
+    """
+    ``optimize_basket`` for every list of a batch, sharing the cost of
+    identical items; the first list that fails fails the batch.
+    """
+    cache: CostCache = {}
+    responses: List[Dict] = []
+    for index, basket in enumerate(payload.baskets):
+        try:
+            responses.append(optimize_basket(basket, snapshot, options, cache))
+        except HTTPException as exc:
+            raise HTTPException(
+                status_code=exc.status_code,
+                detail=f"Grocery list {index}: {exc.detail}",
+            ) from exc
+    return responses
 
-        if best_offer.store_name not in used_stores:
-            used_stores.append(best_offer.store_name)
 
-    return schemas.OptimizationResponse(
-        mode=mode,
-        total_price=total,
-        stores=used_stores,
-        items=assignments,
+def profiled_optimize(
+    payload: schemas.GroceryListRequest,
+    snapshot: CatalogSnapshot,
+    options: OptimizeOptions,
+    response: Response,
+    forced: bool,
+) -> Dict:
+    """``optimize_basket``, under the profiler if ``forced`` or sampled (see app.profiling)."""
+    reason = "header" if forced else "sample" if profiler.sampled() else None
+    if reason is None:
+        return optimize_basket(payload, snapshot, options)
+    result, capture_id = profiler.run(
+        lambda: optimize_basket(payload, snapshot, options),
+        "/optimize", payload, options, snapshot, reason,
     )
+    if capture_id is not None:
+        response.headers[PROFILE_ID_HEADER] = capture_id
+    return result
+
+
+@router.post("/optimize", response_model=schemas.OptimizationResponse)
+def optimize_grocery_list(
+    payload: schemas.GroceryListRequest,
+    request: Request,
+    response: Response,
+    options: OptimizeOptions = Depends(),
+    db: Session = Depends(get_db),
+):
+    """
+    mode = single_store:
+        - pick the single store that can provide ALL requested products
+        - minimize total price
+
+    mode = multi_store:
+        - for each product, pick the cheapest offer across ALL stores
+        - different products can come from different stores
+
+    mode = max_stores:
+        - pick at most `max_stores` stores that together provide ALL products
+        - minimize total price plus `store_visit_cost` per store visited
+        - total_price is the price of the groceries, without visit costs
+
+    Results are cached per basket until the catalog version or the date
+    changes; the X-Cache header tells whether this one was. A request with
+    the profiling token in X-Profile skips the cache and is profiled.
+    """
+    forced = profiler.forced(request.headers.get(PROFILE_HEADER))
+    snapshot = None
+    if offer_catalog.enabled:
+        with span("catalog"):
+            snapshot = offer_catalog.get()
+    with span("cache"):
+        cached = None if forced else response_cache.get(cache_scope(snapshot), payload, options)
+    response.headers["X-Cache"] = "miss" if cached is None else "hit"
+    if cached is not None:
+        return json_response(cached, response)
+
+    if snapshot is None:
+        snapshot = load_snapshot(db, date.today(), {item.name for item in payload.items})
+    with span("optimize"):
+        result = profiled_optimize(payload, snapshot, options, response, forced)
+    with span("cache"):
+        response_cache.put(cache_scope(snapshot), payload, options, result, snapshot)
+    return json_response(result, response)
+
+
+@router.post("/optimize/batch", response_model=List[schemas.OptimizationResponse])
+def optimize_grocery_lists(
+    payload: schemas.BatchGroceryListRequest,
+    options: OptimizeOptions = Depends(),
+    db: Session = Depends(get_db),
+):
+    """
+    Optimize several grocery lists in one request, all with the same options.
+
+    Offers for the union of requested products are read once, and identical
+    items across lists share their cost computation. Results are returned in
+    the order of the submitted lists; if one list cannot be optimized the
+    whole request fails with that list's error.
+    """
+    if not payload.baskets:
+        raise HTTPException(
+            status_code=400,
+            detail="Batch must contain at least one grocery list.",
+        )
+
+    names = {item.name for basket in payload.baskets for item in basket.items}
+    snapshot = _offer_snapshot(db, list(names))
+    with span("optimize"):
+        responses = optimize_baskets(payload, snapshot, options)
+    return json_response(responses)
+
+
+# --------- Catalog listing queries (shared with the async router) --------- #
+
+_OFFER_COLUMNS = "o.product_name, o.store_name, o.price, o.id, o.quantity, o.unit, o.valid_from, o.valid_until, o.image"
+
+# /search/products page size: default and upper bound of `limit`
+SEARCH_LIMIT = 100
+SEARCH_MAX_LIMIT = 1000
+
+STORES_QUERY = text("""
+    SELECT DISTINCT store_name
+    FROM store_offers
+    ORDER BY store_name
+""")
+
+# /products page size bound (pages are only used with `limit` or `cursor`)
+PRODUCTS_MAX_LIMIT = 1000
+
+
+def products_query(after_name: Optional[str] = None, limit: Optional[int] = None):
+    """
+    Smallest package per product name (lowest id on ties).
+
+    A correlated lookup on ix_store_offers_product_quantity picks each
+    name's package while the outer query walks the same index in name
+    order, so a page stops after ``limit`` names instead of ranking the
+    whole table first (as ROW_NUMBER/DISTINCT ON would). There is one row
+    per product name, so the keyset cursor is the name alone.
+    """
+    params: Dict = {}
+    keyset = limit_clause = ""
+    if after_name is not None:
+        keyset = "AND o.product_name > :after_name"
+        params["after_name"] = after_name
+    if limit is not None:
+        limit_clause = "LIMIT :limit"
+        params["limit"] = limit
+    sql = f"""
+    SELECT {_OFFER_COLUMNS}
+    FROM store_offers o
+    WHERE o.id = (
+        SELECT p.id FROM store_offers p
+        WHERE p.product_name = o.product_name
+        ORDER BY p.quantity ASC, p.id
+        LIMIT 1
+    ) {keyset}
+    ORDER BY o.product_name, o.quantity ASC, o.id
+    {limit_clause}
+"""
+    return text(sql), params
+
+
+PRODUCTS_QUERY = products_query()[0]
+
+
+def item_assignment(row) -> Dict:
+    """An ItemAssignment of a store_offers row mapping, as response content."""
+    return {
+        "product_name": row["product_name"],
+        "store_name": row["store_name"],
+        "price": float(row["price"]),
+        "offer_id": row["id"],
+        "quantity": float(row["quantity"]),
+        "unit": row["unit"],
+        "valid_from": row["valid_from"],
+        "valid_until": row["valid_until"],
+        "image": row.get("image"),
+    }
 
 
 @router.get("/search/products", response_model=List[schemas.ItemAssignment])
 def search_products(
+    request: Request,
+    response: Response,
     name: str = Query(..., description="Search term to find products containing the given name."),
-    distinct: bool = Query(True, description="Return only distinct rows (uses SQL DISTINCT when true)."),
-    db: Session = Depends(get_db),
+    distinct: bool = Query(True, description="Return only the smallest package per product name."),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=SEARCH_MAX_LIMIT, description="Maximum number of results."),
+    offset: int = Query(0, ge=0, description="Number of ranked results to skip; ignored with `cursor`."),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page (keyset pagination)."),
+    output: Literal["json", "ndjson"] = Query("json", alias="format", description="`ndjson` streams one object per line."),
+    db: Session = Depends(get_read_db),
 ):
     """
     Search for products containing the given name in their product name.
-    Optionally filter results by store name.
+
+    Results are ranked: exact name matches first, then names starting with
+    the term, then the rest by relevance.
     """
-    base_where = "WHERE LOWER(product_name) LIKE :pattern"
-    params = {"pattern": f"%{name.lower()}%"}
-
-    if distinct:
-        # Return one row per product_name. Order by smallest quantity to
-        # return the smallest package for each product name.
-        sql = f"""
-            SELECT DISTINCT ON (product_name)
-                product_name, store_name, price, id, quantity, unit, valid_from, valid_until, image
-            FROM store_offers
-            {base_where}
-            ORDER BY product_name, quantity ASC, id
-        """
-    else:
-        sql = f"""
-            SELECT product_name, store_name, price, id, quantity, unit, valid_from, valid_until, image
-            FROM store_offers
-            {base_where}
-        """
+    after = decode_cursor(cursor, len(SEARCH_SORT_KEY))
+    sql_query, params = search_query(db.get_bind(), name, distinct, limit, offset, after)
 
-    sql_query = text(sql)
+    if output == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(db.get_bind(), sql_query, params, item_assignment), media_type=NDJSON_MEDIA_TYPE
+        )
 
     # Use `db.execute()` with `mappings()` to return rows as dictionaries
     rows = db.execute(sql_query, params).mappings().all()
 
-    if not rows:
+    if not rows and after is None:
         raise HTTPException(status_code=404, detail="No products found matching the query.")
 
-    return [
-        schemas.ItemAssignment(
-            product_name=row["product_name"],
-            store_name=row["store_name"],
-            price=float(row["price"]),
-            offer_id=row["id"],
-            quantity=float(row["quantity"]),
-            unit=row["unit"],
-            valid_from=row["valid_from"],
-            valid_until=row["valid_until"],
-            image=row.get("image"),
-        )
-        for row in rows
-    ]
+    if len(rows) == limit:
+        set_next_page(request, response, search_sort_key(rows[-1]))
+    return json_response([item_assignment(row) for row in rows], response)
 
 
 @router.get("/stores", response_model=List[str])
-def get_stores(db: Session = Depends(get_db)):
+def get_stores(request: Request, db: Session = Depends(get_read_db)):
     """
     Get a list of all distinct store names.
-    """
-    sql_query = text("""
-        SELECT DISTINCT store_name
-        FROM store_offers
-        ORDER BY store_name
-    """)
 
-    rows = db.execute(sql_query).fetchall()
+    The body is built once per catalog version and revalidated with
+    ETag/Last-Modified (see ``app.http_cache``).
+    """
+    cached = listing_cache.get("stores", catalog_version.current())
+    if cached is None:
+        version, updated_at = read_catalog_state(db)
+        rows = db.execute(STORES_QUERY).fetchall()
 
-    if not rows:
-        raise HTTPException(status_code=404, detail="No stores found.")
+        if not rows:
+            raise HTTPException(status_code=404, detail="No stores found.")
 
-    return [row[0] for row in rows]
+        cached = listing_cache.put("stores", [row[0] for row in rows], version, updated_at)
+    return conditional_response(request, cached)
 
 
 @router.get("/products", response_model=List[schemas.ItemAssignment])
-def get_all_products(db: Session = Depends(get_db)):
+def get_all_products(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=PRODUCTS_MAX_LIMIT, description="Page size (keyset pagination)."),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page."),
+    output: Literal["json", "ndjson"] = Query("json", alias="format", description="`ndjson` streams one object per line."),
+    db: Session = Depends(get_read_db),
+):
     """
     Get a list of all distinct products with their details.
+
+    The full JSON listing is cached and revalidated like ``/stores``; with
+    ``limit`` or ``cursor`` a page is read instead.
     """
-    sql_query = text("""
-        SELECT DISTINCT ON (product_name)
-            product_name, store_name, price, id, quantity, unit, valid_from, valid_until, image
-        FROM store_offers
-        ORDER BY product_name, quantity ASC, id
-    """)
-
-    rows = db.execute(sql_query).mappings().all()
-
-    if not rows:
-        raise HTTPException(status_code=404, detail="No products found.")
-
-    return [
-        schemas.ItemAssignment(
-            product_name=row["product_name"],
-            store_name=row["store_name"],
-            price=float(row["price"]),
-            offer_id=row["id"],
-            quantity=float(row["quantity"]),
-            unit=row["unit"],
-            valid_from=row["valid_from"],
-            valid_until=row["valid_until"],
-            image=row.get("image"),
+    after = decode_cursor(cursor, 1)
+    if output == "ndjson":
+        sql_query, params = products_query(after[0] if after else None, limit)
+        return StreamingResponse(
+            iter_ndjson(db.get_bind(), sql_query, params, item_assignment), media_type=NDJSON_MEDIA_TYPE
         )
-        for row in rows
-    ]
+
+    if limit is not None or after is not None:
+        sql_query, params = products_query(after[0] if after else None, limit)
+        rows = db.execute(sql_query, params).mappings().all()
+
+        if not rows and after is None:
+            raise HTTPException(status_code=404, detail="No products found.")
+
+        if limit is not None and len(rows) == limit:
+            set_next_page(request, response, [rows[-1]["product_name"]])
+        return json_response([item_assignment(row) for row in rows], response)
+
+    cached = listing_cache.get("products", catalog_version.current())
+    if cached is None:
+        version, updated_at = read_catalog_state(db)
+        rows = db.execute(PRODUCTS_QUERY).mappings().all()
+
+        if not rows:
+            raise HTTPException(status_code=404, detail="No products found.")
+
+        products = [item_assignment(row) for row in rows]
+        cached = listing_cache.put("products", products, version, updated_at)
+    return conditional_response(request, cached)
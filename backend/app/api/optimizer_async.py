@@ -0,0 +1,213 @@
+"""
+Async variant of the optimizer router, mounted instead of ``optimizer``
+when DB_MODE=async.
+
+Endpoints, request/response shapes and errors are identical; database
+reads go through an async session so a slow query does not hold a worker
+thread. The optimization itself is CPU-bound NumPy work, shares
+``optimize_basket`` with the sync router and runs in the threadpool.
+"""
+from datetime import date
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.api.optimizer import (
+    PRODUCTS_MAX_LIMIT,
+    PRODUCTS_QUERY,
+    SEARCH_LIMIT,
+    SEARCH_MAX_LIMIT,
+    STORES_QUERY,
+    OptimizeOptions,
+    cache_scope,
+    item_assignment,
+    optimize_baskets,
+    products_query,
+    profiled_optimize,
+)
+from app.catalog import (
+    CatalogSnapshot,
+    build_snapshot,
+    catalog_version,
+    offer_catalog,
+    offers_statement,
+    read_catalog_state,
+    read_catalog_version,
+)
+from app.db_async import get_async_db, get_async_read_db
+from app.http_cache import conditional_response, listing_cache
+from app.response_cache import response_cache
+from app.pagination import NDJSON_MEDIA_TYPE, aiter_ndjson, decode_cursor, set_next_page
+from app.profiling import PROFILE_HEADER, profiler
+from app.search import SEARCH_SORT_KEY, search_query, search_sort_key
+from app.serialization import json_response
+from app.timing import span
+
+router = APIRouter(tags=["optimizer"])
+
+
+async def _catalog_version() -> int:
+    """Catalog version, polling the database off the loop when a poll is due."""
+    if catalog_version.due():
+        return await run_in_threadpool(catalog_version.current)
+    return catalog_version.cached()
+
+
+async def _offer_snapshot(db: AsyncSession, requested_names: List[str]) -> CatalogSnapshot:
+    """Use the in-memory catalog when enabled, otherwise query the requested products."""
+    if offer_catalog.enabled:
+        # A rebuild is a blocking read on the sync engine; keep it off the loop.
+        with span("catalog"):
+            return offer_catalog.current() or await run_in_threadpool(offer_catalog.get)
+    today = date.today()
+    with span("db"):
+        version = await db.run_sync(read_catalog_version)
+        result = await db.execute(offers_statement(today, set(requested_names)))
+    with span("hydrate"):
+        return build_snapshot(result, today, version=version)
+
+
+@router.post("/optimize", response_model=schemas.OptimizationResponse)
+async def optimize_grocery_list(
+    payload: schemas.GroceryListRequest,
+    request: Request,
+    response: Response,
+    options: OptimizeOptions = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Same as the sync ``/optimize``, including the response cache and profiling."""
+    forced = profiler.forced(request.headers.get(PROFILE_HEADER))
+    if offer_catalog.enabled:
+        snapshot = await _offer_snapshot(db, [])
+        scope = cache_scope(snapshot)
+    else:
+        # polling the catalog version reads through the sync engine
+        snapshot = None
+        scope = await run_in_threadpool(cache_scope, None)
+    # The optimization is CPU-bound (max_stores runs a search, possibly under
+    # the profiler) and the sqlite cache backend does blocking I/O: neither
+    # may stall the other requests on the loop.
+    with span("cache"):
+        cached = None if forced else await run_in_threadpool(response_cache.get, scope, payload, options)
+    response.headers["X-Cache"] = "miss" if cached is None else "hit"
+    if cached is not None:
+        return json_response(cached, response)
+
+    if snapshot is None:
+        snapshot = await _offer_snapshot(db, [item.name for item in payload.items])
+    with span("optimize"):
+        result = await run_in_threadpool(profiled_optimize, payload, snapshot, options, response, forced)
+    with span("cache"):
+        await run_in_threadpool(response_cache.put, cache_scope(snapshot), payload, options, result, snapshot)
+    return json_response(result, response)
+
+
+@router.post("/optimize/batch", response_model=List[schemas.OptimizationResponse])
+async def optimize_grocery_lists(
+    payload: schemas.BatchGroceryListRequest,
+    options: OptimizeOptions = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Same as the sync ``/optimize/batch``."""
+    if not payload.baskets:
+        raise HTTPException(
+            status_code=400,
+            detail="Batch must contain at least one grocery list.",
+        )
+
+    names = {item.name for basket in payload.baskets for item in basket.items}
+    snapshot = await _offer_snapshot(db, list(names))
+    with span("optimize"):
+        responses = await run_in_threadpool(optimize_baskets, payload, snapshot, options)
+    return json_response(responses)
+
+
+@router.get("/search/products", response_model=List[schemas.ItemAssignment])
+async def search_products(
+    request: Request,
+    response: Response,
+    name: str = Query(..., description="Search term to find products containing the given name."),
+    distinct: bool = Query(True, description="Return only the smallest package per product name."),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=SEARCH_MAX_LIMIT, description="Maximum number of results."),
+    offset: int = Query(0, ge=0, description="Number of ranked results to skip; ignored with `cursor`."),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page (keyset pagination)."),
+    output: Literal["json", "ndjson"] = Query("json", alias="format", description="`ndjson` streams one object per line."),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Same as the sync ``/search/products``."""
+    after = decode_cursor(cursor, len(SEARCH_SORT_KEY))
+    sql_query, params = search_query(db.get_bind(), name, distinct, limit, offset, after)
+
+    if output == "ndjson":
+        return StreamingResponse(
+            aiter_ndjson(db.bind, sql_query, params, item_assignment), media_type=NDJSON_MEDIA_TYPE
+        )
+
+    rows = (await db.execute(sql_query, params)).mappings().all()
+
+    if not rows and after is None:
+        raise HTTPException(status_code=404, detail="No products found matching the query.")
+
+    if len(rows) == limit:
+        set_next_page(request, response, search_sort_key(rows[-1]))
+    return json_response([item_assignment(row) for row in rows], response)
+
+
+@router.get("/stores", response_model=List[str])
+async def get_stores(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Same as the sync ``/stores``."""
+    cached = listing_cache.get("stores", await _catalog_version())
+    if cached is None:
+        version, updated_at = await db.run_sync(read_catalog_state)
+        rows = (await db.execute(STORES_QUERY)).fetchall()
+
+        if not rows:
+            raise HTTPException(status_code=404, detail="No stores found.")
+
+        cached = listing_cache.put("stores", [row[0] for row in rows], version, updated_at)
+    return conditional_response(request, cached)
+
+
+@router.get("/products", response_model=List[schemas.ItemAssignment])
+async def get_all_products(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=PRODUCTS_MAX_LIMIT, description="Page size (keyset pagination)."),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page."),
+    output: Literal["json", "ndjson"] = Query("json", alias="format", description="`ndjson` streams one object per line."),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Same as the sync ``/products``."""
+    after = decode_cursor(cursor, 1)
+    if output == "ndjson":
+        sql_query, params = products_query(after[0] if after else None, limit)
+        return StreamingResponse(
+            aiter_ndjson(db.bind, sql_query, params, item_assignment), media_type=NDJSON_MEDIA_TYPE
+        )
+
+    if limit is not None or after is not None:
+        sql_query, params = products_query(after[0] if after else None, limit)
+        rows = (await db.execute(sql_query, params)).mappings().all()
+
+        if not rows and after is None:
+            raise HTTPException(status_code=404, detail="No products found.")
+
+        if limit is not None and len(rows) == limit:
+            set_next_page(request, response, [rows[-1]["product_name"]])
+        return json_response([item_assignment(row) for row in rows], response)
+
+    cached = listing_cache.get("products", await _catalog_version())
+    if cached is None:
+        version, updated_at = await db.run_sync(read_catalog_state)
+        rows = (await db.execute(PRODUCTS_QUERY)).mappings().all()
+
+        if not rows:
+            raise HTTPException(status_code=404, detail="No products found.")
+
+        products = [item_assignment(row) for row in rows]
+        cached = listing_cache.put("products", products, version, updated_at)
+    return conditional_response(request, cached)
@@ -0,0 +1,31 @@
+from typing import List
+
+from fastapi import APIRouter, Query, Response
+from fastapi.concurrency import run_in_threadpool
+
+from app.catalog import offer_catalog
+from app.suggest import index_built, suggest_index
+
+router = APIRouter(tags=["optimizer"])
+
+SUGGEST_MAX_LIMIT = 50
+
+
+@router.get("/search/suggest", response_model=List[str])
+async def suggest_products(
+    response: Response,
+    q: str = Query(..., min_length=1, description="What the user has typed so far."),
+    limit: int = Query(10, ge=1, le=SUGGEST_MAX_LIMIT, description="Maximum number of suggestions."),
+):
+    """
+    Autocomplete product names: names starting with ``q`` first, then names
+    with a word starting with ``q``, then names containing it. Served from
+    an in-memory index of the live offer catalog; returns only the names.
+    """
+    # A catalog rebuild reads the database; keep it off the event loop.
+    snapshot = offer_catalog.current() or await run_in_threadpool(offer_catalog.get)
+    if not index_built(snapshot):
+        # The catalog listener builds the index; should it not have, build it off the loop too.
+        await run_in_threadpool(suggest_index, snapshot)
+    response.headers["Cache-Control"] = f"public, max-age={int(offer_catalog.ttl)}"
+    return suggest_index(snapshot).suggest(q, limit)
@@ -0,0 +1,149 @@
+"""
+Offers of the live catalog ranked by price per base unit (g, ml, piece).
+
+For every product of a catalog snapshot the ranking holds the offer
+positions ordered by base unit and then by unit price (ties by offer id),
+so the k best-value offers of a product are a slice. Prices per gram and
+per piece do not compare, so each base unit is ranked on its own; offers
+with an empty package have no unit price and are left out.
+
+The ranking is rebuilt when the catalog swaps its snapshot, reusing the
+rows of products whose offers a patch kept (``app.catalog``): after a
+sync or ingest the catalog patches in, only the re-read products are
+ranked again; a full catalog rebuild ranks everything.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.catalog import CatalogSnapshot, ProductOffers, offer_catalog
+
+# base unit code -> (positions in ProductOffers, their unit prices)
+Ranked = Dict[int, Tuple[np.ndarray, np.ndarray]]
+
+
+def rank_offers(products: List[ProductOffers]) -> List[Ranked]:
+    """
+    Positions of each of ``products`` per base unit code, cheapest per base
+    unit first; one sort over the offers of all of them.
+    """
+    if not products:
+        return []
+    lengths = np.fromiter((len(offers) for offers in products), dtype=np.int64, count=len(products))
+    owner = np.repeat(np.arange(len(products)), lengths)
+    positions = np.arange(len(owner)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    base_qtys = np.concatenate([np.asarray(offers.base_qtys, dtype=np.float64) for offers in products])
+    prices = np.concatenate([np.asarray(offers.prices, dtype=np.float64) for offers in products])
+    codes = np.concatenate([np.asarray(offers.base_unit_codes, dtype=np.int64) for offers in products])
+
+    keep = base_qtys > 0
+    owner, positions, codes = owner[keep], positions[keep], codes[keep]
+    unit_prices = prices[keep] / base_qtys[keep]
+    # lexsort is stable: equal unit prices keep id order
+    order = np.lexsort((unit_prices, codes, owner))
+    owner, positions, codes, unit_prices = owner[order], positions[order], codes[order], unit_prices[order]
+
+    ranked: List[Ranked] = [{} for _ in products]
+    starts = np.flatnonzero((np.diff(owner, prepend=-1) != 0) | (np.diff(codes, prepend=-1) != 0))
+    ends = np.append(starts[1:], len(owner))
+    for start, end, product, code in zip(
+        starts.tolist(), ends.tolist(), owner[starts].tolist(), codes[starts].tolist(),
+    ):
+        ranked[product][code] = (positions[start:end], unit_prices[start:end])
+    return ranked
+
+
+class BestValueIndex:
+    """Unit-price ranking of every product of a snapshot."""
+
+    def __init__(self, snapshot: CatalogSnapshot, previous: Optional["BestValueIndex"] = None):
+        reused = previous.products if previous is not None else {}
+        self.snapshot = snapshot
+        self.products: Dict[str, Tuple[ProductOffers, Ranked]] = {}
+        stale = []
+        for name, offers in snapshot.products.items():
+            entry = reused.get(name)
+            if entry is not None and entry[0] is offers:
+                self.products[name] = entry
+            else:
+                stale.append(name)
+        ranked = rank_offers([snapshot.products[name] for name in stale])
+        for name, product in zip(stale, ranked):
+            self.products[name] = (snapshot.products[name], product)
+        self.base_units: Dict[int, Optional[str]] = {code: unit for unit, code in snapshot.unit_codes.items()}
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def best(self, name: str, k: int, base_unit: Optional[str] = None) -> List[Dict]:
+        """The ``k`` best-value offers of one product, as groups per base unit."""
+        return self.best_of([name], name, k, base_unit)
+
+    def best_of(self, names: List[str], label: str, k: int, base_unit: Optional[str] = None) -> List[Dict]:
+        """
+        The ``k`` best-value offers across the products ``names``, one group
+        (labelled ``label``) per base unit, or only of ``base_unit``.
+        """
+        candidates: Dict[int, List[Tuple[float, int, str, int]]] = {}
+        for name in names:
+            entry = self.products.get(name)
+            if entry is None:
+                continue
+            offers, ranked = entry
+            for code, (positions, unit_prices) in ranked.items():
+                if base_unit is not None and self.base_units.get(code) != base_unit:
+                    continue
+                found = candidates.setdefault(code, [])
+                for i, price in zip(positions[:k].tolist(), unit_prices[:k].tolist()):
+                    found.append((price, int(offers.ids[i]), name, i))
+        groups = []
+        for code in sorted(candidates, key=lambda c: str(self.base_units.get(c))):
+            best = sorted(candidates[code])[:k]
+            groups.append({
+                "name": label,
+                "base_unit": self.base_units.get(code),
+                "offers": [_offer(name, self.products[name][0], i, price) for price, _, name, i in best],
+            })
+        return groups
+
+
+def _offer(name: str, offers: ProductOffers, i: int, unit_price: float) -> Dict:
+    """A BestValueOffer, as response content (see ``app.serialization``)."""
+    return {
+        "product_name": name,
+        "store_name": offers.stores[i],
+        "price": float(offers.prices[i]),
+        "offer_id": int(offers.ids[i]),
+        "quantity": float(offers.quantities[i]),
+        "unit": offers.units[i],
+        "valid_from": offers.valid_from[i],
+        "valid_until": offers.valid_until[i],
+        "image": offers.images[i],
+        "unit_price": unit_price,
+    }
+
+
+_current: Optional[BestValueIndex] = None
+
+
+def _rebuild(snapshot: CatalogSnapshot) -> BestValueIndex:
+    global _current
+    _current = BestValueIndex(snapshot, _current)
+    return _current
+
+
+def best_value_index(snapshot: CatalogSnapshot) -> BestValueIndex:
+    """The ranking of ``snapshot``; built here only if the catalog hook did not."""
+    index = _current
+    if index is None or index.snapshot is not snapshot:
+        index = _rebuild(snapshot)
+    return index
+
+
+def index_built(snapshot: CatalogSnapshot) -> bool:
+    """Whether the ranking of ``snapshot`` is built."""
+    index = _current
+    return index is not None and index.snapshot is snapshot
+
+
+offer_catalog.add_listener(_rebuild)
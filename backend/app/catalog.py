@@ -0,0 +1,515 @@
+"""
+In-process, read-optimized snapshot of the live offer catalog.
+
+The optimizer used to query ``store_offers`` and hydrate ORM objects on every
+request. Instead the catalog keeps all currently valid offers grouped by
+product name, stored column-wise as NumPy arrays with prices and base-unit
+quantities already computed. A snapshot is immutable once built; refreshing
+builds a new one and swaps the reference, so readers never observe a
+half-built catalog.
+
+When the catalog version moved on only through incremental syncs
+(``app.sync``), whose change sets name the affected products, a refresh
+re-reads just those products and patches them into the current snapshot.
+"""
+import json
+import os
+import threading
+import time
+from datetime import date
+from itertools import chain
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db import Base, SessionLocal
+from app.models import CatalogChange, CatalogVersion, StoreOffer
+from app.timing import span
+from app.units import to_base_qty
+
+
+class ProductOffers:
+    """
+    All live offers of one product, stored as parallel columns in id order.
+
+    Rows are appended while a snapshot is built; ``freeze`` then turns the
+    numeric columns into NumPy arrays and interns store names and base units
+    into integer codes shared by the whole snapshot.
+    """
+
+    __slots__ = (
+        "ids", "stores", "prices", "quantities", "units", "base_qtys",
+        "base_units", "valid_from", "valid_until", "images",
+        "store_idx", "base_unit_codes", "offer_stores", "first_offer_ids",
+    )
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.stores: List[str] = []
+        self.prices: List[float] = []
+        self.quantities: List[float] = []
+        self.units: List[str] = []
+        self.base_qtys: List[float] = []
+        self.base_units: List[Optional[str]] = []
+        self.valid_from: List[date] = []
+        self.valid_until: List[date] = []
+        self.images: List[Optional[str]] = []
+        self.store_idx = None
+        self.base_unit_codes = None
+        self.offer_stores = None
+        self.first_offer_ids = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, row) -> None:
+        quantity = float(row.quantity)
+        if row.base_quantity is None or row.base_unit is None:
+            # Offers loaded before the unit columns existed
+            base_qty, base_unit = to_base_qty(quantity, row.unit)
+        else:
+            base_qty, base_unit = row.base_quantity, row.base_unit
+        self.ids.append(row.id)
+        self.stores.append(row.store_name)
+        self.prices.append(float(row.price))
+        self.quantities.append(quantity)
+        self.units.append(row.unit)
+        self.base_qtys.append(base_qty)
+        self.base_units.append(base_unit)
+        self.valid_from.append(row.valid_from)
+        self.valid_until.append(row.valid_until)
+        self.images.append(row.image)
+
+    def freeze(self, store_index: Dict[str, int], unit_index: Dict[Optional[str], int]) -> None:
+        for store in self.stores:
+            if store not in store_index:
+                store_index[store] = len(store_index)
+        for unit in self.base_units:
+            if unit not in unit_index:
+                unit_index[unit] = len(unit_index)
+        self.ids = np.asarray(self.ids, dtype=np.int64)
+        self.prices = np.asarray(self.prices, dtype=np.float64)
+        self.quantities = np.asarray(self.quantities, dtype=np.float64)
+        self.base_qtys = np.asarray(self.base_qtys, dtype=np.float64)
+        self.store_idx = np.fromiter((store_index[s] for s in self.stores), dtype=np.int64, count=len(self.stores))
+        self.base_unit_codes = np.fromiter(
+            (unit_index[u] for u in self.base_units), dtype=np.int64, count=len(self.base_units),
+        )
+        # Stores carrying this product and the id of their earliest offer
+        # (offers are in id order, so the first occurrence is the earliest).
+        self.offer_stores, first = np.unique(self.store_idx, return_index=True)
+        self.first_offer_ids = self.ids[first]
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the offers that were valid on ``built_on``.
+
+    ``stores`` lists every store once; ``ProductOffers.store_idx`` points into
+    it. ``unit_codes`` maps each base unit to the code used in
+    ``ProductOffers.base_unit_codes``. ``version`` is the catalog version
+    read before the offers.
+
+    A snapshot patched from ``base`` shares the unchanged ProductOffers (and
+    the store and unit codes they use) with it; ``changes`` is then the base
+    version and the names of the products that were re-read. ``stores`` and
+    ``unit_codes`` pass the codes of already frozen ProductOffers otherwise
+    (``app.catalog_file``), and ``mapped_from`` the path of the snapshot
+    file the offers are mapped from (kept by patches).
+    """
+
+    def __init__(
+        self,
+        products: Dict[str, ProductOffers],
+        built_on: date,
+        generation: int = 0,
+        version: int = 0,
+        base: Optional["CatalogSnapshot"] = None,
+        changed: FrozenSet[str] = frozenset(),
+        stores: Optional[List[str]] = None,
+        unit_codes: Optional[Dict[Optional[str], int]] = None,
+        mapped_from: Optional[str] = None,
+    ):
+        if base is not None:
+            stores, unit_codes = base.stores, base.unit_codes
+        store_index: Dict[str, int] = {store: i for i, store in enumerate(stores or ())}
+        unit_index: Dict[Optional[str], int] = dict(unit_codes or {})
+        for offers in products.values():
+            if offers.store_idx is None:
+                offers.freeze(store_index, unit_index)
+        self.products = products
+        self.stores: List[str] = list(store_index)
+        self.unit_codes = unit_index
+        self.built_on = built_on
+        self.generation = generation
+        self.version = version
+        # a patch does not reset the TTL: that is the safety net for writes
+        # that bypass the version
+        self.built_at = base.built_at if base is not None else time.monotonic()
+        self.changes: Optional[Tuple[int, FrozenSet[str]]] = (base.version, changed) if base is not None else None
+        self.offer_count = sum(len(p) for p in products.values())
+        self.mapped_from = base.mapped_from if base is not None else mapped_from
+
+    def get(self, product_name: str) -> Optional[ProductOffers]:
+        return self.products.get(product_name)
+
+
+_OFFER_COLUMNS = (
+    StoreOffer.id,
+    StoreOffer.store_name,
+    StoreOffer.product_name,
+    StoreOffer.quantity,
+    StoreOffer.unit,
+    StoreOffer.price,
+    StoreOffer.valid_from,
+    StoreOffer.valid_until,
+    StoreOffer.image,
+    StoreOffer.base_unit,
+    StoreOffer.base_quantity,
+)
+
+
+def build_snapshot(rows: Iterable, built_on: date, generation: int = 0, version: int = 0) -> CatalogSnapshot:
+    """Group offer rows (ordered by id) into a snapshot."""
+    products: Dict[str, ProductOffers] = {}
+    for row in rows:
+        offers = products.get(row.product_name)
+        if offers is None:
+            offers = products[row.product_name] = ProductOffers()
+        offers.append(row)
+    return CatalogSnapshot(products, built_on, generation, version)
+
+
+def patch_snapshot(
+    base: CatalogSnapshot,
+    rows: Iterable,
+    changed: FrozenSet[str],
+    generation: int,
+    version: int,
+) -> CatalogSnapshot:
+    """``base`` with the offers of the ``changed`` products replaced by ``rows``."""
+    products = {name: offers for name, offers in base.products.items() if name not in changed}
+    for row in rows:
+        offers = products.get(row.product_name)
+        if offers is None:
+            offers = products[row.product_name] = ProductOffers()
+        offers.append(row)
+    return CatalogSnapshot(products, base.built_on, generation, version, base=base, changed=changed)
+
+
+def offers_statement(today: date, product_names: Optional[Iterable[str]] = None):
+    """
+    Select the offer columns valid on ``today`` (started and not expired),
+    optionally for some products only.
+    """
+    stmt = select(*_OFFER_COLUMNS).where(StoreOffer.valid_from <= today, StoreOffer.valid_until >= today)
+    if product_names is not None:
+        stmt = stmt.where(StoreOffer.product_name.in_(list(product_names)))
+    return stmt.order_by(StoreOffer.id)
+
+
+def load_snapshot(
+    db: Session,
+    today: date,
+    product_names: Optional[Iterable[str]] = None,
+    generation: int = 0,
+) -> CatalogSnapshot:
+    """
+    Read the offers valid on ``today`` straight into a snapshot, without ORM
+    hydration. Restrict to ``product_names`` when given.
+    """
+    # Read the version first: a concurrent write can then only make the
+    # offers newer than the version, never older.
+    with span("db"):
+        version = read_catalog_version(db)
+        rows = db.execute(offers_statement(today, product_names))
+        if product_names is not None:
+            # a request's products: fetch them here so the query is timed
+            # apart from building the snapshot
+            rows = rows.all()
+    with span("hydrate"):
+        return build_snapshot(rows, today, generation, version)
+
+
+# --------- Catalog version --------- #
+
+VERSION_STATEMENT = select(CatalogVersion.version).where(CatalogVersion.id == 1)
+
+
+def read_catalog_version(db) -> int:
+    """Current catalog version (session or connection); 0 before any write."""
+    return db.execute(VERSION_STATEMENT).scalar() or 0
+
+
+def read_catalog_state(db):
+    """(version, time of the last write) of the catalog; (0, None) before any."""
+    row = db.execute(
+        select(CatalogVersion.version, CatalogVersion.updated_at).where(CatalogVersion.id == 1)
+    ).first()
+    return (row.version, row.updated_at) if row is not None else (0, None)
+
+
+def bump_catalog_version(db) -> None:
+    """
+    Increment the catalog version. Call it in the transaction that writes
+    store_offers; writes through ``SessionLocal`` do it automatically.
+    """
+    db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == 1)
+        .values(version=CatalogVersion.version + 1, updated_at=func.now())
+    )
+
+
+# Change sets kept in catalog_changes; older ones are pruned.
+CHANGE_HISTORY = 1000
+
+
+def record_catalog_change(db, products: Iterable[str], stores: Iterable[str], counts: Dict[str, int]) -> int:
+    """
+    Bump the catalog version and record what the new version changed.
+    Call it in the transaction that applies the changes; returns the version.
+    """
+    bump_catalog_version(db)
+    version = read_catalog_version(db)
+    db.execute(insert(CatalogChange).values(
+        version=version,
+        inserted=counts.get("inserted", 0),
+        updated=counts.get("updated", 0),
+        expired=counts.get("expired", 0),
+        products=json.dumps(sorted(products), ensure_ascii=False),
+        stores=json.dumps(sorted(stores), ensure_ascii=False),
+    ))
+    db.execute(delete(CatalogChange).where(CatalogChange.version <= version - CHANGE_HISTORY))
+    return version
+
+
+def changed_products(db, since: int, until: int) -> Optional[FrozenSet[str]]:
+    """
+    Products changed by versions ``since`` (exclusive) to ``until``, or None
+    when a version in between has no change set (a write of unknown scope).
+    """
+    rows = db.execute(
+        select(CatalogChange.products)
+        .where(CatalogChange.version > since, CatalogChange.version <= until)
+    ).all()
+    if len(rows) != until - since:
+        return None
+    return frozenset(chain.from_iterable(json.loads(row.products) for row in rows))
+
+
+class CatalogVersionTracker:
+    """
+    Last catalog version seen by this process, re-read from the database at
+    most every ``interval`` seconds (or right after a local write), so
+    writes made by other processes are noticed within ``interval``.
+    """
+
+    def __init__(self, session_factory=SessionLocal, interval: float = 1.0):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._version = 0
+        self._checked_at: Optional[float] = None
+
+    def due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.interval
+
+    def cached(self) -> int:
+        return self._version
+
+    def observe(self, version: int) -> None:
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def expire(self) -> None:
+        self._checked_at = None
+
+    def current(self) -> int:
+        if self.due():
+            db = self.session_factory()
+            try:
+                self.observe(read_catalog_version(db))
+            finally:
+                db.close()
+        return self._version
+
+
+catalog_version = CatalogVersionTracker(
+    interval=float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "1")),
+)
+
+
+class OfferCatalog:
+    """
+    Holder of the current snapshot.
+
+    ``get`` rebuilds lazily when the snapshot was invalidated, when the date
+    changed (offers expire through ``valid_until``), when the catalog version
+    moved on (writes by other processes) or when it is older than ``ttl``
+    seconds. Version changes that are all covered by change sets touching at
+    most ``delta_max_products`` products are patched in instead of rebuilt.
+    With ``snapshot_path``, a snapshot file exported at the current version
+    (``app.catalog_file``) is memory-mapped instead of reading store_offers.
+
+    Functions registered with ``add_listener`` are called with every new
+    snapshot, so structures derived from it are rebuilt together with it.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        ttl: float = 60.0,
+        enabled: bool = True,
+        delta_max_products: int = 5000,
+        snapshot_path: Optional[str] = None,
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.enabled = enabled
+        self.delta_max_products = delta_max_products
+        self.snapshot_path = snapshot_path
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[CatalogSnapshot], None]] = []
+
+    def add_listener(self, listener: Callable[[CatalogSnapshot], None]) -> None:
+        self._listeners.append(listener)
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        if snapshot is None or snapshot.generation != self._generation:
+            return False
+        if snapshot.built_on != date.today():
+            return False
+        if snapshot.version != catalog_version.cached():
+            return False
+        if self.ttl and time.monotonic() - snapshot.built_at > self.ttl:
+            return False
+        return True
+
+    def get(self) -> CatalogSnapshot:
+        catalog_version.current()
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+        return self.refresh(force=False)
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """The snapshot if it is known to be fresh, without any database access."""
+        if catalog_version.due():
+            return None
+        snapshot = self._snapshot
+        return snapshot if self._is_fresh(snapshot) else None
+
+    def refresh(self, force: bool = True) -> CatalogSnapshot:
+        """Build a new snapshot and swap it in atomically."""
+        with self._lock:
+            if not force and self._is_fresh(self._snapshot):
+                return self._snapshot
+            generation = self._generation
+            today = date.today()
+            db = self.session_factory()
+            try:
+                snapshot = None if force else self._load_delta(db, today, generation)
+                if snapshot is None and not force:
+                    snapshot = self._load_file(db, today, generation)
+                if snapshot is None:
+                    snapshot = load_snapshot(db, today, generation=generation)
+            finally:
+                db.close()
+            catalog_version.observe(snapshot.version)
+            for listener in self._listeners:
+                listener(snapshot)
+            self._snapshot = snapshot
+            return snapshot
+
+    def _load_delta(self, db: Session, today: date, generation: int) -> Optional[CatalogSnapshot]:
+        """The current snapshot patched up to the latest version, or None if it cannot be."""
+        base = self._snapshot
+        if base is None or base.generation != generation or base.built_on != today:
+            return None
+        if self.ttl and time.monotonic() - base.built_at > self.ttl:
+            return None
+        version = read_catalog_version(db)
+        if version <= base.version:
+            return None
+        changed = changed_products(db, base.version, version)
+        if changed is None or len(changed) > self.delta_max_products:
+            return None
+        rows = db.execute(offers_statement(today, changed)) if changed else ()
+        return patch_snapshot(base, rows, changed, generation, version)
+
+    def _load_file(self, db: Session, today: date, generation: int) -> Optional[CatalogSnapshot]:
+        """The snapshot file mapped, if it holds the current version of today's offers."""
+        # imported here: app.catalog_file builds on this module
+        from app.catalog_file import read_catalog_file, read_catalog_header
+
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        header = read_catalog_header(self.snapshot_path)
+        if header["built_on"] != today.isoformat() or header["version"] != read_catalog_version(db):
+            return None
+        if self._snapshot is not None and self._snapshot.version == header["version"]:
+            # a TTL or invalidate() reload: the file may be as stale as the snapshot
+            return None
+        return read_catalog_file(self.snapshot_path, generation)
+
+    def invalidate(self) -> None:
+        """Mark the current snapshot stale; the next ``get`` rebuilds it."""
+        self._generation += 1
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+
+offer_catalog = OfferCatalog(
+    ttl=float(os.getenv("CATALOG_TTL_SECONDS", "60")),
+    enabled=os.getenv("OFFER_CATALOG_ENABLED", "1").lower() not in ("0", "false", "no"),
+    delta_max_products=int(os.getenv("CATALOG_DELTA_MAX_PRODUCTS", "5000")),
+    snapshot_path=os.getenv("CATALOG_SNAPSHOT_PATH") or None,
+)
+
+
+# --------- Invalidation hooks --------- #
+
+def _offers_changed(session: Session) -> None:
+    """Flag the transaction and bump the catalog version in it, once."""
+    if not session.info.get("offers_changed"):
+        session.info["offers_changed"] = True
+        bump_catalog_version(session.connection())
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_offer_flush(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, StoreOffer):
+            _offers_changed(session)
+            return
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _track_offer_statements(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _offers_changed(orm_execute_state.session)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("offers_changed", False):
+        catalog_version.expire()
+        offer_catalog.invalidate()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("offers_changed", None)
+
+
+@event.listens_for(Base.metadata, "after_create")
+@event.listens_for(Base.metadata, "after_drop")
+def _invalidate_after_ddl(target, connection, **kw):
+    catalog_version.expire()
+    offer_catalog.invalidate()
@@ -0,0 +1,236 @@
+"""
+Columnar catalog snapshot file, memory-mapped by the API workers.
+
+``export_catalog`` writes the live offers into one binary file: a small
+JSON header with the interned string tables (stores, products, units,
+base units, images) followed by typed, 8-byte aligned columns for all
+offers in product then id order:
+
+    ids int64, prices / quantities / base_qtys float64,
+    store_idx / base_unit_codes / unit_idx / image_idx int32,
+    valid_from / valid_until int32 (date ordinals),
+    product_offsets int64 (one more than products),
+    offer_stores int32 + offer_store_offsets int64, first_offer_ids int64.
+
+``read_catalog_file`` maps the file read-only and builds a CatalogSnapshot
+whose numeric columns are views into the mapping. The pages are shared by
+every process that maps the same file, so uvicorn workers hold one
+physical copy of the offers and start without querying store_offers; only
+the string tables are decoded per process. Strings of single offers
+(store, unit, image, dates) are decoded when a response needs them.
+
+The file is replaced atomically; processes that mapped the old one keep
+reading it until they reload.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.catalog import CatalogSnapshot, ProductOffers, load_snapshot
+
+MAGIC = b"SGCATv1\0"
+_HEADER_LENGTH = struct.Struct("<Q")
+
+_COLUMNS = (
+    ("ids", np.int64),
+    ("prices", np.float64),
+    ("quantities", np.float64),
+    ("base_qtys", np.float64),
+    ("store_idx", np.int32),
+    ("base_unit_codes", np.int32),
+    ("unit_idx", np.int32),
+    ("image_idx", np.int32),
+    ("valid_from", np.int32),
+    ("valid_until", np.int32),
+    ("product_offsets", np.int64),
+    ("offer_stores", np.int32),
+    ("offer_store_offsets", np.int64),
+    ("first_offer_ids", np.int64),
+)
+
+
+class _Decoded:
+    """Sequence of ``table[codes[i]]``, decoded on access."""
+
+    __slots__ = ("codes", "table")
+
+    def __init__(self, codes: np.ndarray, table: list):
+        self.codes = codes
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.table[self.codes[i]]
+
+    def __iter__(self):
+        return (self.table[code] for code in self.codes.tolist())
+
+
+class _Dates(_Decoded):
+    """Sequence of the dates of ``ordinals``."""
+
+    def __init__(self, ordinals: np.ndarray):
+        super().__init__(ordinals, None)
+
+    def __getitem__(self, i) -> date:
+        return date.fromordinal(int(self.codes[i]))
+
+    def __iter__(self):
+        return (date.fromordinal(ordinal) for ordinal in self.codes.tolist())
+
+
+def _intern(values, table: Dict, codes: list) -> None:
+    for value in values:
+        code = table.get(value)
+        if code is None:
+            code = table[value] = len(table)
+        codes.append(code)
+
+
+def write_catalog_file(snapshot: CatalogSnapshot, path) -> int:
+    """Write ``snapshot`` to ``path`` (atomically); returns the file size."""
+    names = sorted(snapshot.products)
+    units: Dict[str, int] = {}
+    images: Dict[Optional[str], int] = {None: 0}
+    columns: Dict[str, list] = {name: [] for name, _ in _COLUMNS}
+    product_offsets = [0]
+    offer_store_offsets = [0]
+    for name in names:
+        offers = snapshot.products[name]
+        columns["ids"].append(np.asarray(offers.ids))
+        columns["prices"].append(np.asarray(offers.prices))
+        columns["quantities"].append(np.asarray(offers.quantities))
+        columns["base_qtys"].append(np.asarray(offers.base_qtys))
+        columns["store_idx"].append(np.asarray(offers.store_idx))
+        columns["base_unit_codes"].append(np.asarray(offers.base_unit_codes))
+        _intern(offers.units, units, columns["unit_idx"])
+        _intern(offers.images, images, columns["image_idx"])
+        columns["valid_from"].extend(day.toordinal() for day in offers.valid_from)
+        columns["valid_until"].extend(day.toordinal() for day in offers.valid_until)
+        columns["offer_stores"].append(np.asarray(offers.offer_stores))
+        columns["first_offer_ids"].append(np.asarray(offers.first_offer_ids))
+        product_offsets.append(product_offsets[-1] + len(offers))
+        offer_store_offsets.append(offer_store_offsets[-1] + len(offers.offer_stores))
+    columns["product_offsets"] = product_offsets
+    columns["offer_store_offsets"] = offer_store_offsets
+
+    arrays: List[Tuple[str, np.ndarray]] = []
+    for name, dtype in _COLUMNS:
+        values = columns[name]
+        if values and isinstance(values[0], np.ndarray):
+            array = np.concatenate(values).astype(dtype, copy=False)
+        else:
+            array = np.asarray(values, dtype=dtype)
+        arrays.append((name, array))
+
+    base_units = [None] * len(snapshot.unit_codes)
+    for unit, code in snapshot.unit_codes.items():
+        base_units[code] = unit
+    layout = {}
+    offset = 0
+    for name, array in arrays:
+        layout[name] = [np.dtype(array.dtype).str, offset, len(array)]
+        offset += -(-array.nbytes // 8) * 8
+    header = json.dumps({
+        "version": snapshot.version,
+        "built_on": snapshot.built_on.isoformat(),
+        "stores": snapshot.stores,
+        "base_units": base_units,
+        "units": list(units),
+        "images": list(images),
+        "products": names,
+        "columns": layout,
+    }, ensure_ascii=False).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + _HEADER_LENGTH.size + len(header)) % 8)
+
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for _, array in arrays:
+                f.write(array.tobytes())
+                f.write(b"\0" * (-array.nbytes % 8))
+            size = f.tell()
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return size
+
+
+def _read_header(f) -> Tuple[dict, int]:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a catalog snapshot file")
+    (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+    return json.loads(f.read(length)), len(MAGIC) + _HEADER_LENGTH.size + length
+
+
+def read_catalog_header(path) -> dict:
+    """The header of the file at ``path`` (version, built_on, string tables)."""
+    with open(path, "rb") as f:
+        return _read_header(f)[0]
+
+
+def read_catalog_file(path, generation: int = 0) -> CatalogSnapshot:
+    """Map the file at ``path`` read-only into a snapshot."""
+    with open(path, "rb") as f:
+        header, start = _read_header(f)
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    data = np.frombuffer(mapping, dtype=np.uint8)
+    columns = {}
+    for name, (dtype, offset, count) in header["columns"].items():
+        offset += start
+        columns[name] = data[offset:offset + count * np.dtype(dtype).itemsize].view(dtype)
+
+    stores, units, images = header["stores"], header["units"], header["images"]
+    base_units = header["base_units"]
+    bounds = columns["product_offsets"].tolist()
+    store_bounds = columns["offer_store_offsets"].tolist()
+    products: Dict[str, ProductOffers] = {}
+    for p, name in enumerate(header["products"]):
+        lo, hi = bounds[p], bounds[p + 1]
+        offers = ProductOffers.__new__(ProductOffers)
+        offers.ids = columns["ids"][lo:hi]
+        offers.prices = columns["prices"][lo:hi]
+        offers.quantities = columns["quantities"][lo:hi]
+        offers.base_qtys = columns["base_qtys"][lo:hi]
+        offers.store_idx = columns["store_idx"][lo:hi]
+        offers.base_unit_codes = columns["base_unit_codes"][lo:hi]
+        offers.stores = _Decoded(offers.store_idx, stores)
+        offers.base_units = _Decoded(offers.base_unit_codes, base_units)
+        offers.units = _Decoded(columns["unit_idx"][lo:hi], units)
+        offers.images = _Decoded(columns["image_idx"][lo:hi], images)
+        offers.valid_from = _Dates(columns["valid_from"][lo:hi])
+        offers.valid_until = _Dates(columns["valid_until"][lo:hi])
+        offers.offer_stores = columns["offer_stores"][store_bounds[p]:store_bounds[p + 1]]
+        offers.first_offer_ids = columns["first_offer_ids"][store_bounds[p]:store_bounds[p + 1]]
+        products[name] = offers
+
+    return CatalogSnapshot(
+        products,
+        date.fromisoformat(header["built_on"]),
+        generation,
+        header["version"],
+        stores=stores,
+        unit_codes={unit: code for code, unit in enumerate(base_units)},
+        mapped_from=str(path),
+    )
+
+
+def export_catalog(db, path, today: Optional[date] = None) -> CatalogSnapshot:
+    """Build the snapshot of the offers valid on ``today`` and write it to ``path``."""
+    snapshot = load_snapshot(db, today or date.today())
+    write_catalog_file(snapshot, path)
+    return snapshot
@@ -0,0 +1,92 @@
+"""
+Async database access built on SQLAlchemy's asyncio extension.
+
+Only used when DB_MODE=async. Needs an async driver for the configured
+database: asyncpg for PostgreSQL, aiosqlite for SQLite. The engine is
+created on first use so the sync deployment does not need either.
+"""
+import os
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db import DATABASE_URL, DATABASE_READ_URL, engine_options
+
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+# sync driver prefix -> async driver prefix
+_ASYNC_DRIVERS = (
+    ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+    ("postgresql://", "postgresql+asyncpg://"),
+    ("sqlite+pysqlite://", "sqlite+aiosqlite://"),
+    ("sqlite://", "sqlite+aiosqlite://"),
+)
+
+
+def async_database_url(url: str) -> str:
+    """Swap a sync driver in ``url`` for its async counterpart."""
+    for sync_prefix, async_prefix in _ASYNC_DRIVERS:
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+def _async_engine_options(url: str) -> dict:
+    options = engine_options(url)
+    # aiosqlite runs the connection in its own thread already
+    options.pop("connect_args", None)
+    return options
+
+
+_engines = {}
+_sessions = {}
+
+
+def _sessionmaker(role: str, url: Optional[str]) -> async_sessionmaker:
+    if role not in _sessions:
+        async_url = os.getenv("ASYNC_DATABASE_URL" if role == "primary" else "ASYNC_DATABASE_READ_URL") \
+            or async_database_url(url)
+        try:
+            engine = create_async_engine(async_url, **_async_engine_options(async_url))
+        except ImportError as exc:
+            raise RuntimeError(
+                f"DB_MODE=async needs an async driver for {async_url.split('://')[0]} "
+                f"(pip install asyncpg / aiosqlite): {exc}"
+            ) from exc
+        _engines[role] = engine
+        _sessions[role] = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    return _sessions[role]
+
+
+def get_async_engine() -> AsyncEngine:
+    _sessionmaker("primary", DATABASE_URL)
+    return _engines["primary"]
+
+
+async def get_async_db():
+    """Yield an async database session for FastAPI dependencies."""
+    db: AsyncSession = _sessionmaker("primary", DATABASE_URL)()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def get_async_read_db():
+    """Yield an async session on the read replica (or the primary when none is set)."""
+    if DATABASE_READ_URL:
+        factory = _sessionmaker("replica", DATABASE_READ_URL)
+    else:
+        factory = _sessionmaker("primary", DATABASE_URL)
+    db: AsyncSession = factory()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def dispose_async_engines() -> None:
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _sessions.clear()
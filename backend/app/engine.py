@@ -0,0 +1,326 @@
+"""
+Vectorized cost engine for grocery baskets.
+
+For one basket, every offer of every requested product is priced in a single
+NumPy pass per product: the number of packages needed to cover the requested
+quantity and the resulting cost. The cheapest offer per (store, product) and
+per product overall fall out of the same arrays, so single_store and
+multi_store (and any other mode) share one computation.
+"""
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.catalog import CatalogSnapshot, ProductOffers
+from app.units import to_base_qty
+
+_NO_OFFER = np.iinfo(np.int64).max
+
+
+class RequestedItem:
+    """Requested quantity of one product, in its own unit and in base units."""
+
+    __slots__ = ("name", "quantity", "unit", "base_quantity", "base_unit")
+
+    def __init__(self, name: str, quantity: float, unit: str):
+        self.name = name
+        self.quantity = quantity
+        self.unit = unit
+        self.base_quantity, self.base_unit = to_base_qty(quantity, unit)
+
+
+def offer_costs(
+    offers: ProductOffers,
+    item: RequestedItem,
+    unit_codes: Dict[Optional[str], int],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cost and package count of satisfying ``item`` with each offer.
+
+    When the units share a base unit, whole packages are bought. Otherwise
+    the price is assumed to be per requested unit and one package is counted.
+    """
+    code = unit_codes.get(item.base_unit, -1)
+    packaged = (offers.base_unit_codes == code) & (offers.base_qtys > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        packages = np.where(packaged, np.ceil(item.base_quantity / offers.base_qtys), 1.0)
+    costs = offers.prices * np.where(packaged, packages, item.quantity)
+    return costs, packages.astype(np.int64)
+
+
+class ProductCosts:
+    """
+    Costs of one requested item over all offers of its product, and the
+    cheapest offer per store: ``stores[k]`` is served best by offer
+    ``picks[k]``. ``cheapest`` is (cost, packages, offer index) overall.
+    """
+
+    __slots__ = ("costs", "packages", "stores", "picks", "cheapest")
+
+    def __init__(self, offers: ProductOffers, item: RequestedItem, unit_codes: Dict[Optional[str], int]):
+        costs, packages = offer_costs(offers, item, unit_codes)
+        best = int(np.argmin(costs))
+        # Sort by store, then cost; lexsort is stable so ties keep id order
+        # and the first entry of every store group is its cheapest offer.
+        order = np.lexsort((costs, offers.store_idx))
+        stores_sorted = offers.store_idx[order]
+        starts = np.flatnonzero(np.r_[True, stores_sorted[1:] != stores_sorted[:-1]])
+        self.costs = costs
+        self.packages = packages
+        self.stores = stores_sorted[starts]
+        self.picks = order[starts]
+        self.cheapest = (float(costs[best]), int(packages[best]), best)
+
+    def ranked(self, top: int) -> List[Tuple[int, int]]:
+        """
+        (offer index, packages) of the cheapest offer at each of the ``top``
+        cheapest stores, cheapest first (earliest offer on ties); the first
+        is ``cheapest``.
+        """
+        best = heapq.nsmallest(top, zip(self.costs[self.picks].tolist(), self.picks.tolist()))
+        return [(i, int(self.packages[i])) for _, i in best]
+
+
+CostCache = Dict[Tuple[str, float, str], ProductCosts]
+
+
+class BasketCosts:
+    """
+    Per-store cost matrix of one basket.
+
+    Rows are the stores that offer at least one requested product, ordered
+    by their first offer id; columns are the distinct requested products that
+    have offers. ``cost`` is ``inf`` where a store lacks a product, and
+    ``offer_index``/``packages`` identify the cheapest offer of that product
+    in that store (earliest offer on ties). ``cheapest`` holds the cheapest
+    offer per product across all stores as (cost, packages, offer index),
+    and ``product_costs`` the ProductCosts of each product.
+    """
+
+    def __init__(
+        self,
+        snapshot: CatalogSnapshot,
+        items: List[RequestedItem],
+        cache: Optional[CostCache] = None,
+    ):
+        """
+        ``cache`` lets several baskets priced against the same snapshot share
+        the per-product work for identical requested items.
+        """
+        self.snapshot = snapshot
+        # Duplicate names reuse the last requested quantity, like the request
+        # mapping they come from.
+        requested: Dict[str, RequestedItem] = {}
+        for item in items:
+            requested[item.name] = item
+        self.items = requested
+
+        self.products: Dict[str, ProductOffers] = {}
+        self.columns: Dict[str, int] = {}
+        for name in requested:
+            offers = snapshot.get(name)
+            if offers is not None and len(offers):
+                self.columns[name] = len(self.products)
+                self.products[name] = offers
+
+        n_stores, n_cols = len(snapshot.stores), len(self.products)
+        cost = np.full((n_stores, n_cols), np.inf)
+        offer_index = np.full((n_stores, n_cols), -1, dtype=np.int64)
+        packages = np.ones((n_stores, n_cols), dtype=np.int64)
+        first_offer = np.full(n_stores, _NO_OFFER, dtype=np.int64)
+        self.cheapest: Dict[str, Tuple[float, int, int]] = {}
+        self.product_costs: Dict[str, ProductCosts] = {}
+
+        for name, col in self.columns.items():
+            offers = self.products[name]
+            item = requested[name]
+            key = (name, item.quantity, item.unit)
+            product = cache.get(key) if cache is not None else None
+            if product is None:
+                product = ProductCosts(offers, item, snapshot.unit_codes)
+                if cache is not None:
+                    cache[key] = product
+
+            self.cheapest[name] = product.cheapest
+            self.product_costs[name] = product
+            cost[product.stores, col] = product.costs[product.picks]
+            offer_index[product.stores, col] = product.picks
+            packages[product.stores, col] = product.packages[product.picks]
+            np.minimum.at(first_offer, offers.offer_stores, offers.first_offer_ids)
+
+        present = np.flatnonzero(first_offer != _NO_OFFER)
+        rows = present[np.argsort(first_offer[present], kind="stable")]
+        self.store_rows = rows
+        self.cost = cost[rows]
+        self.offer_index = offer_index[rows]
+        self.packages = packages[rows]
+
+    def __bool__(self) -> bool:
+        return bool(self.products)
+
+    def store_name(self, row: int) -> str:
+        return self.snapshot.stores[self.store_rows[row]]
+
+    def column_weights(self, names: List[str]) -> np.ndarray:
+        """How many times each column's product appears in ``names``."""
+        weights = np.zeros(len(self.columns))
+        for name in names:
+            weights[self.columns[name]] += 1.0
+        return weights
+
+    def store_totals(self, names: List[str]) -> np.ndarray:
+        """
+        Total cost of ``names`` (duplicates counted) at every store; ``inf``
+        for stores that lack one of them. Summed item by item so totals are
+        bit-identical to adding the costs up one at a time.
+        """
+        totals = np.zeros(len(self.store_rows))
+        for name in names:
+            col = self.columns.get(name)
+            if col is None:
+                totals[:] = np.inf
+                break
+            totals += self.cost[:, col]
+        return totals
+
+
+class SingleStoreChoice:
+    """
+    The cheapest store offering every requested product, as ``store`` (an
+    index into ``CatalogSnapshot.stores``) and ``total``; ``picks`` maps
+    each product to the (offer index, packages) of its cheapest offer there.
+    ``ranked`` lists (store, total) of the cheapest stores, best first.
+    """
+
+    __slots__ = ("store", "total", "picks", "ranked")
+
+    def __init__(
+        self,
+        store: int,
+        total: float,
+        picks: Dict[str, Tuple[int, int]],
+        ranked: List[Tuple[int, float]],
+    ):
+        self.store = store
+        self.total = total
+        self.picks = picks
+        self.ranked = ranked
+
+
+# Relative slack of the pruning bound: partial sums are added up in another
+# order than the final totals, so they may differ in the last bits.
+_BOUND_SLACK = 1e-9
+
+
+def _first_offers(products: Dict[str, ProductOffers], stores: np.ndarray) -> np.ndarray:
+    """The earliest offer id of a requested product at each of ``stores`` (which carry them all)."""
+    first = np.full(len(stores), _NO_OFFER, dtype=np.int64)
+    for offers in products.values():
+        at = np.searchsorted(offers.offer_stores, stores)
+        first = np.minimum(first, offers.first_offer_ids[at])
+    return first
+
+
+def cheapest_single_store(
+    snapshot: CatalogSnapshot,
+    items: List[RequestedItem],
+    names: List[str],
+    top: int = 1,
+) -> Optional[SingleStoreChoice]:
+    """
+    single_store without the full cost matrix: the total of ``names``
+    (duplicates counted) at every store that offers all of them, as bare
+    numbers, and the offers of the winner only. None if no store offers all.
+
+    Candidates are the stores offering every product. Products are then
+    priced one at a time (most expensive first) over the offers of the
+    remaining candidates only. The ``top`` stores cheapest for the first
+    product are priced in full; no store whose partial sum exceeds the
+    highest of their totals can be among the ``top`` best, so it is
+    dropped. The survivors are ranked with a bounded heap. The result
+    (store, total, offers, ties) is the one ``BasketCosts.store_totals``
+    gives.
+    """
+    requested: Dict[str, RequestedItem] = {}
+    for item in items:
+        requested[item.name] = item
+    weights: Dict[str, int] = {}
+    for name in names:
+        weights[name] = weights.get(name, 0) + 1
+    products: Dict[str, ProductOffers] = {}
+    for name in weights:
+        offers = snapshot.get(name)
+        if offers is None or not len(offers):
+            return None
+        products[name] = offers
+
+    # candidates: the stores offering every product
+    coverage = np.zeros(len(snapshot.stores), dtype=np.int64)
+    for offers in products.values():
+        coverage[offers.offer_stores] += 1
+    alive = coverage == len(products)
+    if not alive.any():
+        return None
+
+    costs = {name: offer_costs(products[name], requested[name], snapshot.unit_codes) for name in products}
+    # the most expensive products first: their partial sums prune the most
+    order = sorted(products, key=lambda name: -weights[name] * float(costs[name][0].min()))
+    per_store: Dict[str, np.ndarray] = {}
+    partial = np.zeros(len(snapshot.stores))
+    bound = None
+    for name in order:
+        store_idx, cost = products[name].store_idx, costs[name][0]
+        selected = alive[store_idx]
+        best = np.full(len(snapshot.stores), np.inf)
+        np.minimum.at(best, store_idx[selected], cost[selected])
+        per_store[name] = best
+        partial[alive] += weights[name] * best[alive]
+        if bound is None:
+            candidates = np.flatnonzero(alive)
+            if len(candidates) <= top:
+                bound = np.inf
+                continue
+            probes = candidates[np.argpartition(partial[candidates], top - 1)[:top]]
+            probe_of = np.full(len(snapshot.stores), -1, dtype=np.int64)
+            probe_of[probes] = np.arange(top)
+            probe_totals = np.zeros(top)
+            for other in order:
+                probe = probe_of[products[other].store_idx]
+                at = probe >= 0
+                probe_best = np.full(top, np.inf)
+                np.minimum.at(probe_best, probe[at], costs[other][0][at])
+                probe_totals += weights[other] * probe_best
+            bound = float(probe_totals.max()) * (1.0 + _BOUND_SLACK)
+        alive &= partial <= bound
+
+    # Totals of the survivors summed item by item, as store_totals does
+    survivors = np.flatnonzero(alive)
+    totals = np.zeros(len(survivors))
+    for name in names:
+        totals += per_store[name][survivors]
+    if top == 1:
+        tied = survivors[totals == totals.min()]
+        store = int(tied[0])
+        if len(tied) > 1:
+            # store_totals orders the stores by their first offer of a requested product
+            store = int(tied[np.argmin(_first_offers(products, tied))])
+        ranked = [(store, float(totals.min()))]
+    else:
+        if len(survivors) > top:
+            keep = totals <= np.partition(totals, top - 1)[top - 1]
+            survivors, totals = survivors[keep], totals[keep]
+        ranked = [
+            (store, total) for total, _, store in heapq.nsmallest(
+                top, zip(totals.tolist(), _first_offers(products, survivors).tolist(), survivors.tolist()),
+            )
+        ]
+        store = ranked[0][0]
+
+    picks: Dict[str, Tuple[int, int]] = {}
+    for name, offers in products.items():
+        cost, packages = costs[name]
+        at = np.flatnonzero(offers.store_idx == store)
+        i = int(at[np.argmin(cost[at])])
+        picks[name] = (i, int(packages[i]))
+    return SingleStoreChoice(store, ranked[0][1], picks, ranked)
@@ -0,0 +1,143 @@
+"""
+Conditional GET for the catalog listing endpoints (/stores, /products).
+
+Their bodies only change when offers are written, so each one is serialized
+once per catalog version and kept as bytes, together with gzip (and, when
+the ``brotli`` package is installed, br) variants. Requests are answered
+from those bytes; ``If-None-Match`` / ``If-Modified-Since`` that match get
+a bodiless 304.
+
+The ETag combines the catalog version with a digest of the body (versions
+restart when tables are recreated); Last-Modified is the time of the last
+catalog write.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event
+
+from app.db import Base
+from app.serialization import dumps
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+CACHE_CONTROL = f"public, max-age={int(os.getenv('LISTING_CACHE_MAX_AGE', '60'))}"
+
+# Bodies smaller than this are not worth compressing.
+_MIN_COMPRESS_BYTES = 512
+
+
+class CachedBody:
+    """Serialized JSON body of one listing for one catalog version."""
+
+    __slots__ = ("version", "etag", "last_modified", "modified_at", "variants")
+
+    def __init__(self, content: Any, version: int, updated_at: Optional[datetime]):
+        body = dumps(content)
+        self.version = version
+        self.etag = f'"{version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        modified_at = (updated_at or datetime.now(timezone.utc)).replace(microsecond=0)
+        if modified_at.tzinfo is None:
+            # catalog_version.updated_at is stored as UTC without a zone
+            modified_at = modified_at.replace(tzinfo=timezone.utc)
+        self.modified_at = modified_at
+        self.last_modified = format_datetime(modified_at, usegmt=True)
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= _MIN_COMPRESS_BYTES:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body)
+
+    def encoding_for(self, accept_encoding: str) -> str:
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in accept_encoding.split(",")
+            if not part.strip().endswith(";q=0")
+        }
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.variants:
+                return encoding
+        return "identity"
+
+    def etag_for(self, encoding: str) -> str:
+        # each representation needs its own strong validator
+        return self.etag if encoding == "identity" else f'{self.etag[:-1]}-{encoding}"'
+
+    def not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or any(
+                self.etag_for(encoding) in tags for encoding in self.variants
+            )
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return self.modified_at <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+def conditional_response(request: Request, cached: CachedBody) -> Response:
+    """200 with the best precomputed variant, or 304 if the client's copy is current."""
+    encoding = cached.encoding_for(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": cached.etag_for(encoding),
+        "Last-Modified": cached.last_modified,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if cached.not_modified(request):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(cached.variants[encoding], media_type="application/json", headers=headers)
+
+
+class ListingCache:
+    """Latest ``CachedBody`` per listing name."""
+
+    def __init__(self):
+        self._bodies: Dict[str, CachedBody] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, version: int) -> Optional[CachedBody]:
+        cached = self._bodies.get(name)
+        return cached if cached is not None and cached.version == version else None
+
+    def put(self, name: str, content: Any, version: int, updated_at: Optional[datetime]) -> CachedBody:
+        cached = CachedBody(content, version, updated_at)
+        with self._lock:
+            current = self._bodies.get(name)
+            # never replace a body built from a newer version
+            if current is None or current.version <= version:
+                self._bodies[name] = cached
+        return cached
+
+    def versions(self) -> Dict[str, int]:
+        """Catalog version of every cached listing."""
+        return {name: cached.version for name, cached in self._bodies.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bodies.clear()
+
+
+listing_cache = ListingCache()
+
+
+# Recreated tables restart the catalog version at 0, so versions repeat.
+@event.listens_for(Base.metadata, "after_create")
+@event.listens_for(Base.metadata, "after_drop")
+def _clear_after_ddl(target, connection, **kw):
+    listing_cache.clear()
@@ -0,0 +1,381 @@
+"""
+Streaming bulk ingest of flyer offer datasets.
+
+Records are read incrementally from JSON (an array of objects), NDJSON or
+CSV files, optionally gzip-compressed, validated and normalized one at a
+time, and written in batches of ``batch_size`` rows: Core ``insert``
+executemany, or COPY on PostgreSQL (psycopg2). Memory is bounded by the
+batch, not the file.
+
+Offers are identified by (store_name, product_name, quantity, unit,
+valid_from). ``mode`` decides what happens to an offer already in the
+table (or earlier in the same file):
+
+- ``append``: insert every row as is (fastest; no lookups).
+- ``upsert``: update price, valid_until and image of the existing offer,
+  insert the others.
+- ``skip``: keep the existing offer, insert the others.
+
+Batches go through a temporary staging table and are merged with two
+set-based statements, so the lookups use ix_store_offers_offer_key
+(migration 0005) instead of one round trip per row. The whole file is one
+transaction that bumps the catalog version once, recording the products
+and stores of the file as its change set (``app.catalog``), so the offer
+catalog can patch its snapshot instead of rebuilding it.
+"""
+import csv
+import gzip
+import io
+import json
+import logging
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy import MetaData, Table, insert, text
+
+from app.catalog import catalog_version, record_catalog_change
+from app.models import StoreOffer
+from app.units import BASE_UNITS, offer_unit_columns
+
+logger = logging.getLogger(__name__)
+
+MODES = ("append", "upsert", "skip")
+FORMATS = ("json", "ndjson", "csv")
+
+OFFER_KEY = ("store_name", "product_name", "quantity", "unit", "valid_from")
+# Columns an upsert overwrites on an existing offer
+_UPDATED = ("price", "valid_until", "image", "base_unit", "base_quantity", "unit_price")
+_COLUMNS = tuple(column.name for column in StoreOffer.__table__.columns if column.name != "id")
+
+# Spellings of the source fields seen in flyer exports
+_ALIASES = {
+    "store_name": ("store_name", "store", "storeName"),
+    "product_name": ("product_name", "product", "productName"),
+    "quantity": ("quantity",),
+    "unit": ("unit",),
+    "price": ("price",),
+    "valid_from": ("valid_from", "validFrom"),
+    "valid_until": ("valid_until", "validUntil"),
+    "image": ("image",),
+}
+
+_READ_CHUNK = 1 << 16
+
+
+# --------- Reading --------- #
+
+def detect_format(path: Path) -> str:
+    suffixes = [suffix.lower() for suffix in path.suffixes if suffix.lower() != ".gz"]
+    suffix = suffixes[-1] if suffixes else ""
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if suffix == ".csv":
+        return "csv"
+    return "json"
+
+
+def _open(path: Path) -> TextIO:
+    if path.suffix.lower() == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return path.open("r", encoding="utf-8", newline="")
+
+
+def _iter_json_array(f: TextIO) -> Iterator[dict]:
+    """Objects of a top-level JSON array, decoded one at a time."""
+    decoder = json.JSONDecoder()
+    buffer = f.read(_READ_CHUNK).lstrip()
+    if not buffer.startswith("["):
+        # not an array: treat the file as NDJSON
+        yield from _iter_ndjson(io.StringIO(buffer + f.read()))
+        return
+    buffer, pos = buffer[1:], 0
+    while True:
+        # skip separators between elements
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                break
+            chunk = f.read(_READ_CHUNK)
+            if not chunk:
+                raise ValueError("unterminated JSON array")
+            buffer, pos = chunk, 0
+        if buffer[pos] == "]":
+            return
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                chunk = f.read(_READ_CHUNK)
+                if not chunk:
+                    raise
+                buffer, pos = buffer[pos:] + chunk, 0
+        yield obj
+        pos = end
+
+
+def _iter_ndjson(f: TextIO) -> Iterator[dict]:
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_records(path: Path, fmt: Optional[str] = None) -> Iterator[dict]:
+    """Raw records of a dataset file, read incrementally."""
+    fmt = fmt or detect_format(path)
+    with _open(path) as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        elif fmt == "ndjson":
+            yield from _iter_ndjson(f)
+        else:
+            yield from _iter_json_array(f)
+
+
+# --------- Validation --------- #
+
+class InvalidRecord(ValueError):
+    """A record that cannot be loaded; the message says why."""
+
+
+def _field(record: dict, name: str):
+    for alias in _ALIASES[name]:
+        value = record.get(alias)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _number(record: dict, name: str) -> float:
+    value = _field(record, name)
+    if value is None:
+        raise InvalidRecord(f"missing {name}")
+    try:
+        number = Decimal(str(value).strip().replace(",", "."))
+    except InvalidOperation:
+        raise InvalidRecord(f"invalid {name}: {value!r}") from None
+    if not number.is_finite() or number < 0:
+        raise InvalidRecord(f"invalid {name}: {value!r}")
+    return float(number)
+
+
+def _date(record: dict, name: str) -> date:
+    value = _field(record, name)
+    if value is None:
+        raise InvalidRecord(f"missing {name}")
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        raise InvalidRecord(f"invalid {name}: {value!r}") from None
+
+
+def normalize_record(record: dict) -> Dict[str, object]:
+    """
+    ``store_offers`` column values for a raw record, with the derived unit
+    columns filled in; raises InvalidRecord for rows that cannot be loaded.
+    """
+    if not isinstance(record, dict):
+        raise InvalidRecord("not an object")
+    row: Dict[str, object] = {}
+    for name in ("store_name", "product_name", "unit"):
+        value = _field(record, name)
+        if value is None or not str(value).strip():
+            raise InvalidRecord(f"missing {name}")
+        row[name] = " ".join(str(value).split())
+    row["quantity"] = _number(record, "quantity")
+    row["price"] = _number(record, "price")
+    row["valid_from"] = _date(record, "valid_from")
+    row["valid_until"] = _date(record, "valid_until")
+    if row["valid_until"] < row["valid_from"]:
+        raise InvalidRecord("valid_until before valid_from")
+    row["image"] = _field(record, "image")
+    row.update(offer_unit_columns(row["quantity"], row["unit"], row["price"]))
+    return row
+
+
+def offer_key(row: Dict[str, object]) -> Tuple:
+    return tuple(row[column] for column in OFFER_KEY)
+
+
+# --------- Writing --------- #
+
+def staging_table(*extra) -> Table:
+    """Temporary table with the store_offers columns (no id), plus ``extra`` columns/indexes."""
+    columns = [column._copy() for column in StoreOffer.__table__.columns if column.name != "id"]
+    return Table("store_offers_stage", MetaData(), *columns, *extra, prefixes=["TEMPORARY"])
+
+
+def copy_supported(conn) -> bool:
+    return conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+
+
+def copy_rows(conn, table: str, rows: List[Dict[str, object]], extra: Tuple[str, ...] = ()) -> None:
+    """COPY ``rows`` into ``table`` (PostgreSQL, psycopg2)."""
+    columns = _COLUMNS + extra
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["\\N" if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _merge_statements() -> Tuple[str, str]:
+    match = " AND ".join(f"o.{column} = s.{column}" for column in OFFER_KEY)
+    update = (
+        "UPDATE store_offers AS o SET "
+        + ", ".join(f"{column} = s.{column}" for column in _UPDATED)
+        + f" FROM store_offers_stage AS s WHERE {match}"
+    )
+    insert_new = (
+        f"INSERT INTO store_offers ({', '.join(_COLUMNS)}) "
+        f"SELECT {', '.join('s.' + column for column in _COLUMNS)} FROM store_offers_stage AS s "
+        f"WHERE NOT EXISTS (SELECT 1 FROM store_offers AS o WHERE {match})"
+    )
+    return update, insert_new
+
+
+class IngestStats:
+    """Counters of one ingest run."""
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.duplicates = 0  # same offer key again, in the file or already loaded
+        self.rejected: Dict[str, int] = {}
+        self.unknown_units: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        seconds = self.seconds or (time.perf_counter() - self.started)
+        return self.read / seconds if seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "read": self.read,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "duplicates": self.duplicates,
+            "rejected": sum(self.rejected.values()),
+            "rejected_by_reason": dict(self.rejected),
+            "unknown_units": dict(self.unknown_units),
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def valid_rows(records: Iterable[dict], stats: IngestStats) -> Iterator[Dict[str, object]]:
+    """Normalized rows of ``records``; rejected records are counted in ``stats``."""
+    for record in records:
+        stats.read += 1
+        try:
+            row = normalize_record(record)
+        except InvalidRecord as exc:
+            reason = str(exc).split(":")[0]
+            stats.rejected[reason] = stats.rejected.get(reason, 0) + 1
+            if sum(stats.rejected.values()) <= 10:
+                logger.warning("record %d rejected: %s", stats.read, exc)
+            continue
+        if row["base_unit"] not in BASE_UNITS:
+            stats.unknown_units[row["unit"]] = stats.unknown_units.get(row["unit"], 0) + 1
+        yield row
+
+
+def batches(rows: Iterable[Dict[str, object]], size: int) -> Iterator[List[Dict[str, object]]]:
+    batch: List[Dict[str, object]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest(
+    engine,
+    records: Iterable[dict],
+    mode: str = "upsert",
+    batch_size: int = 5000,
+    use_copy: bool = True,
+    progress: Optional[Callable[[IngestStats], None]] = None,
+) -> IngestStats:
+    """
+    Validate ``records`` and write them to store_offers in one transaction.
+    ``progress`` is called with the running stats after every batch.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+    stats = IngestStats()
+    products, stores = set(), set()
+
+    with engine.begin() as conn:
+        copy = use_copy and copy_supported(conn)
+        stage = None
+        if mode != "append":
+            stage = staging_table()
+            stage.create(conn)
+            update_sql, insert_sql = _merge_statements()
+
+        for batch in batches(valid_rows(records, stats), batch_size):
+            products.update(row["product_name"] for row in batch)
+            stores.update(row["store_name"] for row in batch)
+            if stage is None:
+                if copy:
+                    copy_rows(conn, "store_offers", batch)
+                else:
+                    conn.execute(insert(StoreOffer), batch)
+                stats.inserted += len(batch)
+            else:
+                # last occurrence of a key within the batch wins
+                unique = {offer_key(row): row for row in batch}
+                stats.duplicates += len(batch) - len(unique)
+                conn.execute(stage.delete())
+                if copy:
+                    copy_rows(conn, stage.name, list(unique.values()))
+                else:
+                    conn.execute(insert(stage), list(unique.values()))
+                if mode == "upsert":
+                    updated = conn.execute(text(update_sql)).rowcount
+                    stats.updated += updated
+                inserted = conn.execute(text(insert_sql)).rowcount
+                stats.inserted += inserted
+                if mode == "skip":
+                    stats.duplicates += len(unique) - inserted
+            if progress is not None:
+                progress(stats)
+
+        if stage is not None:
+            stage.drop(conn)
+        if stats.inserted or stats.updated:
+            record_catalog_change(
+                conn, products, stores, {"inserted": stats.inserted, "updated": stats.updated},
+            )
+
+    # Core writes skip the session hooks; let this process re-read the version
+    catalog_version.expire()
+    stats.seconds = time.perf_counter() - stats.started
+    return stats
+
+
+def ingest_file(engine, path: Path, fmt: Optional[str] = None, **options) -> IngestStats:
+    """``ingest`` the records of a JSON, NDJSON or CSV file (optionally .gz)."""
+    return ingest(engine, iter_records(path, fmt), **options)
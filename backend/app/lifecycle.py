@@ -0,0 +1,178 @@
+"""
+Offer lifecycle: keep store_offers down to the live working set.
+
+Offers are served from ``valid_from`` to ``valid_until`` (see
+``app.catalog.offers_statement``). Once expired they are only read by the
+listings, so ``archive_expired_offers`` moves offers that expired more than
+``keep_days`` ago to store_offers_archive, where the price history stays
+available for analytics.
+
+On PostgreSQL store_offers is partitioned by month of valid_until
+(migration 0007): ``store_offers_pYYYYMM`` partitions plus a default
+partition for dates outside them. The archive job prunes old partitions
+cheaply (the DELETE only visits them), drops the ones it emptied and
+creates the partitions of the coming months.
+"""
+import re
+import time
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import bindparam, delete, insert, select, text
+
+from app.catalog import catalog_version, record_catalog_change
+from app.models import StoreOffer, StoreOfferArchive
+
+# Months of partitions kept ahead of today
+PARTITION_MONTHS_AHEAD = 3
+
+_PARTITION_NAME = re.compile(r"^store_offers_p(\d{4})(\d{2})$")
+_COLUMNS = [column.name for column in StoreOffer.__table__.columns]
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"store_offers_p{month:%Y%m}"
+
+
+def is_partitioned(conn) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('store_offers')"
+    )).first())
+
+
+def partitions(conn) -> List[date]:
+    """Months with a partition, in order (PostgreSQL)."""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits AS i JOIN pg_class AS c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('store_offers')"
+    )).scalars()
+    months = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def ensure_partitions(conn, today: date, months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Create the partitions from this month to ``months_ahead`` months ahead.
+    Rows of a new month already in the default partition are moved into it
+    first, otherwise the partition could not be attached. Returns the names
+    of the partitions created.
+    """
+    existing = set(partitions(conn))
+    created = []
+    month = month_start(today)
+    for _ in range(months_ahead + 1):
+        if month not in existing:
+            name = partition_name(month)
+            bounds = {"start": month, "end": next_month(month)}
+            in_range = "valid_until >= :start AND valid_until < :end"
+            conn.execute(text(f"CREATE TABLE {name} (LIKE store_offers INCLUDING DEFAULTS)"))
+            conn.execute(text(
+                f"WITH moved AS (DELETE FROM store_offers_default WHERE {in_range} RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ), bounds)
+            conn.execute(text(
+                f"ALTER TABLE store_offers ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+            ))
+            created.append(name)
+        month = next_month(month)
+    return created
+
+
+def drop_empty_partitions(conn, before: date) -> List[str]:
+    """Drop the empty partitions of months that ended before ``before``."""
+    dropped = []
+    for month in partitions(conn):
+        if next_month(month) > before:
+            break
+        name = partition_name(month)
+        if conn.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first() is None:
+            conn.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
+
+
+class ArchiveResult:
+    """What an archive run did."""
+
+    def __init__(self, cutoff: date):
+        self.cutoff = cutoff
+        self.archived = 0
+        self.batches = 0
+        self.partitions_created: List[str] = []
+        self.partitions_dropped: List[str] = []
+        self.seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "cutoff": self.cutoff.isoformat(),
+            "archived": self.archived,
+            "batches": self.batches,
+            "partitions_created": self.partitions_created,
+            "partitions_dropped": self.partitions_dropped,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def archive_expired_offers(
+    engine,
+    today: Optional[date] = None,
+    keep_days: int = 7,
+    batch_size: int = 5000,
+) -> ArchiveResult:
+    """
+    Move the offers that expired before ``today - keep_days`` to
+    store_offers_archive, ``batch_size`` offers per transaction so writers
+    are never blocked for long. Each batch bumps the catalog version with an
+    empty product change set: the listings see the offers go, the offer
+    catalog and the /optimize response cache (which never served them) stay.
+    """
+    today = today or date.today()
+    result = ArchiveResult(today - timedelta(days=keep_days))
+    started = time.perf_counter()
+    expired = StoreOffer.valid_until < result.cutoff
+    # repeat the expiry predicate so PostgreSQL prunes to the old partitions
+    in_batch = (expired, StoreOffer.id.in_(bindparam("ids", expanding=True)))
+    columns = [StoreOffer.__table__.c[name] for name in _COLUMNS]
+
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(
+                select(StoreOffer.id).where(expired).order_by(StoreOffer.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            stores = conn.execute(
+                select(StoreOffer.store_name).where(*in_batch).distinct(), {"ids": ids}
+            ).scalars().all()
+            conn.execute(
+                insert(StoreOfferArchive).from_select(_COLUMNS, select(*columns).where(*in_batch)),
+                {"ids": ids},
+            )
+            conn.execute(delete(StoreOffer).where(*in_batch), {"ids": ids})
+            record_catalog_change(conn, [], stores, {})
+        result.archived += len(ids)
+        result.batches += 1
+
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            result.partitions_dropped = drop_empty_partitions(conn, result.cutoff)
+            result.partitions_created = ensure_partitions(conn, today)
+
+    catalog_version.expire()
+    result.seconds = time.perf_counter() - started
+    return result
@@ -1,14 +1,47 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from app.db import Base, engine
-from app import models  # noqa: F401  # Needed so Base.metadata.create_all loads models
-from app.api import optimizer
+from app.db import engine, read_engine
+from app import models  # noqa: F401  # registers the tables on Base.metadata
+from app.api import best_value, metrics, ops, optimizer, suggest
+from app.catalog import offer_catalog
+from app.search import detect_search_index
+from app.db_async import DB_MODE, dispose_async_engines
+from app.timing import TimingMiddleware
+
+# The schema is managed by Alembic (`alembic upgrade head`, see
+# migrations/); the app only checks which optional indexes are in place.
+with engine.connect() as connection:
+    detect_search_index(connection)
+
 
-# Dev-only: create tables from SQLAlchemy models.
-# In production, use Alembic migrations instead.
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the offer catalog so the first /optimize call does not pay for it;
+    # a worker forked by app.prefork keeps the snapshot loaded before the fork.
+    if offer_catalog.enabled:
+        offer_catalog.get()
+    yield
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
+    if DB_MODE == "async":
+        await dispose_async_engines()
 
-app = FastAPI(title="SmartGroceryOptimizer API")
+
+app = FastAPI(title="SmartGroceryOptimizer API", lifespan=lifespan)
+# Server-Timing and /metrics; a pass-through unless REQUEST_TIMING_ENABLED
+app.add_middleware(TimingMiddleware)
 
 # Register routes
-app.include_router(optimizer.router)
+if DB_MODE == "async":
+    from app.api import optimizer_async
+
+    app.include_router(optimizer_async.router)
+else:
+    app.include_router(optimizer.router)
+app.include_router(suggest.router)
+app.include_router(best_value.router)
+app.include_router(ops.router)
+app.include_router(metrics.router)
@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, Text, Numeric, Date
+from sqlalchemy import BigInteger, Column, DateTime, Integer, Text, Numeric, Date, Float, Index, event, func, insert
 
 from app.db import Base
+from app.units import offer_unit_columns
 
 
 class StoreOffer(Base):
+    """
+    Current, upcoming and recently expired offers. On PostgreSQL the table is
+    partitioned by month of valid_until (migrations/versions/0007); expired
+    offers are moved to store_offers_archive by app.lifecycle.
+    """
     __tablename__ = "store_offers"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -15,3 +21,103 @@ class StoreOffer(Base):
     valid_from = Column(Date, nullable=False)       # offer start date (can be NULL)
     valid_until = Column(Date, nullable=False)     # offer expiry date
     image = Column(Text, nullable=True)            # optional URL to product image
+
+    # Derived at ingest time from quantity/unit/price (see app.units)
+    base_unit = Column(Text, nullable=True)        # normalized base unit: 'g', 'ml', 'piece'
+    base_quantity = Column(Float, nullable=True)   # package size in base_unit, e.g. 1000.0 for 1 kg
+    unit_price = Column(Float, nullable=True)      # price per base unit; NULL for empty packages
+
+    # Indexes for the hot query shapes; created by migrations/versions/0003.
+    __table_args__ = (
+        # /optimize and the offer catalog: product_name IN (...) AND valid_until >= :today
+        # (valid_from <= :today is checked on the included column).
+        # Covering on PostgreSQL so the offers are read from the index alone.
+        Index(
+            "ix_store_offers_product_valid_until", "product_name", "valid_until",
+            postgresql_include=[
+                "id", "store_name", "price", "quantity", "unit", "valid_from", "image",
+                "base_unit", "base_quantity",
+            ],
+        ),
+        # Smallest package per product (/products, distinct /search/products)
+        Index("ix_store_offers_product_quantity", "product_name", "quantity", "id"),
+        # DISTINCT store_name (/stores)
+        Index("ix_store_offers_store_name", "store_name"),
+        # Whole-catalog snapshot (valid_until >= :today) and expiry scans
+        Index("ix_store_offers_valid_until", "valid_until"),
+        # Offer key lookups of the bulk ingest (app.ingest); created by 0005
+        Index("ix_store_offers_offer_key", "product_name", "store_name", "valid_from"),
+    )
+
+
+@event.listens_for(StoreOffer, "before_insert")
+@event.listens_for(StoreOffer, "before_update")
+def _fill_unit_columns(mapper, connection, offer):
+    """Keep the derived unit columns in sync for offers written through the ORM."""
+    for key, value in offer_unit_columns(offer.quantity, offer.unit, offer.price).items():
+        setattr(offer, key, value)
+
+
+class CatalogVersion(Base):
+    """
+    Single-row counter bumped by every transaction that changes store_offers,
+    so caches in any process can tell whether the offers they saw are current.
+    """
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+@event.listens_for(CatalogVersion.__table__, "after_create")
+def _insert_version_row(target, connection, **kw):
+    connection.execute(insert(target).values(id=1, version=0))
+
+
+class CatalogChange(Base):
+    """
+    What one catalog version changed, written by ``app.sync`` in the same
+    transaction that bumps the version: the affected product and store names
+    as JSON arrays. Versions without a row (other writers) changed unknown
+    offers.
+    """
+    __tablename__ = "catalog_changes"
+
+    version = Column(BigInteger, primary_key=True, autoincrement=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    inserted = Column(Integer, nullable=False)
+    updated = Column(Integer, nullable=False)
+    expired = Column(Integer, nullable=False)
+    products = Column(Text, nullable=False)
+    stores = Column(Text, nullable=False)
+
+
+class StoreOfferArchive(Base):
+    """
+    Expired offers moved out of store_offers by ``app.lifecycle``, kept for
+    price history. Same columns (and ids) as store_offers plus archived_at.
+    The ids are not unique here (SQLite reuses the ids of deleted rows), so
+    the archive has a key of its own.
+    """
+    __tablename__ = "store_offers_archive"
+
+    archive_id = Column(Integer, primary_key=True)
+    id = Column(Integer, nullable=False)
+    store_name = Column(Text, nullable=False)
+    product_name = Column(Text, nullable=False)
+    quantity = Column(Numeric, nullable=False)
+    unit = Column(Text, nullable=False)
+    price = Column(Numeric, nullable=False)
+    valid_from = Column(Date, nullable=False)
+    valid_until = Column(Date, nullable=False)
+    image = Column(Text, nullable=True)
+    base_unit = Column(Text, nullable=True)
+    base_quantity = Column(Float, nullable=True)
+    unit_price = Column(Float, nullable=True)
+    archived_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Price history of a product
+        Index("ix_store_offers_archive_product_valid_from", "product_name", "valid_from"),
+    )
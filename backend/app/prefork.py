@@ -0,0 +1,228 @@
+"""
+Pre-fork server: set up once, then fork warm uvicorn workers.
+
+``uvicorn --workers N`` starts N fresh interpreters: each imports the app,
+probes the database and builds its own offer catalog from store_offers.
+``PreforkServer`` instead, in the master process:
+
+1. runs the Alembic migrations (``migrate=True``) before any worker exists;
+2. exports the live offers to the catalog snapshot file, unless it already
+   holds the current version and date (``app.catalog_file``);
+3. imports ``app.main`` (routes, models, search index probe) and maps the
+   catalog from the file, which also builds the autocomplete index;
+4. closes its database connections, freezes the garbage collector (so
+   collections in the workers do not write to the pages of inherited
+   objects) and binds the listening socket;
+5. forks ``workers`` processes that serve the socket with uvicorn.
+
+Workers start with the code, the catalog and its indexes already loaded
+and share those pages copy-on-write; the offer columns are mapped from
+the file, so all processes on the host hold one copy. ``GET /ops/ready``
+reports a worker's warm state.
+
+While running, the master replaces workers that exit, re-exports the file
+when the catalog version or the date moves on (a worker that cannot patch
+its snapshot maps the new file instead of reading store_offers, if the
+export is already there), and on SIGTERM/SIGINT stops the workers
+gracefully.
+"""
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import time
+from datetime import date
+from typing import Dict, Optional
+
+from app.catalog import offer_catalog, read_catalog_version
+from app.db import SessionLocal, engine, read_engine
+
+logger = logging.getLogger(__name__)
+
+# uvicorn's exit status when the app fails to start
+_STARTUP_FAILURE = 3
+
+
+def export_if_stale(path: str) -> bool:
+    """Export the catalog to ``path`` unless it holds the current version of today's offers."""
+    from app.catalog_file import export_catalog, read_catalog_header
+
+    db = SessionLocal()
+    try:
+        if os.path.exists(path):
+            header = read_catalog_header(path)
+            if header["built_on"] == date.today().isoformat() and header["version"] == read_catalog_version(db):
+                return False
+        export_catalog(db, path)
+        return True
+    finally:
+        db.close()
+
+
+def preload(migrate: bool = False, snapshot_path: Optional[str] = None):
+    """Steps 1-4 in the calling process; returns the app."""
+    if migrate:
+        from app import migrations
+
+        migrations.upgrade(str(engine.url))
+    if offer_catalog.enabled and snapshot_path:
+        export_if_stale(snapshot_path)
+        offer_catalog.snapshot_path = snapshot_path
+
+    from app.main import app
+
+    if offer_catalog.enabled:
+        offer_catalog.get()
+    _close_connections()
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def _close_connections() -> None:
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # with proto 0 asyncio does not set TCP_NODELAY on the accepted connections
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """Master process: forks, supervises and stops the workers; see the module docstring."""
+
+    def __init__(
+        self,
+        app,
+        sock: socket.socket,
+        workers: int = 1,
+        snapshot_path: Optional[str] = None,
+        refresh_seconds: float = 5.0,
+        graceful_timeout: float = 30.0,
+        log_level: str = "info",
+        access_log: bool = False,
+    ):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.snapshot_path = snapshot_path
+        self.refresh_seconds = refresh_seconds
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.access_log = access_log
+        self.pids: Dict[int, float] = {}
+        self._stopping = False
+
+    def run(self) -> int:
+        """Fork the workers and supervise them until a signal; returns the exit status."""
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+        logger.info("Master %s serving with %d workers", os.getpid(), self.workers)
+        status = 0
+        next_refresh = time.monotonic() + self.refresh_seconds
+        while not self._stopping:
+            status = self._reap()
+            if status:
+                break
+            if self.snapshot_path and offer_catalog.enabled and time.monotonic() >= next_refresh:
+                self._refresh_snapshot()
+                next_refresh = time.monotonic() + self.refresh_seconds
+            time.sleep(0.2)
+        self._shutdown()
+        return status
+
+    def _stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.pids[pid] = time.monotonic()
+            return
+        status = 0
+        try:
+            self._serve()
+        except SystemExit as exc:
+            status = exc.code if isinstance(exc.code, int) else 1
+        except BaseException:
+            logger.exception("Worker %s failed", os.getpid())
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _serve(self) -> None:
+        import uvicorn
+
+        # uvicorn installs its own handlers for a graceful shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        random.seed()
+        # connections opened by the master must not be shared
+        engine.dispose(close=False)
+        if read_engine is not engine:
+            read_engine.dispose(close=False)
+        config = uvicorn.Config(
+            self.app, lifespan="on", log_level=self.log_level, access_log=self.access_log,
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _reap(self) -> int:
+        """Replace exited workers; a worker that failed to start stops the server."""
+        while self.pids:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                break
+            self.pids.pop(pid, None)
+            code = os.waitstatus_to_exitcode(status)
+            if code == _STARTUP_FAILURE:
+                logger.error("Worker %s failed to start; stopping", pid)
+                return code
+            if not self._stopping:
+                logger.warning("Worker %s exited with %s; starting a new one", pid, code)
+                self._spawn()
+        return 0
+
+    def _refresh_snapshot(self) -> None:
+        try:
+            if export_if_stale(self.snapshot_path):
+                logger.info("Exported the catalog snapshot to %s", self.snapshot_path)
+                # workers forked from now on start with the new snapshot
+                offer_catalog.get()
+        except Exception:
+            logger.exception("Could not export the catalog snapshot")
+        finally:
+            _close_connections()
+
+    def _shutdown(self) -> None:
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.pids and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.pids.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for pid in list(self.pids):
+            logger.warning("Worker %s did not stop in time; killing it", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.pids.clear()
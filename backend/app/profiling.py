@@ -0,0 +1,185 @@
+"""
+On-demand profiling of /optimize requests in production.
+
+Two opt-in triggers, both off by default:
+
+- ``X-Profile: <PROFILE_TOKEN>``: an operator profiles one request. The
+  response cache is bypassed so the optimizer actually runs.
+- ``PROFILE_SAMPLE_RATE``: that fraction of the cache misses is profiled.
+
+The optimizer call of a profiled request runs under cProfile. Two files go
+to ``PROFILE_DIR`` per capture: ``<id>.prof`` (pstats, for snakeviz or
+``python -m pstats``) and ``<id>.json`` with the request (payload, options),
+the catalog it ran on, the outcome, the duration, the offer counts of the
+requested products and the top functions. Only the newest
+``PROFILE_MAX_CAPTURES`` captures are kept. The capture id is returned in
+the ``X-Profile-Id`` header and logged.
+
+``python -m scripts.replay_profile <id>.json`` replays a capture against a
+snapshot of the catalog.
+
+One request is profiled at a time per process; a trigger that finds the
+profiler busy runs unprofiled.
+"""
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+T = TypeVar("T")
+
+
+def top_functions(stats: pstats.Stats, limit: int = 20) -> list:
+    """The ``limit`` functions with the most cumulative time."""
+    rows = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({function})",
+            "calls": calls,
+            "tottime_ms": round(tottime * 1e3, 3),
+            "cumtime_ms": round(cumtime * 1e3, 3),
+        })
+    rows.sort(key=lambda row: row["cumtime_ms"], reverse=True)
+    return rows[:limit]
+
+
+def options_dict(options) -> dict:
+    return {
+        "mode": options.mode.value,
+        "max_stores": options.max_stores,
+        "store_visit_cost": options.store_visit_cost,
+        "top": options.top,
+    }
+
+
+class Profiler:
+    """Triggers and storage of request profiles; see the module docstring."""
+
+    def __init__(
+        self,
+        directory,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        max_captures: int = 200,
+    ):
+        self.directory = Path(directory)
+        self.token = token or None
+        self.sample_rate = sample_rate
+        self.max_captures = max_captures
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.token is not None or self.sample_rate > 0
+
+    def forced(self, header: Optional[str]) -> bool:
+        """True if ``header`` (the X-Profile value) carries the profiling token."""
+        return (
+            self.token is not None
+            and header is not None
+            and hmac.compare_digest(header.encode(), self.token.encode())
+        )
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def run(
+        self,
+        func: Callable[[], T],
+        endpoint: str,
+        payload,
+        options,
+        snapshot,
+        reason: str,
+    ) -> Tuple[T, Optional[str]]:
+        """
+        Call ``func`` under cProfile and store the capture; returns its
+        result and the capture id (None if another profile was running).
+        An HTTPException is recorded with its status and re-raised.
+        """
+        if not self._lock.acquire(blocking=False):
+            return func(), None
+        try:
+            captured_at = datetime.now(timezone.utc)
+            capture_id = f"{captured_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+            profile = cProfile.Profile()
+            status, detail = 200, None
+            start = time.perf_counter()
+            profile.enable()
+            try:
+                return func(), capture_id
+            except HTTPException as exc:
+                status, detail = exc.status_code, exc.detail
+                raise
+            finally:
+                profile.disable()
+                elapsed = time.perf_counter() - start
+                self._save(profile, {
+                    "id": capture_id,
+                    "captured_at": captured_at.isoformat(timespec="seconds"),
+                    "endpoint": endpoint,
+                    "reason": reason,
+                    "options": options_dict(options),
+                    "payload": payload.model_dump(mode="json", exclude_unset=True),
+                    "catalog": {
+                        "version": snapshot.version,
+                        "built_on": snapshot.built_on.isoformat(),
+                        "offers": {
+                            item.name: len(snapshot.get(item.name) or ()) for item in payload.items
+                        },
+                    },
+                    "status": status,
+                    "detail": detail,
+                    "ms": round(elapsed * 1e3, 3),
+                })
+        finally:
+            self._lock.release()
+
+    def _save(self, profile: cProfile.Profile, record: dict) -> None:
+        capture_id = record["id"]
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            stats = pstats.Stats(profile, stream=io.StringIO())
+            stats.dump_stats(self.directory / f"{capture_id}.prof")
+            record["top"] = top_functions(stats)
+            (self.directory / f"{capture_id}.json").write_text(json.dumps(record, indent=2) + "\n")
+            self._prune()
+        except OSError:
+            logger.exception("Could not store profile %s", capture_id)
+            return
+        logger.info(
+            "Profiled %s %s (%s): %s in %.1f ms, stored as %s",
+            record["endpoint"], record["options"]["mode"], record["reason"],
+            record["status"], record["ms"], capture_id,
+        )
+
+    def _prune(self) -> None:
+        captures = sorted(self.directory.glob("*.json"))
+        for path in captures[:max(len(captures) - self.max_captures, 0)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".prof").unlink(missing_ok=True)
+
+
+profiler = Profiler(
+    os.getenv("PROFILE_DIR", "./profiles"),
+    token=os.getenv("PROFILE_TOKEN"),
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    max_captures=int(os.getenv("PROFILE_MAX_CAPTURES", "200")),
+)
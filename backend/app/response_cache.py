@@ -0,0 +1,319 @@
+"""
+Response cache for /optimize.
+
+Entries are keyed on a canonical form of the request: the mode (plus
+max_stores/store_visit_cost in max_stores mode) and the items sorted by name,
+with unit spellings normalized ("Liter" and "l" are the same request). Every
+key is scoped to the catalog version and date the offers were read at, so
+an ingest or a new day makes older entries unreachable; the first lookup
+under a new scope drops them from the in-process layer.
+
+An answer only depends on the offers of the basket's products. When the
+offer catalog patches a snapshot from a sync's change set, entries whose
+baskets do not name a changed product move on to the new version instead
+of being dropped (in-process layer only).
+
+A hit is served in the order of the request's items, so baskets that only
+differ in item order share an entry. Baskets naming a product twice are
+not cached (the last quantity wins there, so item order matters).
+
+The in-process layer is an LRU bounded by the size of the serialized
+responses. With RESPONSE_CACHE_BACKEND=sqlite a SQLite file shared by all
+workers on the host sits behind it, as a local stand-in for a shared cache.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from sqlalchemy import event
+
+from app import schemas
+from app.catalog import CatalogSnapshot, offer_catalog
+from app.db import Base
+from app.serialization import dumps
+from app.units import normalize_unit, to_base_qty
+
+Scope = Tuple[int, date]
+
+
+def basket_key(payload: schemas.GroceryListRequest, options) -> Optional[str]:
+    """Canonical cache key of a request, or None when it cannot be cached."""
+    names = [item.name for item in payload.items]
+    if not names or len(set(names)) != len(names):
+        return None
+    if options.top:
+        # ranked totals are summed in the request's item order
+        return None
+    items = sorted((item.name, float(item.quantity), normalize_unit(item.unit)) for item in payload.items)
+    mode = options.mode.value
+    if options.mode == schemas.OptimizationMode.MAX_STORES:
+        mode = f"{mode}:{options.max_stores}:{float(options.store_visit_cost)}"
+    return json.dumps([mode, items], ensure_ascii=False, separators=(",", ":"))
+
+
+def _entry_meta(
+    payload: schemas.GroceryListRequest,
+    response: Dict,
+    snapshot: CatalogSnapshot,
+) -> dict:
+    """
+    What a hit needs besides the response: the cost of every assignment, to
+    re-add the total in the hit's item order (bit-identical to computing it
+    afresh), and the offer unit of assignments that echo the requested unit
+    (units that do not convert), to echo the hit's own spelling instead.
+    """
+    requested = {item.name: item for item in payload.items}
+    costs, echoed = {}, {}
+    for assigned in response["items"]:
+        name = assigned["product"]["product_name"]
+        item = requested[name]
+        offers = snapshot.get(name)
+        i = int(np.flatnonzero(offers.ids == assigned["product"]["offer_id"])[0])
+        same_unit = to_base_qty(1.0, item.unit)[1] == offers.base_units[i]
+        # same arithmetic as app.engine.offer_costs
+        packaged = same_unit and offers.base_qtys[i] > 0
+        costs[name] = float(offers.prices[i] * (float(assigned["required_packages"]) if packaged else float(item.quantity)))
+        if not same_unit:
+            echoed[name] = offers.units[i]
+    return {"costs": costs, "echoed": echoed}
+
+
+def _present(response: Dict, meta: dict, payload: schemas.GroceryListRequest) -> Dict:
+    """
+    The cached response in the order (and unit spelling) of ``payload``.
+    Cached content is shared: changed parts are copied, never updated.
+    """
+    by_name = {assigned["product"]["product_name"]: assigned for assigned in response["items"]}
+    echoed, costs = meta["echoed"], meta["costs"]
+    items: List[Dict] = []
+    stores: List[str] = []
+    total = 0.0
+    for item in payload.items:
+        assigned = by_name[item.name]
+        if item.name in echoed:
+            unit = item.unit or echoed[item.name]
+            if unit != assigned["product"]["unit"]:
+                assigned = dict(assigned, product=dict(assigned["product"], unit=unit))
+        items.append(assigned)
+        total += costs[item.name]
+        store = assigned["product"]["store_name"]
+        if store not in stores:
+            stores.append(store)
+    if response["mode"] == schemas.OptimizationMode.SINGLE_STORE.value:
+        stores = response["stores"]
+    return dict(response, total_price=total, stores=stores, items=items)
+
+
+class _SharedStore:
+    """Cache entries in a SQLite file, shared by processes on one host."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS optimize_cache ("
+                " scope TEXT NOT NULL, key TEXT NOT NULL, body TEXT NOT NULL,"
+                " meta TEXT NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL,"
+                " PRIMARY KEY (scope, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_optimize_cache_used_at ON optimize_cache (used_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, scope: str, key: str):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT body, meta FROM optimize_cache WHERE key = ? AND scope = ?", (key, scope)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE optimize_cache SET used_at = ? WHERE scope = ? AND key = ?", (time.time(), scope, key))
+        return row
+
+    def put(self, scope: str, key: str, body: str, meta: str) -> None:
+        conn = self._connection()
+        size = len(body) + len(meta) + len(key)
+        conn.execute(
+            "INSERT OR REPLACE INTO optimize_cache (scope, key, body, meta, size, used_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (scope, key, body, meta, size, time.time()),
+        )
+        # Workers may still be on an older scope (or already on a newer one):
+        # entries of other scopes are not deleted here, they are no longer
+        # read and leave through the LRU trim.
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM optimize_cache").fetchone()[0]
+        if total > self.max_bytes:
+            # drop the least recently used tenth
+            conn.execute(
+                "DELETE FROM optimize_cache WHERE rowid IN ("
+                " SELECT rowid FROM optimize_cache ORDER BY used_at LIMIT"
+                " (SELECT COUNT(*) / 10 + 1 FROM optimize_cache))"
+            )
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM optimize_cache")
+
+
+class ResponseCache:
+    """LRU of /optimize responses bounded by ``max_bytes`` of serialized JSON."""
+
+    def __init__(self, max_bytes: int = 32 << 20, enabled: bool = True, shared: Optional[_SharedStore] = None):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.shared = shared
+        # key -> (response, meta, size, product names)
+        self._entries: "OrderedDict[str, Tuple[Dict, dict, int, FrozenSet[str]]]" = OrderedDict()
+        self._scope: Optional[Scope] = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0, "shared_hits": 0, "misses": 0, "uncacheable": 0, "evictions": 0, "carried_over": 0,
+        }
+
+    def _enter_scope(self, scope: Scope) -> None:
+        if scope != self._scope:
+            self._entries.clear()
+            self._bytes = 0
+            self._scope = scope
+
+    def get(
+        self,
+        scope: Scope,
+        payload: schemas.GroceryListRequest,
+        options,
+    ) -> Optional[Dict]:
+        """Cached response content for the request under ``scope``, or None."""
+        if not self.enabled:
+            return None
+        key = basket_key(payload, options)
+        if key is None:
+            self.counters["uncacheable"] += 1
+            return None
+        with self._lock:
+            self._enter_scope(scope)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return _present(entry[0], entry[1], payload)
+
+        if self.shared is not None:
+            row = self.shared.get(repr(scope), key)
+            if row is not None:
+                response = json.loads(row[0])
+                meta = json.loads(row[1])
+                self._remember(scope, key, response, meta, len(row[0]), payload)
+                self.counters["shared_hits"] += 1
+                return _present(response, meta, payload)
+
+        self.counters["misses"] += 1
+        return None
+
+    def put(
+        self,
+        scope: Scope,
+        payload: schemas.GroceryListRequest,
+        options,
+        response: Dict,
+        snapshot: CatalogSnapshot,
+    ) -> None:
+        """Cache ``response`` (content), computed for ``payload`` from ``snapshot``."""
+        if not self.enabled:
+            return
+        key = basket_key(payload, options)
+        if key is None:
+            return
+        meta = _entry_meta(payload, response, snapshot)
+        body = dumps(response).decode()
+        self._remember(scope, key, response, meta, len(body), payload)
+        if self.shared is not None:
+            self.shared.put(repr(scope), key, body, json.dumps(meta))
+
+    def _remember(self, scope, key, response, meta, size, payload) -> None:
+        names = frozenset(item.name for item in payload.items)
+        with self._lock:
+            self._enter_scope(scope)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (response, meta, size, names)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, _, evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.counters["evictions"] += 1
+
+    def carry_over(self, snapshot: CatalogSnapshot) -> None:
+        """
+        Offer catalog listener: when ``snapshot`` was patched from the version
+        the entries belong to, keep the entries of baskets it did not change.
+        """
+        if snapshot.changes is None:
+            return
+        base_version, changed = snapshot.changes
+        with self._lock:
+            if self._scope != (base_version, snapshot.built_on):
+                return
+            for key in [key for key, entry in self._entries.items() if entry[3] & changed]:
+                self._bytes -= self._entries.pop(key)[2]
+            self._scope = (snapshot.version, snapshot.built_on)
+            self.counters["carried_over"] += len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["shared_hits"] + self.counters["misses"]
+        hits = self.counters["hits"] + self.counters["shared_hits"]
+        return {
+            "enabled": self.enabled,
+            "backend": "sqlite" if self.shared is not None else "memory",
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            **self.counters,
+        }
+
+
+def _from_env() -> ResponseCache:
+    max_bytes = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 << 20)))
+    shared = None
+    if os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower() == "sqlite":
+        shared = _SharedStore(os.getenv("RESPONSE_CACHE_PATH", "./optimize_cache.db"), max_bytes * 4)
+    return ResponseCache(
+        max_bytes=max_bytes,
+        enabled=os.getenv("RESPONSE_CACHE_ENABLED", "1").lower() not in ("0", "false", "no"),
+        shared=shared,
+    )
+
+
+response_cache = _from_env()
+offer_catalog.add_listener(response_cache.carry_over)
+
+
+# Recreated tables restart the catalog version at 0, so versions repeat.
+@event.listens_for(Base.metadata, "after_create")
+@event.listens_for(Base.metadata, "after_drop")
+def _clear_after_ddl(target, connection, **kw):
+    response_cache.clear()
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import date
 
 from pydantic import BaseModel, Field
@@ -18,11 +18,16 @@ class GroceryListRequest(BaseModel):
     items: List[GroceryItem]
 
 
+class BatchGroceryListRequest(BaseModel):
+    baskets: List[GroceryListRequest]
+
+
 # --------- Optimization / result models --------- #
 
 class OptimizationMode(str, Enum):
     SINGLE_STORE = "single_store"
     MULTI_STORE = "multi_store"
+    MAX_STORES = "max_stores"
 
 
 class ItemAssignment(BaseModel):
@@ -43,8 +48,39 @@ class AssignedProduct(BaseModel):
     required_packages: int = Field(1, description="Number of packages required to fulfill the request")
 
 
+class RankedStore(BaseModel):
+    store_name: str
+    total_price: float
+
+
 class OptimizationResponse(BaseModel):
     mode: OptimizationMode
     total_price: float
     stores: List[str]
     items: List[AssignedProduct]
+    search_nodes: Optional[int] = Field(
+        None, description="max_stores mode: number of search nodes explored to prove the result optimal",
+    )
+    search_exhaustive: Optional[bool] = Field(
+        None, description="max_stores mode: false when the search stopped at its node budget, "
+                          "so the result is the cheapest combination found but not proven optimal",
+    )
+    ranked_stores: Optional[List[RankedStore]] = Field(
+        None, description="single_store mode with `top`: the cheapest stores with every item, best first",
+    )
+    ranked_offers: Optional[Dict[str, List[AssignedProduct]]] = Field(
+        None, description="multi_store mode with `top`: per product, its cheapest offer at each of the "
+                          "cheapest stores, best first",
+    )
+
+
+# --------- Best value (price per base unit) --------- #
+
+class BestValueOffer(ItemAssignment):
+    unit_price: float = Field(..., description="Price per base unit (g, ml or piece)")
+
+
+class BestValueGroup(BaseModel):
+    name: str = Field(..., description="The product, or the query `q`")
+    base_unit: Optional[str] = Field(None, example="g")
+    offers: List[BestValueOffer]
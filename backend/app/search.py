@@ -0,0 +1,217 @@
+"""
+Indexed product-name search.
+
+``LOWER(product_name) LIKE '%term%'`` cannot use a B-tree index, so each
+backend gets a substring index of its own:
+
+- PostgreSQL: a GIN index with ``gin_trgm_ops`` (pg_trgm) on product_name,
+  which serves ``ILIKE '%term%'``; results are ranked by trigram similarity.
+- SQLite: an external-content FTS5 table with the trigram tokenizer
+  (SQLite >= 3.34), kept in sync with store_offers by triggers; results are
+  ranked by bm25.
+
+Exact matches rank first, then prefix matches, then the backend score. Terms
+shorter than three characters cannot be looked up in a trigram index and
+fall back to a plain LIKE scan, as do databases without the index.
+"""
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+
+from app.models import StoreOffer
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "store_offers_fts"
+TRGM_INDEX = "ix_store_offers_product_name_trgm"
+
+_SQLITE_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        product_name, content='store_offers', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON store_offers BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, product_name) VALUES (new.id, new.product_name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON store_offers BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, product_name) VALUES ('delete', old.id, old.product_name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF product_name ON store_offers BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, product_name) VALUES ('delete', old.id, old.product_name);
+        INSERT INTO {FTS_TABLE}(rowid, product_name) VALUES (new.id, new.product_name);
+    END""",
+)
+
+POSTGRES_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON store_offers USING gin (product_name gin_trgm_ops)",
+)
+
+# Minimum term length a trigram index can look up.
+MIN_INDEXED_TERM = 3
+
+# (dialect, database) of the databases whose search index is in place.
+_indexed = set()
+
+
+def _database_key(bind) -> Tuple[str, str]:
+    return bind.dialect.name, bind.url.database
+
+
+def has_search_index(bind) -> bool:
+    return _database_key(bind) in _indexed
+
+
+def detect_search_index(connection) -> bool:
+    """
+    Record whether ``connection``'s database already has the search index
+    (created by migration 0002 or with the table); no DDL is run.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        probe = text("SELECT 1 FROM sqlite_master WHERE name = :name")
+        params = {"name": FTS_TABLE}
+    elif dialect == "postgresql":
+        probe = text("SELECT 1 FROM pg_indexes WHERE indexname = :name")
+        params = {"name": TRGM_INDEX}
+    else:
+        return False
+    if connection.execute(probe, params).first():
+        _indexed.add(_database_key(connection.engine))
+        return True
+    _indexed.discard(_database_key(connection.engine))
+    return False
+
+
+def ensure_search_index(connection) -> bool:
+    """
+    Create the search index for ``connection``'s database if it is missing
+    (idempotent). Returns whether indexed search is available.
+    """
+    dialect = connection.dialect.name
+    try:
+        if dialect == "sqlite":
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+            ).first()
+            for ddl in _SQLITE_DDL:
+                connection.execute(text(ddl))
+            if not exists:
+                connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        elif dialect == "postgresql":
+            for ddl in POSTGRES_DDL:
+                connection.execute(text(ddl))
+        else:
+            return False
+    except DBAPIError as exc:
+        logger.warning("Indexed product search unavailable, falling back to LIKE: %s", exc)
+        return False
+    _indexed.add(_database_key(connection.engine))
+    return True
+
+
+def drop_search_index(connection) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    elif connection.dialect.name == "postgresql":
+        connection.execute(text(f"DROP INDEX IF EXISTS {TRGM_INDEX}"))
+    _indexed.discard(_database_key(connection.engine))
+
+
+@event.listens_for(StoreOffer.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    ensure_search_index(connection)
+
+
+@event.listens_for(StoreOffer.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    drop_search_index(connection)
+
+
+_OFFER_COLUMNS = "o.product_name, o.store_name, o.price, o.id, o.quantity, o.unit, o.valid_from, o.valid_until, o.image"
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# Sort key of a search result, in ORDER BY order; keyset cursors hold it.
+SEARCH_SORT_KEY = ("match_class", "score", "product_name", "quantity", "id")
+
+
+def search_query(
+    bind,
+    name: str,
+    distinct: bool,
+    limit: int,
+    offset: int = 0,
+    after: Optional[Sequence] = None,
+):
+    """
+    SQL and parameters for a ranked, case-insensitive substring search on
+    product_name. With ``distinct`` only the smallest package per product
+    name is returned (lowest id on ties). ``after`` is the SEARCH_SORT_KEY
+    of the last row of the previous page (keyset pagination); ``offset`` is
+    ignored with it, the key already lies past the skipped rows.
+    """
+    term = name.lower()
+    params: Dict = {
+        "term": term,
+        "pattern": f"%{_escape_like(term)}%",
+        "prefix": f"{_escape_like(term)}%",
+        "limit": limit,
+        "offset": offset if after is None else 0,
+    }
+    indexed = len(term) >= MIN_INDEXED_TERM and has_search_index(bind)
+    dialect = bind.dialect.name
+
+    if indexed and dialect == "sqlite":
+        source = f"{FTS_TABLE} f JOIN store_offers o ON o.id = f.rowid"
+        where = f"{FTS_TABLE} MATCH :match"
+        score = "f.rank"
+        params["match"] = '"' + name.replace('"', '""') + '"'
+    elif indexed and dialect == "postgresql":
+        source = "store_offers o"
+        where = "o.product_name ILIKE :pattern ESCAPE '\\'"
+        score = "-similarity(o.product_name, :term)"
+    else:
+        source = "store_offers o"
+        where = "LOWER(o.product_name) LIKE :pattern ESCAPE '\\'"
+        score = "LENGTH(o.product_name)"
+
+    match_class = (
+        "CASE WHEN LOWER(o.product_name) = :term THEN 0 "
+        "WHEN LOWER(o.product_name) LIKE :prefix ESCAPE '\\' THEN 1 ELSE 2 END"
+    )
+    # ROW_NUMBER keeps the smallest package per name on every backend
+    # (DISTINCT ON is PostgreSQL-only).
+    package_rank = (
+        "ROW_NUMBER() OVER (PARTITION BY o.product_name ORDER BY o.quantity ASC, o.id)"
+        if distinct else "1"
+    )
+    keyset = ""
+    if after is not None:
+        keyset = f"AND ({', '.join(SEARCH_SORT_KEY)}) > ({', '.join(':after_' + c for c in SEARCH_SORT_KEY)})"
+        params.update({f"after_{column}": value for column, value in zip(SEARCH_SORT_KEY, after)})
+    sql = f"""
+        SELECT product_name, store_name, price, id, quantity, unit, valid_from, valid_until, image,
+            match_class, score
+        FROM (
+            SELECT {_OFFER_COLUMNS},
+                {match_class} AS match_class,
+                {score} AS score,
+                {package_rank} AS package_rank
+            FROM {source}
+            WHERE {where}
+        ) ranked
+        WHERE package_rank = 1 {keyset}
+        ORDER BY match_class, score, product_name, quantity, id
+        LIMIT :limit OFFSET :offset
+    """
+    return text(sql), params
+
+
+def search_sort_key(row) -> list:
+    """SEARCH_SORT_KEY of a row returned by ``search_query``, JSON-serializable."""
+    return [row["match_class"], row["score"], row["product_name"], float(row["quantity"]), row["id"]]
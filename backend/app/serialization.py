@@ -0,0 +1,39 @@
+"""
+Lean JSON responses for trusted internal data.
+
+The optimizer and the catalog listings build their results as plain dicts
+in the shape (and field order) of the response models: the values come
+from the offer snapshot or from store_offers rows and need no validation.
+``json_response`` encodes them straight to bytes and returns a Response,
+so FastAPI neither validates them against ``response_model`` again nor
+walks them with its encoder; the models still document the endpoints.
+
+``dumps`` encodes with orjson, whose bytes are those of the pydantic/FastAPI
+path for these responses (compact separators, UTF-8, ISO dates, floats in
+their shortest round-trip form, ``0.00009`` rather than ``9e-05``).
+"""
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON of ``content`` (dicts, lists, str, int, float, date, None)."""
+    return orjson.dumps(content)
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> Response:
+    """
+    ``content`` as a JSON response, without response_model validation.
+    Headers and the status code set on the endpoint's injected ``response``
+    are carried over.
+    """
+    lean = Response(dumps(content), media_type=JSON_MEDIA_TYPE)
+    if response is not None:
+        lean.raw_headers.extend(response.raw_headers)
+        if response.status_code is not None:
+            lean.status_code = response.status_code
+    return lean
@@ -0,0 +1,208 @@
+"""
+Exact search for the cheapest set of at most ``k`` stores.
+
+Given the per-store cost matrix of a basket (``inf`` where a store lacks a
+product), choose a subset S of stores, |S| <= k, minimizing
+
+    sum_j weight_j * min_{s in S} cost[s, j]  +  visit_cost * |S|
+
+where every product must be available in some store of S. Subsets are
+enumerated depth-first in a fixed store order. A branch is cut when a lower
+bound on every subset below it cannot beat the best subset found so far,
+which starts out as a greedy pick improved by swapping stores.
+
+The search can be given a budget of nodes. When it runs out, the best
+subset found so far is returned, marked as not proven optimal: with
+independently priced stores the number of nodes grows quickly with the
+number of stores and ``k``.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+# Pairwise dominance checks are only worth it for moderately sized inputs.
+_DOMINANCE_MAX_CELLS = 4_000_000
+
+
+class StoreSubsetResult:
+    """
+    Chosen store rows (in matrix order), objective value, nodes explored and
+    whether the search finished (the subset is then optimal).
+    """
+
+    __slots__ = ("rows", "objective", "nodes", "exhaustive")
+
+    def __init__(self, rows: List[int], objective: float, nodes: int, exhaustive: bool = True):
+        self.rows = rows
+        self.objective = objective
+        self.nodes = nodes
+        self.exhaustive = exhaustive
+
+
+def _undominated(cost: np.ndarray) -> np.ndarray:
+    """
+    Rows not dominated by another row. A store that is at least as expensive
+    as another one for every product is never needed, since it costs the
+    same to visit. Among identical rows the first is kept.
+    """
+    n, m = cost.shape
+    if n <= 1 or n * n * m > _DOMINANCE_MAX_CELLS:
+        return np.arange(n)
+    # le[t, s]: row t is <= row s everywhere; lt[t, s]: strictly less somewhere
+    le = np.all(cost[:, None, :] <= cost[None, :, :], axis=2)
+    lt = np.any(cost[:, None, :] < cost[None, :, :], axis=2)
+    earlier = np.tri(n, k=-1, dtype=bool)  # earlier[s, t]: t < s
+    dominated = np.any(le & (lt | earlier.T), axis=0)
+    return np.flatnonzero(~dominated)
+
+
+def _greedy(cost, weights, max_stores, visit_cost):
+    """Objective and rows of a greedy pick, used as the initial incumbent."""
+    current = np.full(cost.shape[1], np.inf)
+    picked: List[int] = []
+    best_value, best_rows = np.inf, []
+    for size in range(1, max_stores + 1):
+        candidates = np.minimum(current, cost)
+        uncovered = np.isinf(candidates).sum(axis=1)
+        uncovered[picked] = cost.shape[1] + 1
+        values = np.where(np.isinf(candidates), 0.0, candidates) @ weights
+        # fewest uncovered products first, then lowest cost
+        pick = int(np.lexsort((values, uncovered))[0])
+        current = candidates[pick]
+        picked.append(pick)
+        if uncovered[pick] == 0:
+            value = float(weights @ current) + visit_cost * size
+            if value < best_value:
+                best_value, best_rows = value, list(picked)
+    return best_value, best_rows
+
+
+def _improve(cost, weights, visit_cost, value, rows):
+    """
+    Local search on a pick: swap one store for another, or drop one, while
+    that lowers the objective. Makes the incumbent tight before the search.
+    """
+    rows = list(rows)
+    improved = True
+    while improved and rows:
+        improved = False
+        for pos in range(len(rows)):
+            others = rows[:pos] + rows[pos + 1:]
+            rest = cost[others].min(axis=0) if others else np.full(cost.shape[1], np.inf)
+            if others and not np.isinf(rest).any():
+                dropped = float(weights @ rest) + visit_cost * len(others)
+                if dropped < value:
+                    value, rows, improved = dropped, others, True
+                    break
+            swapped = np.minimum(rest, cost)
+            feasible = ~np.isinf(swapped).any(axis=1)
+            feasible[rows] = False
+            if not feasible.any():
+                continue
+            values = np.where(feasible, np.where(feasible[:, None], swapped, 0.0) @ weights, np.inf)
+            pick = int(np.argmin(values))
+            if values[pick] + visit_cost * len(rows) < value:
+                value = float(values[pick]) + visit_cost * len(rows)
+                rows = others[:pos] + [pick] + others[pos:]
+                improved = True
+                break
+    return value, rows
+
+
+def best_store_subset(
+    cost: np.ndarray,
+    weights: np.ndarray,
+    max_stores: int,
+    visit_cost: float = 0.0,
+    node_budget: Optional[int] = None,
+) -> Optional[StoreSubsetResult]:
+    """
+    Cheapest covering subset of at most ``max_stores`` rows of ``cost``, or
+    None when no such subset exists (or none was found within
+    ``node_budget`` nodes).
+    """
+    n_rows, n_items = cost.shape
+    if n_items == 0 or n_rows == 0:
+        return None
+    if np.any(np.all(np.isinf(cost), axis=0)):
+        return None
+
+    candidates = _undominated(cost)
+    sub = cost[candidates]
+
+    # Visit promising stores first so good incumbents are found early.
+    finite_max = np.where(np.isinf(sub), -np.inf, sub).max(axis=0)
+    score = np.where(np.isinf(sub), 2.0 * finite_max, sub) @ weights
+    order = np.argsort(score, kind="stable")
+    rows = candidates[order]
+    sub = sub[order]
+    n = len(rows)
+
+    max_stores = min(max_stores, n)
+    best_value, best_rows = _improve(sub, weights, visit_cost, *_greedy(sub, weights, max_stores, visit_cost))
+    nodes = 0
+    exhaustive = True
+
+    def visit(current: np.ndarray, chosen: List[int], candidates: np.ndarray) -> None:
+        nonlocal best_value, best_rows, nodes, exhaustive
+        size = len(chosen)
+        if size >= max_stores or not len(candidates) or not exhaustive:
+            return
+        rest = sub[candidates]
+        covered = ~np.isinf(current)
+        uncovered = ~covered
+
+        # What each remaining store would save on the products already covered.
+        savings = np.maximum(current[covered] - rest[:, covered], 0.0) @ weights[covered]
+        # A store that covers nothing new and saves no more than its visit cost
+        # never helps here, nor further down: savings only shrink as stores
+        # are added.
+        useful = savings > visit_cost
+        if uncovered.any():
+            useful |= ~np.all(np.isinf(rest[:, uncovered]), axis=1)
+        candidates, rest, savings = candidates[useful], rest[useful], savings[useful]
+        if not len(candidates):
+            return
+
+        # Lower bounds on every subset below this node:
+        # - each product at its cheapest price among chosen and remaining stores,
+        #   plus at least one more visit;
+        # - covered products get cheaper by at most the sum of the largest
+        #   individual savings of the stores still affordable (savings are
+        #   submodular), uncovered ones cost at least their cheapest price.
+        cheapest_rest = rest.min(axis=0)
+        free_bound = float(weights @ np.minimum(current, cheapest_rest)) + visit_cost * (size + 1)
+        if free_bound >= best_value:
+            return
+        net = np.sort(savings - visit_cost)[::-1][:max_stores - size]
+        best_saving = max(float(net[0]), float(net[net > 0].sum()))
+        budget_bound = (
+            float(weights[covered] @ current[covered])
+            + float(weights[uncovered] @ cheapest_rest[uncovered])
+            + visit_cost * size
+            - best_saving
+        )
+        if budget_bound >= best_value:
+            return
+
+        # Biggest savings first; every subset of ``candidates`` is still
+        # enumerated exactly once whatever their order.
+        candidates = candidates[np.argsort(-savings, kind="stable")]
+        for pos, idx in enumerate(candidates):
+            if node_budget is not None and nodes >= node_budget:
+                exhaustive = False
+                return
+            nodes += 1
+            new = np.minimum(current, sub[idx])
+            if not np.isinf(new).any():
+                value = float(weights @ new) + visit_cost * (size + 1)
+                if value < best_value:
+                    best_value = value
+                    best_rows = chosen + [int(idx)]
+            visit(new, chosen + [int(idx)], candidates[pos + 1:])
+
+    visit(np.full(n_items, np.inf), [], np.arange(n))
+
+    if not best_rows:
+        return None
+    return StoreSubsetResult(sorted(int(rows[i]) for i in best_rows), best_value, nodes, exhaustive)
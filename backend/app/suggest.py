@@ -0,0 +1,143 @@
+"""
+In-memory autocomplete over the distinct product names of the offer catalog.
+
+Matches are ranked in three groups:
+
+1. names starting with the query, alphabetically (binary search over the
+   sorted names),
+2. names with a later word starting with the query, ordered by that word
+   (binary search over the sorted word suffixes),
+3. names containing the query anywhere, alphabetically (trigram posting
+   lists, intersected and then verified), for queries of at least three
+   characters.
+
+Only the first ``limit`` matches are ever materialized, so a lookup costs a
+few binary searches plus the posting-list intersection.
+
+The index is built by the catalog listener when a snapshot is swapped in,
+and kept as it is when the new snapshot has the same product names (a
+price or stock update).
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.catalog import CatalogSnapshot, offer_catalog
+
+_WORD_START = re.compile(r"(?<=[^\w%])\w")
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SuggestIndex:
+    """Prefix and trigram index over a set of product names."""
+
+    def __init__(self, names: Iterable[str]):
+        keyed = sorted({(normalize(name), name) for name in names})
+        self.names: List[str] = [name for _, name in keyed]
+        self._keys: List[str] = [key for key, _ in keyed]
+
+        words = []
+        postings: Dict[str, List[int]] = {}
+        for i, key in enumerate(self._keys):
+            for match in _WORD_START.finditer(key):
+                words.append((key[match.start():], i))
+            for trigram in _trigrams(key):
+                postings.setdefault(trigram, []).append(i)
+        words.sort()
+        self._word_keys = [word for word, _ in words]
+        self._word_ids = [i for _, i in words]
+        # ids were appended in ascending order, i.e. alphabetical order
+        self._postings = {t: np.asarray(ids, dtype=np.int32) for t, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def suggest(self, query: str, limit: int = 10) -> List[str]:
+        q = normalize(query)
+        if not q or limit <= 0:
+            return []
+        found: List[int] = []
+        seen = set()
+
+        def add(i: int) -> bool:
+            if i not in seen:
+                seen.add(i)
+                found.append(i)
+            return len(found) >= limit
+
+        pos = bisect_left(self._keys, q)
+        while pos < len(self._keys) and self._keys[pos].startswith(q):
+            if add(pos):
+                return self._result(found)
+            pos += 1
+
+        pos = bisect_left(self._word_keys, q)
+        while pos < len(self._word_keys) and self._word_keys[pos].startswith(q):
+            if add(self._word_ids[pos]):
+                return self._result(found)
+            pos += 1
+
+        if len(q) >= 3:
+            lists = []
+            for trigram in _trigrams(q):
+                ids = self._postings.get(trigram)
+                if ids is None:
+                    return self._result(found)
+                lists.append(ids)
+            lists.sort(key=len)
+            candidates = lists[0]
+            for ids in lists[1:]:
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            for i in candidates.tolist():
+                if i not in seen and q in self._keys[i] and add(i):
+                    break
+        return self._result(found)
+
+    def _result(self, found: List[int]) -> List[str]:
+        return [self.names[i] for i in found]
+
+
+# (snapshot, index built from it), swapped as one tuple
+_current: Tuple[Optional[CatalogSnapshot], Optional[SuggestIndex]] = (None, None)
+
+
+def _same_names(snapshot: CatalogSnapshot, previous: CatalogSnapshot) -> bool:
+    """Whether ``snapshot`` has the product names of ``previous``."""
+    if snapshot.changes is not None and snapshot.changes[0] == previous.version:
+        # a patch of ``previous``: only the products it re-read can come or go
+        return all((name in snapshot.products) == (name in previous.products) for name in snapshot.changes[1])
+    return snapshot.products.keys() == previous.products.keys()
+
+
+def _rebuild(snapshot: CatalogSnapshot) -> SuggestIndex:
+    global _current
+    built_from, index = _current
+    if index is None or built_from is None or not _same_names(snapshot, built_from):
+        index = SuggestIndex(snapshot.products)
+    _current = (snapshot, index)
+    return index
+
+
+def suggest_index(snapshot: CatalogSnapshot) -> SuggestIndex:
+    """The index for ``snapshot``; built here only if the catalog hook did not."""
+    built_from, index = _current
+    if built_from is not snapshot:
+        index = _rebuild(snapshot)
+    return index
+
+
+def index_built(snapshot: CatalogSnapshot) -> bool:
+    """Whether the index of ``snapshot`` is built."""
+    return _current[0] is snapshot
+
+
+offer_catalog.add_listener(_rebuild)
@@ -0,0 +1,194 @@
+"""
+Incremental catalog sync: apply a full flyer dataset as a delta.
+
+Instead of dropping store_offers and reloading it (which leaves the API
+empty while it runs and throws every cache away), the dataset is staged in
+a temporary table and diffed against the live offers with set-based SQL:
+
+- inserts: offers whose key (store_name, product_name, quantity, unit,
+  valid_from) is not in the table yet;
+- updates: offers whose price, valid_until or image changed;
+- expiries: live offers (valid_until >= today) missing from the dataset.
+  Started offers get valid_until = yesterday; offers that had not started
+  yet are deleted.
+
+With ``scope="stores"`` (the default) only the stores present in the
+dataset are expired, so a dump of one chain does not end the offers of the
+others; ``scope="all"`` treats the dataset as the whole catalog.
+
+Everything runs in one transaction, so readers see either the old or the
+new catalog. The transaction records a change set (catalog_changes) with
+the affected product and store names under the new catalog version;
+the offer catalog and the /optimize response cache use it to refresh only
+what changed.
+"""
+import time
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Column, Index, Integer, insert, text
+
+from app.catalog import catalog_version, record_catalog_change
+from app.ingest import (
+    OFFER_KEY,
+    IngestStats,
+    batches,
+    copy_rows,
+    copy_supported,
+    iter_records,
+    staging_table,
+    valid_rows,
+)
+
+SCOPES = ("stores", "all")
+
+
+class ChangeSet:
+    """What a sync changed (or would change, for a dry run)."""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.inserted = 0
+        self.updated = 0
+        self.expired = 0
+        self.unchanged = 0
+        self.products: List[str] = []
+        self.stores: List[str] = []
+        self.stats = IngestStats()
+        self.seconds = 0.0
+
+    def __bool__(self) -> bool:
+        return bool(self.inserted or self.updated or self.expired)
+
+    def as_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "expired": self.expired,
+            "unchanged": self.unchanged,
+            "products": len(self.products),
+            "stores": self.stores,
+            "read": self.stats.read,
+            "rejected": sum(self.stats.rejected.values()),
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def _statements(dialect: str, scope: str) -> dict:
+    match = " AND ".join(f"o.{column} = s.{column}" for column in OFFER_KEY)
+    distinct = "IS NOT" if dialect == "sqlite" else "IS DISTINCT FROM"
+    changed = f"(o.price <> s.price OR o.valid_until <> s.valid_until OR o.image {distinct} s.image)"
+    missing = f"NOT EXISTS (SELECT 1 FROM store_offers_stage AS s WHERE {match})"
+    in_scope = "AND o.store_name IN (SELECT store_name FROM store_offers_stage)" if scope == "stores" else ""
+    live = f"o.valid_until >= :today {in_scope} AND {missing}"
+    columns = ", ".join(column.name for column in staging_table().columns)
+    return {
+        # later rows of the dataset win over earlier ones with the same key
+        "dedup": (
+            "DELETE FROM store_offers_stage WHERE EXISTS (SELECT 1 FROM store_offers_stage AS t WHERE "
+            + " AND ".join(f"t.{column} = store_offers_stage.{column}" for column in OFFER_KEY)
+            + " AND t.seq > store_offers_stage.seq)"
+        ),
+        "inserted_pairs": (
+            "SELECT DISTINCT s.store_name, s.product_name FROM store_offers_stage AS s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM store_offers AS o WHERE {match})"
+        ),
+        "updated_pairs": (
+            "SELECT DISTINCT s.store_name, s.product_name FROM store_offers_stage AS s "
+            f"JOIN store_offers AS o ON {match} WHERE {changed}"
+        ),
+        "expired_pairs": f"SELECT DISTINCT o.store_name, o.product_name FROM store_offers AS o WHERE {live}",
+        "update": (
+            "UPDATE store_offers AS o SET price = s.price, valid_until = s.valid_until, image = s.image, "
+            "base_unit = s.base_unit, base_quantity = s.base_quantity, unit_price = s.unit_price "
+            f"FROM store_offers_stage AS s WHERE {match} AND {changed}"
+        ),
+        "expire": f"UPDATE store_offers AS o SET valid_until = :yesterday WHERE {live} AND o.valid_from <= :yesterday",
+        "withdraw": f"DELETE FROM store_offers AS o WHERE {live} AND o.valid_from > :yesterday",
+        "insert": (
+            f"INSERT INTO store_offers ({columns}) SELECT {columns} FROM store_offers_stage AS s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM store_offers AS o WHERE {match})"
+        ),
+    }
+
+
+def sync_offers(
+    engine,
+    records: Iterable[dict],
+    scope: str = "stores",
+    today: Optional[date] = None,
+    batch_size: int = 5000,
+    dry_run: bool = False,
+) -> ChangeSet:
+    """
+    Make store_offers match ``records`` and return the change set. With
+    ``dry_run`` the changes are computed and rolled back.
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"scope must be one of {SCOPES}, not {scope!r}")
+    today = today or date.today()
+    changes = ChangeSet()
+    started = time.perf_counter()
+
+    stage = staging_table(
+        Column("seq", Integer, nullable=False),
+        Index("ix_store_offers_stage_key", "product_name", "store_name", "valid_from"),
+    )
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            stage.create(conn)
+            copy = copy_supported(conn)
+            seq = 0
+            for batch in batches(valid_rows(records, changes.stats), batch_size):
+                for row in batch:
+                    row["seq"] = seq
+                    seq += 1
+                if copy:
+                    copy_rows(conn, stage.name, batch, ("seq",))
+                else:
+                    conn.execute(insert(stage), batch)
+
+            sql = {name: text(statement) for name, statement in _statements(conn.dialect.name, scope).items()}
+            params = {"today": today, "yesterday": today - timedelta(days=1)}
+            conn.execute(sql["dedup"])
+
+            pairs: Set[Tuple[str, str]] = set()
+            for name in ("inserted_pairs", "updated_pairs", "expired_pairs"):
+                pairs.update(tuple(row) for row in conn.execute(sql[name], params))
+
+            changes.updated = conn.execute(sql["update"], params).rowcount
+            changes.expired = conn.execute(sql["expire"], params).rowcount
+            changes.expired += conn.execute(sql["withdraw"], params).rowcount
+            changes.inserted = conn.execute(sql["insert"], params).rowcount
+            unique = conn.execute(text("SELECT COUNT(*) FROM store_offers_stage")).scalar()
+            changes.unchanged = unique - changes.inserted - changes.updated
+            changes.products = sorted({product for _, product in pairs})
+            changes.stores = sorted({store for store, _ in pairs})
+
+            if changes and not dry_run:
+                changes.version = record_catalog_change(
+                    conn, changes.products, changes.stores,
+                    {"inserted": changes.inserted, "updated": changes.updated, "expired": changes.expired},
+                )
+            if dry_run:
+                transaction.rollback()
+            else:
+                transaction.commit()
+        except BaseException:
+            transaction.rollback()
+            raise
+        finally:
+            # outside the transaction: SQLite does not roll back the CREATE
+            with conn.begin():
+                stage.drop(conn, checkfirst=True)
+
+    catalog_version.expire()
+    changes.seconds = changes.stats.seconds = time.perf_counter() - started
+    return changes
+
+
+def sync_file(engine, path, fmt: Optional[str] = None, **options) -> ChangeSet:
+    """``sync_offers`` with the records of a JSON, NDJSON or CSV file (optionally .gz)."""
+    return sync_offers(engine, iter_records(path, fmt), **options)
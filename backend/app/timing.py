@@ -0,0 +1,242 @@
+"""
+Per-request timing: named spans, Server-Timing headers, per-phase logs and
+Prometheus latency histograms.
+
+``TimingMiddleware`` gives every request a ``RequestTiming`` (through a
+context variable, so it reaches sync endpoints in the threadpool) and,
+when the response starts, adds a ``Server-Timing`` header with the spans
+recorded so far:
+
+    Server-Timing: catalog;dur=0.41, optimize;dur=1.93, costs;dur=1.12,
+                   framework;dur=0.88, app;dur=3.22
+
+``app`` is the time from the request to the response start; ``framework``
+is what the top-level spans do not cover (request validation and response
+serialization by FastAPI). Spans may nest (``costs`` is part of
+``optimize``); only top-level spans count against ``framework``.
+
+When the response is complete its duration goes into the histograms served
+by ``GET /metrics`` (per route template, method and /optimize mode) and,
+above ``slow_ms``, into a JSON log line with the phases.
+
+With timing disabled (``REQUEST_TIMING_ENABLED=0``, the default) the
+middleware passes requests straight through and ``span`` returns a shared
+no-op context manager.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+# Prometheus' default buckets, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NO_SPAN = nullcontext()
+
+
+class RequestTiming:
+    """Spans of one request: accumulated seconds per name, in first-seen order."""
+
+    __slots__ = ("started", "spans", "top_level", "depth")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.top_level = 0.0
+        self.depth = 0
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+class _Span:
+    __slots__ = ("timing", "name", "start")
+
+    def __init__(self, timing: RequestTiming, name: str):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.timing.depth += 1
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        timing = self.timing
+        timing.spans[self.name] = timing.spans.get(self.name, 0.0) + elapsed
+        timing.depth -= 1
+        if not timing.depth:
+            timing.top_level += elapsed
+        return False
+
+
+def span(name: str):
+    """Context manager timing ``name`` in the current request, if it is timed."""
+    timing = _current.get()
+    if timing is None:
+        return _NO_SPAN
+    return _Span(timing, name)
+
+
+def server_timing(timing: RequestTiming, elapsed: float) -> str:
+    entries = [f"{name};dur={seconds * 1e3:.2f}" for name, seconds in timing.spans.items()]
+    entries.append(f"framework;dur={max(elapsed - timing.top_level, 0.0) * 1e3:.2f}")
+    entries.append(f"app;dur={elapsed * 1e3:.2f}")
+    return ", ".join(entries)
+
+
+# --------- Metrics --------- #
+
+class Histogram:
+    """Cumulative-bucket histogram per label set (Prometheus text format)."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, values: Tuple[str, ...], seconds: float) -> None:
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for values, counts in series:
+            labels = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(self.labels, values))
+            sep = "," if labels else ""
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {counts[-2]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {counts[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {counts[-2]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """The request and phase histograms served by /metrics."""
+
+    def __init__(self):
+        self.requests = Histogram(
+            "http_request_duration_seconds", "Time to complete a request.",
+            ("method", "route", "mode", "status"),
+        )
+        self.phases = Histogram(
+            "http_request_phase_duration_seconds", "Time spent in a named phase of a request.",
+            ("route", "mode", "phase"),
+        )
+
+    def clear(self) -> None:
+        self.requests.clear()
+        self.phases.clear()
+
+    def render(self) -> str:
+        return "\n".join(self.requests.render() + self.phases.render()) + "\n"
+
+
+# --------- Middleware --------- #
+
+class TimingSettings:
+    def __init__(self, enabled: bool = False, slow_ms: float = 1000.0):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+
+
+request_timing = TimingSettings(
+    enabled=os.getenv("REQUEST_TIMING_ENABLED", "0").lower() in ("1", "true", "yes"),
+    slow_ms=float(os.getenv("REQUEST_TIMING_SLOW_MS", "1000")),
+)
+metrics = Metrics()
+
+_MODES = ("single_store", "multi_store", "max_stores")
+
+
+def _labels(scope) -> Tuple[str, str]:
+    """(route template, /optimize mode) of a request; bounded label values only."""
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    mode = ""
+    if path.startswith("/optimize"):
+        mode = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("mode", ["single_store"])[-1]
+        if mode not in _MODES:
+            mode = "invalid"
+    return path, mode
+
+
+class TimingMiddleware:
+    """ASGI middleware; see the module docstring."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not request_timing.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                elapsed = time.perf_counter() - timing.started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timing, elapsed).encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._record(scope, timing, status[0], time.perf_counter() - timing.started)
+
+    def _record(self, scope, timing: RequestTiming, status: int, elapsed: float) -> None:
+        route, mode = _labels(scope)
+        metrics.requests.observe((scope["method"], route, mode, str(status)), elapsed)
+        for name, seconds in timing.spans.items():
+            metrics.phases.observe((route, mode, name), seconds)
+        if elapsed * 1e3 >= request_timing.slow_ms:
+            log = logger.info
+        elif logger.isEnabledFor(logging.DEBUG):
+            log = logger.debug
+        else:
+            return
+        log(json.dumps({
+            "event": "request_timing",
+            "method": scope["method"],
+            "route": route,
+            "mode": mode,
+            "status": status,
+            "ms": round(elapsed * 1e3, 2),
+            "phases": {name: round(seconds * 1e3, 2) for name, seconds in timing.spans.items()},
+        }))
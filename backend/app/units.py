@@ -0,0 +1,68 @@
+"""
+Unit normalization for offers and grocery list items.
+
+Flyers spell units in many ways ("Gramm", "Liter", "Stk", ...). Everything
+is mapped onto a short token and then onto a base unit (g, ml or piece) so
+package sizes can be compared. Offers store the result of ``offer_unit_columns``
+at ingest time; requested items are converted per request.
+"""
+from typing import Dict, Optional, Tuple
+
+_UNIT_ALIASES: Dict[str, str] = {}
+for _token, _aliases in (
+    ("g", ("g", "gram", "grams", "gramm", "gramm.", "gramm(s)")),
+    ("kg", ("kg", "kilogram", "kilograms", "kg.")),
+    ("l", ("l", "liter", "litre", "liters", "litres", "l.")),
+    ("ml", ("ml", "milliliter", "millilitre", "milliliters", "millilitres", "ml.")),
+    ("piece", ("piece", "pieces", "stk", "pcs", "stück")),
+):
+    for _alias in _aliases:
+        _UNIT_ALIASES[_alias] = _token
+
+# normalized unit -> (factor, base unit)
+_BASE_FACTORS: Dict[str, Tuple[float, str]] = {
+    "kg": (1000.0, "g"),
+    "g": (1.0, "g"),
+    "l": (1000.0, "ml"),
+    "ml": (1.0, "ml"),
+    "piece": (1.0, "piece"),
+}
+
+BASE_UNITS = ("g", "ml", "piece")
+
+
+def normalize_unit(unit: Optional[str]) -> Optional[str]:
+    """Map the many spellings of a unit used in flyers onto one short token."""
+    if not unit:
+        return unit
+    u = unit.strip().lower()
+    return _UNIT_ALIASES.get(u, u)
+
+
+def to_base_qty(qty: float, unit: Optional[str]) -> Tuple[float, Optional[str]]:
+    """Convert a quantity to its base unit (g, ml or piece)."""
+    u = normalize_unit(unit)
+    factor = _BASE_FACTORS.get(u)
+    if factor is None:
+        # unknown unit: return original and mark base as raw
+        return qty, u
+    if factor[0] == 1.0:
+        return qty, factor[1]
+    return qty * factor[0], factor[1]
+
+
+def unit_price(price: float, base_qty: float) -> Optional[float]:
+    """Price per base unit, or None when the package size is not positive."""
+    if base_qty <= 0:
+        return None
+    return price / base_qty
+
+
+def offer_unit_columns(quantity, unit: Optional[str], price) -> Dict[str, object]:
+    """Derived ``StoreOffer`` columns for an offer's package size and price."""
+    base_qty, base_unit = to_base_qty(float(quantity), unit)
+    return {
+        "base_unit": base_unit,
+        "base_quantity": base_qty,
+        "unit_price": unit_price(float(price), base_qty),
+    }
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Baskets/sec through N separate POST /optimize calls versus one POST
+/optimize/batch, with and without the in-memory offer catalog.
+
+Usage (from backend/):
+  python -m benchmarks.bench_batch --lists 20 --rounds 10
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=30)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--basket-size", type=int, default=15)
+    parser.add_argument("--lists", type=int, default=20, help="grocery lists per batch")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_batch_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    from fastapi.testclient import TestClient
+
+    from app.catalog import offer_catalog
+    from app.db import Base, engine
+    from app.main import app
+    from app.response_cache import response_cache
+    from benchmarks.synthetic import generate_offers, populate, random_basket
+
+    Base.metadata.create_all(bind=engine)
+    populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, seed=args.seed))
+
+    rnd = random.Random(args.seed)
+    # Saved lists of one user overlap; draw them from a small product pool.
+    pool = max(args.basket_size * 3, 1)
+    batches = []
+    for _ in range(args.rounds):
+        start = rnd.randrange(args.products - pool)
+        batch = []
+        for _ in range(args.lists):
+            basket = random_basket(rnd, pool, args.basket_size)
+            for item in basket["items"]:
+                item["name"] = f"Product {start + int(item['name'].split()[-1]):05d}"
+            batch.append(basket)
+        batches.append(batch)
+
+    client = TestClient(app)
+    # measure the computation, not the /optimize response cache
+    response_cache.enabled = False
+    for enabled in (False, True):
+        offer_catalog.enabled = enabled
+        if enabled:
+            offer_catalog.refresh()
+        label = "catalog" if enabled else "database"
+        # multi_store always succeeds on synthetic data; a failing list would
+        # abort the whole batch and flatter its numbers.
+        for mode in ("multi_store",):
+            start = time.perf_counter()
+            for batch in batches:
+                for basket in batch:
+                    client.post(f"/optimize?mode={mode}", json=basket)
+            separate = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for batch in batches:
+                resp = client.post(f"/optimize/batch?mode={mode}", json={"baskets": batch})
+                assert resp.status_code == 200, resp.text
+            batched = time.perf_counter() - start
+
+            n = args.rounds * args.lists
+            print(
+                f"{label:9s} {mode:13s} separate {n / separate:8.1f} baskets/s   "
+                f"batch {n / batched:8.1f} baskets/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
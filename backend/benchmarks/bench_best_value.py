@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Build time of the unit-price ranking (full, and after a patch that re-read
+1% of the products) and latency of best-value lookups from the ranking
+against ranking the product's offers per request, on a synthetic snapshot
+(no HTTP, no database).
+
+Usage (from backend/):
+  python -m benchmarks.bench_best_value --products 10000 --offers-per-product 10
+"""
+import argparse
+import random
+import time
+from datetime import date
+
+import numpy as np
+
+from app.best_value import BestValueIndex, rank_offers
+from app.catalog import build_snapshot, patch_snapshot
+from benchmarks.synthetic import offer_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=30)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = offer_rows(args.stores, args.products, args.offers_per_product, seed=args.seed)
+    snapshot = build_snapshot(rows, date.today())
+    names = list(snapshot.products)
+    print(f"{snapshot.offer_count:,d} offers of {len(names):,d} products")
+
+    start = time.perf_counter()
+    index = BestValueIndex(snapshot)
+    print(f"full ranking:     {(time.perf_counter() - start) * 1e3:8.1f} ms")
+
+    rnd = random.Random(args.seed)
+    changed = frozenset(rnd.sample(names, max(1, len(names) // 100)))
+    patched = patch_snapshot(
+        snapshot, [row for row in rows if row.product_name in changed], changed, 1, snapshot.version + 1,
+    )
+    start = time.perf_counter()
+    BestValueIndex(patched, index)
+    print(f"after a 1% patch: {(time.perf_counter() - start) * 1e3:8.1f} ms")
+
+    queries = [rnd.choice(names) for _ in range(args.lookups)]
+
+    def on_demand(name):
+        # what a request without the ranking does: rank the product's offers
+        return _OnDemand(snapshot, name).best(name, args.k)
+
+    for label, lookup in (("ranking", lambda name: index.best(name, args.k)), ("on demand", on_demand)):
+        timings = []
+        for name in queries:
+            t0 = time.perf_counter()
+            lookup(name)
+            timings.append(time.perf_counter() - t0)
+        timings = np.array(timings) * 1e6
+        print(
+            f"{label:10s} lookup: p50 {np.percentile(timings, 50):7.1f} us  "
+            f"p95 {np.percentile(timings, 95):7.1f} us"
+        )
+
+
+class _OnDemand(BestValueIndex):
+    """A ranking of one product, built for one lookup."""
+
+    def __init__(self, snapshot, name):
+        offers = snapshot.get(name)
+        self.snapshot = snapshot
+        self.products = {name: (offers, rank_offers([offers])[0])}
+        self.base_units = {code: unit for unit, code in snapshot.unit_codes.items()}
+
+
+if __name__ == "__main__":
+    main()
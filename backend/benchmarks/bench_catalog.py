@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Requests/sec of POST /optimize with and without the in-memory offer catalog.
+
+Usage (from backend/):
+  python -m benchmarks.bench_catalog --products 2000 --stores 30 --requests 300
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=30)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--basket-size", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_catalog_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    from fastapi.testclient import TestClient
+
+    from app.catalog import offer_catalog
+    from app.db import Base, engine
+    from app.main import app
+    from app.response_cache import response_cache
+    from benchmarks.synthetic import generate_offers, populate, random_basket
+
+    Base.metadata.create_all(bind=engine)
+    rows = populate(engine, generate_offers(
+        args.stores, args.products, args.offers_per_product, seed=args.seed,
+    ))
+    print(f"catalog: {rows} offers, {args.products} products, {args.stores} stores")
+
+    rnd = random.Random(args.seed)
+    baskets = [random_basket(rnd, args.products, args.basket_size) for _ in range(args.requests)]
+    client = TestClient(app)
+    # measure the computation, not the /optimize response cache
+    response_cache.enabled = False
+
+    for enabled in (False, True):
+        offer_catalog.enabled = enabled
+        if enabled:
+            offer_catalog.refresh()
+        for mode in ("single_store", "multi_store"):
+            start = time.perf_counter()
+            for basket in baskets:
+                client.post(f"/optimize?mode={mode}", json=basket)
+            elapsed = time.perf_counter() - start
+            label = "catalog" if enabled else "database"
+            print(f"{label:9s} {mode:13s} {len(baskets) / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Worker warmup and memory with the catalog built from store_offers against
+the memory-mapped snapshot file (app.catalog_file).
+
+--workers processes load the catalog at the same time, like uvicorn
+workers; each reports its load time, RSS and PSS (proportional set size:
+pages shared by n processes count 1/n; Linux only) while all of them hold
+the catalog.
+
+Usage (from backend/):
+  python -m benchmarks.bench_catalog_file --products 20000 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+
+def _memory() -> dict:
+    values = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key] = int(rest.split()[0]) / 1024
+    except OSError:
+        pass
+    return values
+
+
+def _worker(source: str, path: str, barrier, results) -> None:
+    from app.catalog import load_snapshot
+    from app.catalog_file import read_catalog_file
+    from app.db import SessionLocal
+
+    before = _memory()
+    start = time.perf_counter()
+    if source == "file":
+        snapshot = read_catalog_file(path)
+        # touch every column, as serving requests eventually does
+        for offers in snapshot.products.values():
+            offers.prices.sum()
+            offers.base_qtys.sum()
+            offers.store_idx.sum()
+    else:
+        db = SessionLocal()
+        snapshot = load_snapshot(db, date.today())
+        db.close()
+    seconds = time.perf_counter() - start
+    barrier.wait()
+    after = _memory()
+    results.put((seconds, {key: after[key] - before.get(key, 0) for key in after}))
+    barrier.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="bench_catalog_file_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir / 'bench.db'}"
+
+    from app import migrations
+    from app.catalog_file import export_catalog
+    from app.db import SessionLocal, engine
+    from benchmarks.synthetic import generate_offers, populate
+
+    migrations.upgrade(os.environ["DATABASE_URL"])
+    rows = populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, seed=args.seed))
+    path = tmpdir / "catalog.snapshot"
+    db = SessionLocal()
+    start = time.perf_counter()
+    export_catalog(db, path)
+    db.close()
+    print(f"{rows:,d} offers; export {time.perf_counter() - start:.2f} s, {path.stat().st_size / 1e6:.1f} MB")
+
+    context = multiprocessing.get_context("spawn")
+    for source in ("database", "file"):
+        barrier = context.Barrier(args.workers)
+        results = context.Queue()
+        workers = [
+            context.Process(target=_worker, args=(source, str(path), barrier, results))
+            for _ in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        measured = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        seconds = max(seconds for seconds, _ in measured)
+        rss = sum(memory.get("Rss", 0) for _, memory in measured)
+        pss = sum(memory.get("Pss", 0) for _, memory in measured)
+        print(f"{source:8s} load {seconds:6.2f} s (slowest of {args.workers})  "
+              f"catalog RSS {rss:7.1f} MB  PSS {pss:7.1f} MB (all workers)")
+
+
+if __name__ == "__main__":
+    main()
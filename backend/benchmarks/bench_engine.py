@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Time the vectorized cost engine on large baskets without HTTP or a database.
+
+Usage (from backend/):
+  python -m benchmarks.bench_engine --offers-per-product 200 --basket-size 100
+"""
+import argparse
+import random
+import time
+from datetime import date
+
+from app.catalog import build_snapshot
+from app.engine import BasketCosts, RequestedItem
+from benchmarks.synthetic import offer_rows, random_basket
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=50)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--offers-per-product", type=int, default=120)
+    parser.add_argument("--basket-size", type=int, default=100)
+    parser.add_argument("--baskets", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = offer_rows(args.stores, args.products, args.offers_per_product, seed=args.seed)
+
+    start = time.perf_counter()
+    snapshot = build_snapshot(rows, date.today())
+    print(f"snapshot: {snapshot.offer_count} offers in {time.perf_counter() - start:.2f}s")
+
+    rnd = random.Random(args.seed)
+    baskets = []
+    for _ in range(args.baskets):
+        body = random_basket(rnd, args.products, args.basket_size)
+        baskets.append([RequestedItem(i["name"], float(i["quantity"]), i["unit"]) for i in body["items"]])
+
+    start = time.perf_counter()
+    for items in baskets:
+        basket = BasketCosts(snapshot, items)
+        basket.store_totals([item.name for item in items])
+    elapsed = time.perf_counter() - start
+    print(f"{args.basket_size}-item basket: {elapsed / len(baskets) * 1000:.2f} ms per basket")
+
+
+if __name__ == "__main__":
+    main()
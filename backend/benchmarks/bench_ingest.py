@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Rows/sec and peak Python memory of loading a synthetic flyer dump: one ORM
+object per row in a single session (the previous loader) against the
+streaming pipeline of app.ingest in append, upsert and skip mode.
+
+Usage (from backend/):
+  python -m benchmarks.bench_ingest --rows 200000 --format ndjson
+
+The ORM baseline is skipped above --orm-max-rows. upsert and skip run a
+second time over the loaded table, so every row hits an existing offer.
+With --trace-memory peak memory is measured with tracemalloc (Python
+allocations only), which slows every run down several times.
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+def _write_dataset(path: Path, fmt: str, offers) -> int:
+    count = 0
+    with path.open("w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = None
+            for offer in offers:
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(offer))
+                    writer.writeheader()
+                writer.writerow(offer)
+                count += 1
+        elif fmt == "ndjson":
+            for offer in offers:
+                f.write(json.dumps(offer, default=str) + "\n")
+                count += 1
+        else:
+            f.write("[\n")
+            for offer in offers:
+                f.write(("," if count else "") + json.dumps(offer, default=str) + "\n")
+                count += 1
+            f.write("]\n")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--format", dest="fmt", choices=("json", "ndjson", "csv"), default="ndjson")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--orm-max-rows", type=int, default=200_000)
+    parser.add_argument("--trace-memory", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="bench_ingest_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir / 'bench.db'}"
+
+    from app.db import Base, SessionLocal, engine
+    from app.ingest import ingest_file, iter_records, normalize_record
+    from app.models import StoreOffer
+    from benchmarks.synthetic import generate_offers
+
+    offers_per_product = 10
+    products = max(1, args.rows // offers_per_product)
+    path = tmpdir / f"offers.{args.fmt}"
+    rows = _write_dataset(path, args.fmt, generate_offers(args.stores, products, offers_per_product, seed=args.seed))
+    print(f"{rows:,d} rows, {path.stat().st_size / 1e6:.1f} MB {args.fmt}")
+
+    def reset():
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+
+    def orm_load():
+        db = SessionLocal()
+        try:
+            for record in iter_records(path):
+                row = normalize_record(record)
+                db.add(StoreOffer(**{k: v for k, v in row.items() if k not in ("base_unit", "base_quantity", "unit_price")}))
+            db.commit()
+        finally:
+            db.close()
+
+    def measure(label, fn):
+        if args.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        line = f"{label:22s} {rows / elapsed:>10,.0f} rows/s  {elapsed:7.2f} s"
+        if args.trace_memory:
+            line += f"  peak {tracemalloc.get_traced_memory()[1] / 1e6:7.1f} MB"
+            tracemalloc.stop()
+        print(line)
+
+    if rows <= args.orm_max_rows:
+        reset()
+        measure("ORM, one session", orm_load)
+    reset()
+    measure("append", lambda: ingest_file(engine, path, mode="append", batch_size=args.batch_size))
+    reset()
+    measure("upsert (empty table)", lambda: ingest_file(engine, path, mode="upsert", batch_size=args.batch_size))
+    measure("upsert (all existing)", lambda: ingest_file(engine, path, mode="upsert", batch_size=args.batch_size))
+    measure("skip (all existing)", lambda: ingest_file(engine, path, mode="skip", batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Cost of keeping expired offers in store_offers: catalog build time,
+/optimize requests/sec straight from the database and /stores + /products
+listing time, with --history-weeks weeks of expired flyers in the table and
+after app.lifecycle archived them.
+
+Usage (from backend/):
+  python -m benchmarks.bench_lifecycle --products 2000 --history-weeks 26
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=30)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--history-weeks", type=int, default=26)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_lifecycle_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    from fastapi.testclient import TestClient
+
+    from app import migrations
+    from app.catalog import load_snapshot, offer_catalog
+    from app.db import SessionLocal, engine
+    from app.http_cache import listing_cache
+    from app.lifecycle import archive_expired_offers
+    from app.main import app
+    from app.response_cache import response_cache
+    from benchmarks.synthetic import generate_offers, populate, random_basket
+
+    migrations.upgrade(os.environ["DATABASE_URL"])
+    today = date.today()
+    live = populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, seed=args.seed))
+    history = 0
+    for week in range(1, args.history_weeks + 1):
+        # the flyers of past weeks, expired a week apart
+        history += populate(engine, generate_offers(
+            args.stores, args.products, args.offers_per_product, seed=args.seed + week,
+            today=today - timedelta(days=7 * week + 15),
+        ))
+    print(f"{live:,d} live offers, {history:,d} expired")
+
+    rnd = random.Random(args.seed)
+    baskets = [random_basket(rnd, args.products, 10) for _ in range(args.requests)]
+    client = TestClient(app)
+    response_cache.enabled = False
+    offer_catalog.enabled = False
+
+    def measure(label):
+        db = SessionLocal()
+        start = time.perf_counter()
+        load_snapshot(db, today)
+        build = time.perf_counter() - start
+        db.close()
+
+        start = time.perf_counter()
+        for basket in baskets:
+            client.post("/optimize", json=basket)
+        rate = len(baskets) / (time.perf_counter() - start)
+
+        listing_cache.clear()
+        start = time.perf_counter()
+        client.get("/stores")
+        client.get("/products")
+        listing = time.perf_counter() - start
+        print(f"{label:10s} catalog build {build:6.3f} s  /optimize (database) {rate:7.1f} req/s  "
+              f"/stores + /products {listing:6.3f} s")
+
+    measure("history")
+    result = archive_expired_offers(engine, today=today)
+    print(f"archived {result.archived:,d} offers in {result.seconds:.2f} s")
+    measure("archived")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Requests/sec and bytes per response of GET /stores and GET /products:
+serialized per request (listing cache cleared before every call), served
+from the cached body, gzip-encoded, and revalidated with If-None-Match.
+
+Usage (from backend/):
+  python -m benchmarks.bench_listing --products 20000 --requests 200
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=10)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--offers-per-product", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_listing_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    from fastapi.testclient import TestClient
+
+    from app.db import Base, engine
+    from app.http_cache import listing_cache
+    from app.main import app
+    from benchmarks.synthetic import generate_offers, populate
+
+    Base.metadata.create_all(bind=engine)
+    populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, seed=args.seed))
+    client = TestClient(app)
+
+    for path in ("/stores", "/products"):
+        etag = client.get(path, headers={"Accept-Encoding": "identity"}).headers["etag"]
+        cases = (
+            ("uncached", {"Accept-Encoding": "identity"}, True),
+            ("cached", {"Accept-Encoding": "identity"}, False),
+            ("cached gzip", {"Accept-Encoding": "gzip"}, False),
+            ("304", {"Accept-Encoding": "identity", "If-None-Match": etag}, False),
+        )
+        for label, headers, cold in cases:
+            size = 0
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                if cold:
+                    listing_cache.clear()
+                resp = client.get(path, headers=headers)
+                size = resp.num_bytes_downloaded
+            elapsed = time.perf_counter() - start
+            print(f"{path:10s} {label:12s} {args.requests / elapsed:9.1f} req/s {size:10d} bytes")
+
+
+if __name__ == "__main__":
+    main()
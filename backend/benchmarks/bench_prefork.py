@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Startup time and memory per worker of ``uvicorn --workers N`` (every
+worker imports the app and builds its offer catalog from store_offers)
+against ``python -m scripts.serve --workers N`` (preloaded master, catalog
+mapped from the snapshot file, forked workers).
+
+Startup is the time from launching the server until all N workers have
+answered ``GET /ops/ready`` (workers only accept once warm). RSS and PSS
+(pages shared by n processes count 1/n; Linux only) are read from
+/proc/<pid>/smaps_rollup of every worker after a round of /optimize
+requests; the prefork total includes the master.
+
+Usage (from backend/):
+  python -m benchmarks.bench_prefork --workers 1 4 16 --products 10000
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Set
+
+import httpx
+
+from benchmarks.loadgen import BACKEND_DIR, drive, free_port
+
+
+def _memory(pid: int) -> Dict[str, float]:
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key] = int(rest.split()[0]) / 1024
+    except OSError:
+        pass
+    return values
+
+
+async def _ready_pids(base_url: str, workers: int, timeout: float) -> Set[int]:
+    """Poll /ops/ready until ``workers`` distinct processes answered it."""
+    pids: Set[int] = set()
+    deadline = time.monotonic() + timeout
+    limits = httpx.Limits(max_connections=workers * 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=5.0) as client:
+        async def probe():
+            try:
+                response = await client.get("/ops/ready")
+                if response.status_code == 200:
+                    pids.add(response.json()["pid"])
+            except httpx.HTTPError:
+                await asyncio.sleep(0.05)
+
+        while len(pids) < workers and time.monotonic() < deadline:
+            # fresh connections, so the kernel spreads them over the workers
+            await asyncio.gather(*(probe() for _ in range(workers * 2)))
+            await client.aclose()
+            client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=5.0)
+    return pids
+
+
+def _measure(label: str, command, env: Dict[str, str], workers: int, port: int, requests) -> None:
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, env=dict(os.environ, **env), cwd=BACKEND_DIR)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        pids = asyncio.run(_ready_pids(base_url, workers, timeout=600))
+        startup = time.perf_counter() - start
+        if len(pids) < workers:
+            print(f"{label:8s} workers={workers:<3d} only {len(pids)} workers answered")
+            return
+        latencies, elapsed, errors = drive(base_url, requests, workers * 2)
+        memory = [_memory(pid) for pid in pids]
+        rss = sum(m.get("Rss", 0) for m in memory) / workers
+        pss = sum(m.get("Pss", 0) for m in memory)
+        master = _memory(proc.pid) if label == "prefork" else {}
+        print(
+            f"{label:8s} workers={workers:<3d} startup {startup:6.2f} s   RSS/worker {rss:7.1f} MB   "
+            f"PSS workers {pss:8.1f} MB (+ master {master.get('Pss', 0):6.1f} MB)   "
+            f"{len(requests) / elapsed:7.1f} req/s, {errors} errors"
+        )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=30)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="bench_prefork_"))
+    database_url = f"sqlite:///{tmpdir / 'bench.db'}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from app import migrations
+    from app.db import engine
+    from benchmarks.synthetic import generate_offers, populate, random_basket
+
+    migrations.upgrade(database_url)
+    rows = populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, seed=args.seed))
+    engine.dispose()
+    print(f"{rows:,d} offers, {os.cpu_count()} CPUs")
+
+    rnd = random.Random(args.seed)
+    requests = [
+        ("POST", "/optimize?mode=multi_store", random_basket(rnd, args.products, 10))
+        for _ in range(args.requests)
+    ]
+    env = {"DATABASE_URL": database_url, "RESPONSE_CACHE_ENABLED": "0"}
+    for workers in args.workers:
+        port = free_port()
+        _measure("uvicorn", [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ], env, workers, port, requests)
+
+        port = free_port()
+        snapshot = tmpdir / "catalog.snapshot"
+        if snapshot.exists():
+            snapshot.unlink()  # the export is part of a cold start
+        _measure("prefork", [
+            sys.executable, "-m", "scripts.serve", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--catalog-file", str(snapshot), "--log-level", "warning",
+        ], env, workers, port, requests)
+
+
+if __name__ == "__main__":
+    main()
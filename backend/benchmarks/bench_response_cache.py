@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Requests/sec of POST /optimize with and without the response cache, for
+traffic where many users submit the same few baskets.
+
+Requests are drawn from a pool of distinct baskets with a Zipf-like
+popularity; every request lists its items in a random order.
+
+Usage (from backend/):
+  python -m benchmarks.bench_response_cache --pool 200 --requests 2000
+
+Small baskets over few stores keep single_store/max_stores mostly feasible;
+error responses are not cached.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=10)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--basket-size", type=int, default=3)
+    parser.add_argument("--pool", type=int, default=200, help="distinct baskets")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_response_cache_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    from fastapi.testclient import TestClient
+
+    from app.catalog import offer_catalog
+    from app.db import Base, engine
+    from app.main import app
+    from app.response_cache import response_cache
+    from benchmarks.synthetic import generate_offers, populate, random_basket
+
+    Base.metadata.create_all(bind=engine)
+    populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, seed=args.seed))
+
+    rnd = random.Random(args.seed)
+    pool = [random_basket(rnd, args.products, args.basket_size) for _ in range(args.pool)]
+    weights = [1.0 / (rank + 1) for rank in range(args.pool)]
+    requests = []
+    for basket in rnd.choices(pool, weights, k=args.requests):
+        items = list(basket["items"])
+        rnd.shuffle(items)
+        requests.append({"items": items})
+
+    client = TestClient(app)
+    offer_catalog.refresh()
+    for mode in ("single_store", "multi_store", "max_stores"):
+        for enabled in (False, True):
+            response_cache.enabled = enabled
+            response_cache.clear()
+            start = time.perf_counter()
+            for body in requests:
+                client.post(f"/optimize?mode={mode}", json=body)
+            elapsed = time.perf_counter() - start
+            stats = response_cache.stats()
+            label = "cache" if enabled else "no cache"
+            print(
+                f"{label:9s} {mode:13s} {len(requests) / elapsed:8.1f} req/s"
+                + (f"   hit ratio {stats['hit_ratio']:.2f}" if enabled else "")
+            )
+            for key in ("hits", "shared_hits", "misses", "uncacheable", "evictions"):
+                response_cache.counters[key] = 0
+
+
+if __name__ == "__main__":
+    main()
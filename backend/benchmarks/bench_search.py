@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Latency of /search/products with the FTS5 trigram index versus the old
+LIKE '%term%' scan, on a synthetic SQLite catalog (1M offers by default).
+
+The same ranked query runs both ways; the LIKE baseline simply has no index
+registered. Each term is searched ``--rounds`` times per variant and the
+median and p95 latency are reported.
+
+Usage (from backend/):
+  python -m benchmarks.bench_search --products 100000 --offers-per-product 10
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+TERMS = ("milch", "schokolade", "bio vollmilch", "xxl", "000123", "salami classic")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=50)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_search_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    from app import search
+    from app.db import Base, engine
+    from benchmarks.synthetic import generate_offers, grocery_names, populate
+
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    names = grocery_names(args.products, seed=args.seed)
+    rows = populate(engine, generate_offers(
+        args.stores, args.products, args.offers_per_product, seed=args.seed, names=names,
+    ))
+    print(f"loaded {rows} offers (with FTS triggers) in {time.perf_counter() - start:.1f}s")
+
+    def run(term, distinct):
+        sql, params = search.search_query(engine, term, distinct, args.limit)
+        timings = []
+        with engine.connect() as conn:
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                found = conn.execute(sql, params).fetchall()
+                timings.append(time.perf_counter() - start)
+        return np.median(timings) * 1e3, np.percentile(timings, 95) * 1e3, len(found)
+
+    database_key = search._database_key(engine)
+    for term in TERMS:
+        for distinct in (True, False):
+            search._indexed.add(database_key)
+            indexed = run(term, distinct)
+            search._indexed.discard(database_key)
+            scan = run(term, distinct)
+            print(
+                f"{term!r:18s} distinct={distinct!s:5s} "
+                f"fts p50 {indexed[0]:8.2f} ms p95 {indexed[1]:8.2f} ms   "
+                f"like p50 {scan[0]:8.2f} ms p95 {scan[1]:8.2f} ms   ({indexed[2]} rows)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Serialization cost of large product listings and /optimize responses:
+through the response models (validated models, then FastAPI's
+``response_model`` validation and serialization, as before
+``app.serialization``) versus plain content dicts encoded by
+``app.serialization.dumps``. Both must produce the same bytes.
+
+No HTTP and no database: listing rows are store_offers row mappings, the
+/optimize content comes from ``optimize_basket`` on a synthetic snapshot.
+
+Usage (from backend/):
+  python -m benchmarks.bench_serialization --products 100000 --basket-size 10 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import List
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=30)
+    parser.add_argument("--products", type=int, default=100000, help="rows of the listing")
+    parser.add_argument("--basket-size", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--baskets", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # the app modules create their engine on import
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}")
+
+    from fastapi import HTTPException
+    from fastapi.responses import JSONResponse
+    from fastapi.utils import create_model_field
+
+    from app import schemas, serialization
+    from app.api.optimizer import OptimizeOptions, item_assignment, optimize_basket
+    from app.catalog import build_snapshot
+    from app.serialization import dumps
+    from benchmarks.synthetic import generate_offers, offer_rows, random_basket
+
+    print(f"encoder: orjson {serialization.orjson.__version__}")
+
+    # --------- listing: GET /products with every product --------- #
+    rows = [
+        dict(offer, id=i, valid_from=offer["valid_from"].isoformat(), valid_until=offer["valid_until"].isoformat())
+        for i, offer in enumerate(generate_offers(args.stores, args.products, 1, seed=args.seed), start=1)
+    ]
+
+    def listing_models() -> bytes:
+        products = [schemas.ItemAssignment(**item_assignment(row)).model_dump(mode="json") for row in rows]
+        return JSONResponse(products).body
+
+    def listing_lean() -> bytes:
+        return dumps([item_assignment(row) for row in rows])
+
+    def ndjson_models() -> bytes:
+        return b"".join(
+            schemas.ItemAssignment(**item_assignment(row)).model_dump_json().encode() + b"\n" for row in rows
+        )
+
+    def ndjson_lean() -> bytes:
+        return b"".join(dumps(item_assignment(row)) + b"\n" for row in rows)
+
+    for label, models, lean in (("listing json", listing_models, listing_lean),
+                                ("listing ndjson", ndjson_models, ndjson_lean)):
+        assert models() == lean(), label
+        before, after = _best_of(models, args.repeat), _best_of(lean, args.repeat)
+        print(
+            f"{label:15s} {len(rows)} rows, {len(lean()) / 1e6:.1f} MB: models {before * 1e3:8.1f} ms   "
+            f"lean {after * 1e3:8.1f} ms   ({before / after:.1f}x)"
+        )
+
+    # --------- POST /optimize responses --------- #
+    field = create_model_field(name="response", type_=schemas.OptimizationResponse, mode="serialization")
+    snapshot = build_snapshot(offer_rows(args.stores, 2000, 10, seed=args.seed), date.today())
+    for size in args.basket_size:
+        rnd = random.Random(args.seed)
+        contents = []
+        for mode in schemas.OptimizationMode:
+            options = OptimizeOptions(mode=mode, max_stores=3, store_visit_cost=0.0, top=0)
+            for _ in range(args.baskets):
+                basket = schemas.GroceryListRequest(**random_basket(rnd, 2000, size))
+                try:
+                    contents.append(optimize_basket(basket, snapshot, options))
+                except HTTPException:
+                    pass
+
+        def optimize_models() -> List[bytes]:
+            bodies = []
+            for content in contents:
+                # the models optimize_basket used to build, then FastAPI's response_model pass
+                model = schemas.OptimizationResponse.model_validate(content)
+                value, _ = field.validate(model, {}, loc=("response",))
+                bodies.append(field.serialize_json(value))
+            return bodies
+
+        def optimize_lean() -> List[bytes]:
+            return [dumps(content) for content in contents]
+
+        assert optimize_models() == optimize_lean()
+        before, after = _best_of(optimize_models, args.repeat), _best_of(optimize_lean, args.repeat)
+        print(
+            f"optimize {size:3d} items, {len(contents)} responses: models {before / len(contents) * 1e6:7.1f} us   "
+            f"lean {after / len(contents) * 1e6:7.1f} us per response   ({before / after:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
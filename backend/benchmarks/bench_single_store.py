@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Time per basket of single_store mode through the full per-store cost
+matrix (``BasketCosts.store_totals``) against ``cheapest_single_store``
+(candidate intersection and pruning on partial sums), on a catalog with
+random store coverage and on a chain-wide one where every branch stocks
+every product at one of a few regional prices. Both must pick the same
+store and total. With --top the ``top`` cheapest stores are ranked too
+(checked against the matrix), to show what the ranking adds.
+No HTTP, no database.
+
+Usage (from backend/):
+  python -m benchmarks.bench_single_store --stores 5000 --products 500 --basket-size 10 30
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.catalog import build_snapshot
+from app.engine import BasketCosts, RequestedItem, cheapest_single_store
+from app.units import offer_unit_columns
+from benchmarks.synthetic import OfferRow, UNIT_SIZES, offer_rows, product_names, random_basket, store_names
+
+
+def chain_rows(n_stores: int, n_products: int, price_tiers: int = 5, seed: int = 0):
+    """One offer per branch and product, priced at one of ``price_tiers`` regional levels."""
+    rnd = random.Random(seed)
+    today = date.today()
+    stores = store_names(n_stores)
+    tier_of = [rnd.randrange(price_tiers) for _ in stores]
+    rows = []
+    for product in product_names(n_products):
+        unit, sizes = rnd.choice(UNIT_SIZES)
+        quantity = rnd.choice(sizes)
+        prices = [round(rnd.uniform(0.3, 8.0), 2) for _ in range(price_tiers)]
+        for store, tier in zip(stores, tier_of):
+            if rnd.random() < 0.02:
+                continue  # out of stock at this branch
+            cols = offer_unit_columns(quantity, unit, prices[tier])
+            rows.append(OfferRow(
+                id=len(rows) + 1, store_name=store, product_name=product, quantity=quantity, unit=unit,
+                price=prices[tier], valid_from=today, valid_until=today + timedelta(days=7), image=None,
+                base_unit=cols["base_unit"], base_quantity=cols["base_quantity"],
+            ))
+    return rows
+
+
+def _matrix(snapshot, items, names):
+    basket = BasketCosts(snapshot, items)
+    totals = basket.store_totals(names)
+    row = int(np.argmin(totals))
+    if not np.isfinite(totals[row]):
+        return None
+    return basket.store_name(row), float(totals[row])
+
+
+def _pruned(snapshot, items, names):
+    choice = cheapest_single_store(snapshot, items, names)
+    return None if choice is None else (snapshot.stores[choice.store], choice.total)
+
+
+def _matrix_ranked(snapshot, items, names, top):
+    basket = BasketCosts(snapshot, items)
+    totals = basket.store_totals(names)
+    rows = [row for row in np.argsort(totals, kind="stable")[:top] if np.isfinite(totals[row])]
+    return [(basket.store_name(row), float(totals[row])) for row in rows] or None
+
+
+def _pruned_ranked(snapshot, items, names, top):
+    choice = cheapest_single_store(snapshot, items, names, top)
+    return None if choice is None else [(snapshot.stores[store], total) for store, total in choice.ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--offers-per-product", type=int, default=2000, help="random catalog only")
+    parser.add_argument("--basket-size", type=int, nargs="+", default=[10, 30])
+    parser.add_argument("--baskets", type=int, default=30)
+    parser.add_argument("--top", type=int, default=5, help="stores to rank; 0 to skip")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    catalogs = (
+        ("random", offer_rows(args.stores, args.products, args.offers_per_product, seed=args.seed)),
+        ("chain", chain_rows(args.stores, args.products, seed=args.seed)),
+    )
+    for label, rows in catalogs:
+        snapshot = build_snapshot(rows, date.today())
+        print(f"{label}: {snapshot.offer_count:,d} offers, {len(snapshot.stores)} stores")
+        for size in args.basket_size:
+            rnd = random.Random(args.seed)
+            baskets = []
+            for _ in range(args.baskets):
+                body = random_basket(rnd, args.products, size)
+                items = [RequestedItem(i["name"], float(i["quantity"]), i["unit"]) for i in body["items"]]
+                baskets.append((items, [item.name for item in items]))
+
+            funcs = [("matrix", _matrix), ("pruned", _pruned)]
+            if args.top:
+                funcs += [
+                    ("matrix_top", lambda s, i, n: _matrix_ranked(s, i, n, args.top)),
+                    ("pruned_top", lambda s, i, n: _pruned_ranked(s, i, n, args.top)),
+                ]
+            results = {}
+            for name, func in funcs:
+                start = time.perf_counter()
+                results[name] = [func(snapshot, items, names) for items, names in baskets]
+                results[name + "_ms"] = (time.perf_counter() - start) / len(baskets) * 1e3
+            assert results["matrix"] == results["pruned"], label
+            found = sum(r is not None for r in results["pruned"])
+            print(
+                f"  {size:3d} items ({found}/{len(baskets)} with a complete store): "
+                f"matrix {results['matrix_ms']:7.2f} ms   pruned {results['pruned_ms']:7.2f} ms per basket   "
+                f"({results['matrix_ms'] / results['pruned_ms']:.1f}x)"
+            )
+            if args.top:
+                assert results["matrix_top"] == results["pruned_top"], label
+                print(
+                    f"      top {args.top}: matrix {results['matrix_top_ms']:7.2f} ms   "
+                    f"pruned {results['pruned_top_ms']:7.2f} ms per basket"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Time the max_stores branch-and-bound search on synthetic cost matrices.
+
+With ``--prices correlated`` prices follow a per-store price level times a
+per-product base price with noise; with ``uncorrelated`` every price is
+drawn independently, which makes the search far harder. A share of
+products is missing in each store. The search runs with the node budget
+of /optimize (``--node-budget 0`` for an exact search); the tail (p99 and
+max) and the share of searches stopped by the budget are reported with
+the median.
+
+Usage (from backend/):
+  python -m benchmarks.bench_store_subset --stores 25 --items 30 --prices uncorrelated
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.api.optimizer import MAX_STORES_NODE_BUDGET
+from app.store_subset import best_store_subset
+
+
+def _costs(rng, prices, n_stores, n_items, missing):
+    if prices == "correlated":
+        base = rng.uniform(0.5, 6.0, n_items)
+        level = rng.uniform(0.85, 1.2, n_stores)
+        cost = np.round(base[None, :] * level[:, None] * rng.uniform(0.8, 1.2, (n_stores, n_items)), 2)
+    else:
+        cost = np.round(rng.uniform(0.5, 6.0, (n_stores, n_items)), 2)
+    cost[rng.random(cost.shape) < missing] = np.inf
+    return cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=25)
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--missing", type=float, default=0.15)
+    parser.add_argument("--prices", choices=("correlated", "uncorrelated"), nargs="+",
+                        default=["correlated", "uncorrelated"])
+    parser.add_argument("--max-stores", type=int, nargs="+", default=[2, 3, 5, 8])
+    parser.add_argument("--node-budget", type=int, default=MAX_STORES_NODE_BUDGET, help="0 for an exact search")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    budget = args.node_budget or None
+    for prices in args.prices:
+        print(f"{prices} prices, {args.stores} stores x {args.items} items, node budget {budget}")
+        for max_stores in args.max_stores:
+            for visit_cost in (0.0, 1.5):
+                rng = np.random.default_rng(args.seed)
+                times, nodes, stopped = [], [], 0
+                for _ in range(args.repeats):
+                    cost = _costs(rng, prices, args.stores, args.items, args.missing)
+                    start = time.perf_counter()
+                    result = best_store_subset(cost, np.ones(args.items), max_stores, visit_cost, budget)
+                    times.append(time.perf_counter() - start)
+                    nodes.append(result.nodes if result else 0)
+                    stopped += result is not None and not result.exhaustive
+                times = np.array(times) * 1000
+                print(
+                    f"  k={max_stores} visit_cost={visit_cost:3.1f}: "
+                    f"median {np.median(times):6.2f} ms, p99 {np.percentile(times, 99):6.2f} ms, "
+                    f"max {times.max():6.2f} ms, median nodes {int(np.median(nodes))}, "
+                    f"stopped by the budget {stopped}/{args.repeats}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Time to first byte, total time and peak Python memory of reading the whole
+/products listing as one JSON array, as keyset pages, and as an NDJSON
+stream.
+
+Usage (from backend/):
+  python -m benchmarks.bench_stream --products 100000 --page 1000
+
+The JSON listing is read with the listing cache cleared, so it is built
+from the database every time. Peak memory is measured with tracemalloc
+(Python allocations only).
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=10)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--offers-per-product", type=int, default=3)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_stream_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    from fastapi.testclient import TestClient
+
+    from app.db import Base, engine
+    from app.http_cache import listing_cache
+    from app.main import app
+    from benchmarks.synthetic import generate_offers, populate
+
+    Base.metadata.create_all(bind=engine)
+    populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, seed=args.seed))
+    client = TestClient(app)
+
+    def full_json():
+        listing_cache.clear()
+        resp = client.get("/products", headers={"Accept-Encoding": "identity"})
+        yield resp.content
+
+    def keyset_pages():
+        path = f"/products?limit={args.page}"
+        while path:
+            resp = client.get(path)
+            yield resp.content
+            link = resp.headers.get("link")
+            path = link[1:link.index(">")] if link else None
+
+    def ndjson():
+        with client.stream("GET", "/products?format=ndjson") as resp:
+            yield from resp.iter_bytes()
+
+    for label, reader in (("json", full_json), ("keyset pages", keyset_pages), ("ndjson", ndjson)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        first_byte = None
+        size = 0
+        for chunk in reader():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{label:13s} first byte {first_byte * 1000:8.1f} ms  total {elapsed:6.2f} s"
+            f"  {size / 1e6:7.1f} MB  peak {peak / 1e6:7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
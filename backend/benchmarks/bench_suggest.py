@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Build time of the autocomplete index and per-keystroke lookup latency and
+response size, for synthetic product names (no HTTP, no database).
+
+Every query is typed one character at a time, as the mobile client does,
+and each prefix is looked up once.
+
+Usage (from backend/):
+  python -m benchmarks.bench_suggest --products 100000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.suggest import SuggestIndex
+from benchmarks.synthetic import grocery_names
+
+QUERIES = ("vollmilch", "bio schokolade", "xxl", "lachs natur", "000123", "kaffee classic")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    names = grocery_names(args.products, seed=args.seed)
+    start = time.perf_counter()
+    index = SuggestIndex(names)
+    print(f"indexed {len(index)} names in {time.perf_counter() - start:.2f}s")
+
+    timings, sizes = [], []
+    for query in QUERIES:
+        for end in range(1, len(query) + 1):
+            start = time.perf_counter()
+            found = index.suggest(query[:end], args.limit)
+            timings.append(time.perf_counter() - start)
+            sizes.append(len(json.dumps(found, ensure_ascii=False).encode()))
+    timings = np.array(timings) * 1e3
+    print(
+        f"{len(timings)} keystrokes: p50 {np.percentile(timings, 50):.3f} ms  "
+        f"p95 {np.percentile(timings, 95):.3f} ms  max {timings.max():.3f} ms  "
+        f"response p50 {int(np.percentile(sizes, 50))} B  max {max(sizes)} B"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Time to apply a weekly flyer delta: app.sync against dropping store_offers
+and reloading the whole dataset, and the offer catalog refresh that follows
+(patching the changed products against a full rebuild).
+
+The "next week" dataset is the loaded one with the offers of --changed
+percent of the products repriced, of --dropped percent missing, and
+--added percent new products (flyers change some products, not all).
+
+Usage (from backend/):
+  python -m benchmarks.bench_sync --rows 200000 --changed 5 --dropped 2 --added 2
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--changed", type=float, default=5.0, help="percent of products repriced")
+    parser.add_argument("--dropped", type=float, default=2.0, help="percent of products no longer offered")
+    parser.add_argument("--added", type=float, default=2.0, help="percent of new products")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="bench_sync_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir / 'bench.db'}"
+
+    from app import migrations
+    from app.catalog import OfferCatalog, load_snapshot
+    from app.db import SessionLocal, engine
+    from app.ingest import ingest
+    from app.models import StoreOffer
+    from app.sync import sync_offers
+    from benchmarks.synthetic import generate_offers
+
+    migrations.upgrade(os.environ["DATABASE_URL"])
+    rnd = random.Random(args.seed)
+    today = date.today()
+    offers_per_product = 10
+    products = max(1, args.rows // offers_per_product)
+    week = list(generate_offers(args.stores, products, offers_per_product, seed=args.seed, today=today))
+    new = generate_offers(
+        args.stores, max(1, int(products * args.added / 100)), offers_per_product, seed=args.seed + 1, today=today,
+        names=[f"New product {i:05d}" for i in range(max(1, int(products * args.added / 100)))],
+    )
+    draws = {}
+    next_week = []
+    for offer in week:
+        draw = draws.setdefault(offer["product_name"], rnd.uniform(0, 100))
+        if draw < args.dropped:
+            continue
+        if draw < args.dropped + args.changed:
+            offer = dict(offer, price=round(offer["price"] * rnd.uniform(0.8, 1.2) + 0.01, 2))
+        next_week.append(offer)
+    next_week.extend(new)
+    print(f"{len(week):,d} offers, next week {len(next_week):,d}")
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        result = fn()
+        print(f"{label:34s} {time.perf_counter() - start:8.3f} s")
+        return result
+
+    def reload():
+        with engine.begin() as conn:
+            conn.execute(StoreOffer.__table__.delete())
+        ingest(engine, next_week, mode="append")
+
+    sync_offers(engine, week, today=today)
+    catalog = OfferCatalog(ttl=0)
+    timed("catalog build (week)", catalog.get)
+
+    changes = timed("sync (delta)", lambda: sync_offers(engine, next_week, today=today))
+    print(f"  {changes.inserted:,d} inserted, {changes.updated:,d} updated, {changes.expired:,d} expired, "
+          f"{changes.unchanged:,d} unchanged, {len(changes.products):,d} products")
+    timed("catalog refresh (patch)", catalog.get)
+    print(f"  patched: {catalog.snapshot.changes is not None}")
+
+    def full_build():
+        db = SessionLocal()
+        try:
+            return load_snapshot(db, today)
+        finally:
+            db.close()
+
+    timed("catalog refresh (full rebuild)", full_build)
+    timed("sync (no changes)", lambda: sync_offers(engine, next_week, today=today))
+    timed("drop + reload", reload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Overhead of the request timing middleware: POST /optimize against uvicorn
+with REQUEST_TIMING_ENABLED off and on (offer catalog on, response cache
+off), and the phase breakdown the Server-Timing header reports.
+
+Usage (from backend/):
+  python -m benchmarks.bench_timing --requests 2000 --concurrency 1 8
+"""
+import argparse
+import os
+import random
+import tempfile
+from pathlib import Path
+
+import httpx
+
+from benchmarks.loadgen import drive, free_port, start_server
+from benchmarks.stats import summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=30)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--basket-size", type=int, default=15)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_timing_")
+    database_url = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from app.db import Base, engine
+    from benchmarks.synthetic import generate_offers, populate, random_basket
+
+    Base.metadata.create_all(bind=engine)
+    populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, seed=args.seed))
+    engine.dispose()
+
+    rnd = random.Random(args.seed)
+    requests = [
+        ("POST", "/optimize?mode=multi_store", random_basket(rnd, args.products, args.basket_size))
+        for _ in range(args.requests)
+    ]
+
+    for enabled in ("0", "1"):
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        proc = start_server({
+            "DATABASE_URL": database_url,
+            "RESPONSE_CACHE_ENABLED": "0",
+            "REQUEST_TIMING_ENABLED": enabled,
+        }, port)
+        try:
+            # warm up: the first request builds the offer catalog
+            drive(base_url, requests[:1], 1)
+            for concurrency in args.concurrency:
+                latencies, elapsed, errors = drive(base_url, requests, concurrency)
+                assert not errors, f"{errors} failed requests"
+                stats = summarize(latencies, elapsed)
+                print(
+                    f"timing={enabled} c={concurrency:<3d} {stats['throughput']:8.1f} req/s   "
+                    f"p50 {stats['p50_ms']:7.2f} ms   p95 {stats['p95_ms']:7.2f} ms"
+                )
+            if enabled == "1":
+                method, path, body = requests[0]
+                print("Server-Timing:", httpx.request(method, base_url + path, json=body).headers["server-timing"])
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
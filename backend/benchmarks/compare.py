@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark suite result files (``benchmarks.suite``).
+
+Prints p50/p95/p99 and throughput of every benchmark present in both
+files with the relative change, and exits with status 1 when a p95
+latency grew by more than --threshold percent (for CI).
+
+Usage (from backend/):
+  python -m benchmarks.compare results/main.json results/branch.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _key(result: dict):
+    return result["suite"], result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="p95 growth in percent that fails")
+    args = parser.parse_args()
+
+    baseline = {_key(r): r["stats"] for r in json.loads(args.baseline.read_text())["results"]}
+    candidate = json.loads(args.candidate.read_text())["results"]
+
+    regressions = 0
+    for result in candidate:
+        old = baseline.get(_key(result))
+        new = result["stats"]
+        if old is None or not old.get("count") or not new.get("count"):
+            continue
+        p95 = _change(old["p95_ms"], new["p95_ms"])
+        flag = ""
+        if p95 > args.threshold and result["name"] != "snapshot/build":
+            flag = "  REGRESSION"
+            regressions += 1
+        label = " ".join(f"{key}={value}" for key, value in result["params"].items())
+        print(
+            f"{result['suite']:5s} {result['name']:26s} {label:70s} "
+            f"p50 {new['p50_ms']:8.2f} ms ({_change(old['p50_ms'], new['p50_ms']):+6.1f}%)  "
+            f"p95 {new['p95_ms']:8.2f} ms ({p95:+6.1f}%)  "
+            f"p99 {new['p99_ms']:8.2f} ms ({_change(old['p99_ms'], new['p99_ms']):+6.1f}%)  "
+            f"{new['throughput']:9.1f} /s ({_change(old['throughput'], new['throughput']):+6.1f}%){flag}"
+        )
+    if regressions:
+        print(f"{regressions} p95 regressions above {args.threshold:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
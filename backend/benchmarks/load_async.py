@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Concurrent HTTP load against uvicorn with DB_MODE=sync and DB_MODE=async.
+
+Builds a synthetic SQLite catalog, starts one uvicorn process per mode on it
+(offer catalog disabled, so every request reads the database) and drives it
+with an increasing number of concurrent clients. Reports requests/sec and
+p50/p95 latency per endpoint and concurrency level. SQLite stands in for
+PostgreSQL here: it shows the scheduling difference, not absolute numbers.
+
+Usage (from backend/):
+  python -m benchmarks.load_async --concurrency 1 8 32 --requests 400
+"""
+import argparse
+import os
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.loadgen import drive, free_port, start_server
+from benchmarks.stats import summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stores", type=int, default=30)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    parser.add_argument("--basket-size", type=int, default=15)
+    parser.add_argument("--requests", type=int, default=400, help="requests per endpoint and level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="load_async_")
+    database_url = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from app.db import Base, engine
+    from app.pagination import encode_cursor
+    from benchmarks.synthetic import generate_offers, populate, product_names, random_basket
+
+    Base.metadata.create_all(bind=engine)
+    populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, seed=args.seed))
+    engine.dispose()
+
+    rnd = random.Random(args.seed)
+    names = product_names(args.products)
+    endpoints = {
+        "optimize": [
+            ("POST", "/optimize?mode=multi_store", random_basket(rnd, args.products, args.basket_size))
+            for _ in range(args.requests)
+        ],
+        "search": [
+            ("GET", f"/search/products?name=product%20{rnd.randrange(args.products // 10):04d}&distinct=false", None)
+            for _ in range(args.requests)
+        ],
+        "search_distinct": [
+            ("GET", f"/search/products?name=product%20{rnd.randrange(args.products // 10):04d}", None)
+            for _ in range(args.requests)
+        ],
+        # pages from random cursors: the full listing is served from the listing cache
+        "products": [
+            ("GET", f"/products?limit=100&cursor={encode_cursor([rnd.choice(names)])}", None)
+            for _ in range(args.requests)
+        ],
+        "stores": [("GET", "/stores", None)] * args.requests,
+    }
+
+    for mode in ("sync", "async"):
+        port = free_port()
+        proc = start_server({
+            "DATABASE_URL": database_url,
+            "DB_MODE": mode,
+            "OFFER_CATALOG_ENABLED": "0",
+            "RESPONSE_CACHE_ENABLED": "0",
+        }, port)
+        try:
+            for name, requests in endpoints.items():
+                for concurrency in args.concurrency:
+                    latencies, elapsed, errors = drive(f"http://127.0.0.1:{port}", requests, concurrency)
+                    assert not errors, f"{errors} failed requests"
+                    stats = summarize(latencies, elapsed)
+                    print(
+                        f"{mode:5s} {name:15s} c={concurrency:<3d} {stats['throughput']:8.1f} req/s   "
+                        f"p50 {stats['p50_ms']:7.2f} ms   p95 {stats['p95_ms']:7.2f} ms"
+                    )
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
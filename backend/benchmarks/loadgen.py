@@ -0,0 +1,75 @@
+"""
+HTTP load generation against a local uvicorn process, shared by the load
+benchmarks.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# (method, path, JSON body or None)
+Request = Tuple[str, str, Optional[dict]]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env: Dict[str, str], port: int, ready_path: str = "/stores", workers: int = 1) -> subprocess.Popen:
+    """Start uvicorn on ``app.main:app`` with ``env`` added; returns once it answers ``ready_path``."""
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    proc = subprocess.Popen(command, env=dict(os.environ, **env), cwd=BACKEND_DIR)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}{ready_path}", timeout=1.0)
+            return proc
+        except httpx.HTTPError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"uvicorn did not start ({env})")
+
+
+async def _drive(base_url: str, requests: Sequence[Request], concurrency: int) -> Tuple[List[float], float, int]:
+    latencies: List[float] = []
+    errors = 0
+    queue = list(reversed(requests))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while queue:
+            method, path, body = queue.pop()
+            start = time.perf_counter()
+            resp = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code >= 500:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed, errors
+
+
+def drive(base_url: str, requests: Sequence[Request], concurrency: int) -> Tuple[List[float], float, int]:
+    """
+    Send ``requests`` with ``concurrency`` clients; returns the latencies in
+    seconds, the wall time and the number of 5xx responses.
+    """
+    return asyncio.run(_drive(base_url, requests, concurrency))
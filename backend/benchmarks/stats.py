@@ -0,0 +1,33 @@
+"""Latency and throughput summaries shared by the benchmarks."""
+from typing import Dict, Sequence
+
+import numpy as np
+
+
+def summarize(latencies: Sequence[float], elapsed: float) -> Dict[str, float]:
+    """
+    ``latencies`` in seconds, ``elapsed`` wall time of the whole run:
+    count, throughput (per second) and mean/p50/p95/p99/max in milliseconds.
+    """
+    if not latencies:
+        return {"count": 0, "throughput": 0.0}
+    ms = np.asarray(latencies, dtype=np.float64) * 1e3
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": len(ms),
+        "throughput": round(len(ms) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+
+def format_stats(stats: Dict[str, float]) -> str:
+    if not stats.get("count"):
+        return "no samples"
+    return (
+        f"{stats['throughput']:9.1f} /s   p50 {stats['p50_ms']:8.2f} ms   "
+        f"p95 {stats['p95_ms']:8.2f} ms   p99 {stats['p99_ms']:8.2f} ms"
+    )
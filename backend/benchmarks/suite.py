@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: optimizer micro-benchmarks and HTTP load tests, written
+to JSON for tracking over time.
+
+For every synthetic catalog (stores x products x offers per product) and
+basket size:
+
+- micro: ``optimize_basket`` on an in-memory snapshot, per mode, one basket
+  at a time (no HTTP, no database); plus the snapshot build time;
+- http: POST /optimize against a local uvicorn on a SQLite copy of the
+  catalog (offer catalog on, response cache off) at each concurrency level.
+
+Every result has count, throughput and mean/p50/p95/p99/max latency; 404s
+(no store carries a basket) count as samples, as they do in production.
+Compare two result files with ``python -m benchmarks.compare``.
+
+Usage (from backend/):
+  python -m benchmarks.suite --profile quick
+  python -m benchmarks.suite --profile full --output results/main.json
+  python -m benchmarks.suite --only micro --stores 50 --products 5000 --basket-size 10 50
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.stats import format_stats, summarize
+
+# catalogs are (stores, products, offers per product)
+PROFILES = {
+    "quick": {
+        "catalogs": [(10, 500, 5), (30, 2000, 10)],
+        "basket_sizes": [5, 20],
+        "baskets": 100,
+        "requests": 300,
+        "concurrency": [1, 8],
+    },
+    "full": {
+        "catalogs": [(10, 500, 5), (30, 2000, 10), (50, 10000, 20)],
+        "basket_sizes": [5, 20, 100],
+        "baskets": 300,
+        "requests": 1000,
+        "concurrency": [1, 8, 32],
+    },
+}
+MICRO_MODES = ("single_store", "multi_store", "max_stores")
+HTTP_MODES = ("single_store", "multi_store")
+
+
+def _meta(args, profile: dict) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "profile": args.profile,
+        "seed": args.seed,
+        "settings": profile,
+    }
+
+
+def _catalog_params(catalog) -> dict:
+    stores, products, offers_per_product = catalog
+    return {"stores": stores, "products": products, "offers_per_product": offers_per_product}
+
+
+def run_micro(profile: dict, seed: int, report) -> None:
+    from fastapi import HTTPException
+
+    from app import schemas
+    from app.api.optimizer import OptimizeOptions, optimize_basket
+    from app.catalog import build_snapshot
+    from benchmarks.synthetic import offer_rows, random_basket
+
+    for catalog in profile["catalogs"]:
+        params = _catalog_params(catalog)
+        rows = offer_rows(*catalog, seed=seed)
+        start = time.perf_counter()
+        snapshot = build_snapshot(rows, date.today())
+        elapsed = time.perf_counter() - start
+        report("micro", "snapshot/build", params, summarize([elapsed], elapsed))
+
+        for size in profile["basket_sizes"]:
+            rnd = random.Random(seed)
+            baskets = [
+                schemas.GroceryListRequest(**random_basket(rnd, catalog[1], min(size, catalog[1])))
+                for _ in range(profile["baskets"])
+            ]
+            for mode in MICRO_MODES:
+                options = OptimizeOptions(mode=schemas.OptimizationMode(mode), max_stores=2, store_visit_cost=0.0, top=0)
+                latencies = []
+                not_found = 0
+                start = time.perf_counter()
+                for basket in baskets:
+                    t0 = time.perf_counter()
+                    try:
+                        optimize_basket(basket, snapshot, options)
+                    except HTTPException:
+                        not_found += 1
+                    latencies.append(time.perf_counter() - t0)
+                stats = summarize(latencies, time.perf_counter() - start)
+                stats["not_found"] = not_found
+                report("micro", f"optimize/{mode}", dict(params, basket_size=size), stats)
+
+
+def run_http(profile: dict, seed: int, tmpdir: Path, report) -> None:
+    from sqlalchemy import create_engine
+
+    from app import migrations
+    from benchmarks.loadgen import drive, free_port, start_server
+    from benchmarks.synthetic import generate_offers, populate, random_basket
+
+    for n, catalog in enumerate(profile["catalogs"]):
+        params = _catalog_params(catalog)
+        database_url = f"sqlite:///{tmpdir / f'http_{n}.db'}"
+        migrations.upgrade(database_url)
+        engine = create_engine(database_url)
+        populate(engine, generate_offers(*catalog, seed=seed))
+        engine.dispose()
+
+        port = free_port()
+        proc = start_server({"DATABASE_URL": database_url, "RESPONSE_CACHE_ENABLED": "0"}, port)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            for size in profile["basket_sizes"]:
+                rnd = random.Random(seed)
+                for mode in HTTP_MODES:
+                    requests = [
+                        ("POST", f"/optimize?mode={mode}", random_basket(rnd, catalog[1], min(size, catalog[1])))
+                        for _ in range(profile["requests"])
+                    ]
+                    # warm up: the first request builds the offer catalog
+                    drive(base_url, requests[:1], 1)
+                    for concurrency in profile["concurrency"]:
+                        latencies, elapsed, errors = drive(base_url, requests, concurrency)
+                        stats = summarize(latencies, elapsed)
+                        stats["errors"] = errors
+                        report("http", f"POST /optimize/{mode}", dict(
+                            params, basket_size=size, concurrency=concurrency,
+                        ), stats)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", choices=("micro", "http"), help="run one part of the suite")
+    parser.add_argument("--stores", type=int, nargs="+", help="override the profile's catalogs")
+    parser.add_argument("--products", type=int, nargs="+")
+    parser.add_argument("--offers-per-product", type=int, nargs="+")
+    parser.add_argument("--basket-size", type=int, nargs="+")
+    parser.add_argument("--baskets", type=int, help="baskets per micro-benchmark")
+    parser.add_argument("--requests", type=int, help="requests per HTTP load level")
+    parser.add_argument("--concurrency", type=int, nargs="+")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="default: benchmarks/results/<timestamp>.json")
+    args = parser.parse_args()
+
+    profile = dict(PROFILES[args.profile])
+    if args.stores or args.products or args.offers_per_product:
+        base = profile["catalogs"][-1]
+        profile["catalogs"] = [
+            (stores, products, offers)
+            for stores in args.stores or [base[0]]
+            for products in args.products or [base[1]]
+            for offers in args.offers_per_product or [base[2]]
+        ]
+    for key in ("basket_size", "baskets", "requests", "concurrency"):
+        value = getattr(args, key)
+        if value:
+            profile["basket_sizes" if key == "basket_size" else key] = value
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="bench_suite_"))
+    # the app modules create their engine on import
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmpdir / 'suite.db'}")
+
+    results = []
+
+    def report(suite: str, name: str, params: dict, stats: dict) -> None:
+        results.append({"suite": suite, "name": name, "params": params, "stats": stats})
+        label = " ".join(f"{key}={value}" for key, value in params.items())
+        print(f"{suite:5s} {name:26s} {label:70s} {format_stats(stats)}", flush=True)
+
+    meta = _meta(args, profile)
+    if args.only in (None, "micro"):
+        run_micro(profile, args.seed, report)
+    if args.only in (None, "http"):
+        run_http(profile, args.seed, tmpdir, report)
+
+    output = args.output or Path(__file__).resolve().parent / "results" / (
+        datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+    print(f"wrote {len(results)} results to {output}")
+
+
+if __name__ == "__main__":
+    main()
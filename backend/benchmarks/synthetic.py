@@ -0,0 +1,133 @@
+"""
+Synthetic offer catalogs for benchmarks.
+
+Generates store offers with a configurable number of stores, products and
+offers per product, using the same unit spellings that show up in flyers.
+"""
+import random
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import Dict, Iterator, List
+
+from sqlalchemy import insert
+
+from app.catalog import bump_catalog_version
+from app.models import StoreOffer
+from app.units import offer_unit_columns
+
+# (unit, typical package sizes)
+UNIT_SIZES = (
+    ("g", (125, 200, 250, 400, 500, 1000)),
+    ("kg", (1, 1.5, 2, 2.5, 5)),
+    ("ml", (200, 330, 500, 750)),
+    ("Liter", (0.5, 1, 1.5, 2)),
+    ("pcs", (1, 4, 6, 10, 12)),
+)
+
+
+def product_names(n_products: int) -> List[str]:
+    return [f"Product {i:05d}" for i in range(n_products)]
+
+
+# Words for flyer-like product names ("Bio Vollmilch 3,5%")
+_NAME_PREFIXES = ("Bio", "Frische", "Feine", "Gouda", "Landliebe", "Ja!", "Milbona", "Golden", "Vegane", "Italienische")
+_NAME_WORDS = (
+    "Vollmilch", "Butter", "Joghurt", "Quark", "Käse", "Schinken", "Salami", "Brot", "Brötchen", "Apfel",
+    "Banane", "Tomaten", "Gurke", "Paprika", "Kartoffeln", "Nudeln", "Reis", "Kaffee", "Tee", "Schokolade",
+    "Müsli", "Orangensaft", "Mineralwasser", "Eier", "Hähnchen", "Lachs", "Pizza", "Chips", "Kekse", "Senf",
+)
+_NAME_SUFFIXES = ("", "3,5%", "light", "Classic", "XXL", "Family Pack", "natur", "extra")
+
+
+def grocery_names(n_products: int, seed: int = 0) -> List[str]:
+    """``n_products`` distinct flyer-like product names."""
+    rnd = random.Random(seed)
+    names = []
+    for i in range(n_products):
+        parts = [rnd.choice(_NAME_PREFIXES), rnd.choice(_NAME_WORDS), rnd.choice(_NAME_SUFFIXES)]
+        names.append(" ".join(p for p in parts if p) + f" {i:06d}")
+    return names
+
+
+def store_names(n_stores: int) -> List[str]:
+    return [f"Store {i:04d}" for i in range(n_stores)]
+
+
+def generate_offers(
+    n_stores: int = 20,
+    n_products: int = 500,
+    offers_per_product: int = 10,
+    seed: int = 0,
+    today: date = None,
+    names: List[str] = None,
+) -> Iterator[Dict]:
+    """
+    Yield offer dicts; every product keeps one unit family across stores.
+    ``names`` overrides the default "Product 00042" names.
+    """
+    rnd = random.Random(seed)
+    today = today or date.today()
+    stores = store_names(n_stores)
+    for product in names or product_names(n_products):
+        unit, sizes = rnd.choice(UNIT_SIZES)
+        base_price = rnd.uniform(0.3, 8.0)
+        for _ in range(offers_per_product):
+            yield {
+                "store_name": rnd.choice(stores),
+                "product_name": product,
+                "quantity": rnd.choice(sizes),
+                "unit": unit,
+                "price": round(base_price * rnd.uniform(0.6, 1.4), 2),
+                "valid_from": today - timedelta(days=rnd.randint(0, 6)),
+                "valid_until": today + timedelta(days=rnd.randint(1, 14)),
+                "image": None,
+            }
+
+
+# What offers_statement selects, for snapshots built without a database
+OfferRow = namedtuple(
+    "OfferRow",
+    "id store_name product_name quantity unit price valid_from valid_until image base_unit base_quantity",
+)
+
+
+def offer_rows(
+    n_stores: int = 20,
+    n_products: int = 500,
+    offers_per_product: int = 10,
+    seed: int = 0,
+) -> List[OfferRow]:
+    """``generate_offers`` as rows for ``app.catalog.build_snapshot``."""
+    rows = []
+    for i, offer in enumerate(generate_offers(n_stores, n_products, offers_per_product, seed=seed), start=1):
+        cols = offer_unit_columns(offer["quantity"], offer["unit"], offer["price"])
+        rows.append(OfferRow(id=i, base_unit=cols["base_unit"], base_quantity=cols["base_quantity"], **offer))
+    return rows
+
+
+def populate(engine, offers, batch_size: int = 5000) -> int:
+    """Bulk insert offer dicts through Core executemany. Returns row count."""
+    count = 0
+    batch = []
+    with engine.begin() as conn:
+        bump_catalog_version(conn)
+        for offer in offers:
+            batch.append(offer)
+            if len(batch) >= batch_size:
+                conn.execute(insert(StoreOffer), batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.execute(insert(StoreOffer), batch)
+            count += len(batch)
+    return count
+
+
+def random_basket(rnd: random.Random, n_products: int, size: int) -> Dict:
+    """A request body for /optimize with ``size`` distinct products."""
+    names = rnd.sample(product_names(n_products), size)
+    items = []
+    for name in names:
+        unit, sizes = rnd.choice(UNIT_SIZES)
+        items.append({"name": name, "quantity": rnd.choice(sizes), "unit": unit})
+    return {"items": items}
@@ -0,0 +1,67 @@
+"""store_offers table with the derived unit columns
+
+Adopts databases created earlier by create_all or
+database/postgresql/create_tables.sql: the table is only created when it
+is missing, and the derived unit columns are added when they are missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+_UNIT_COLUMNS = (
+    ("base_unit", sa.Text()),
+    ("base_quantity", sa.Float()),
+    ("unit_price", sa.Float()),
+)
+
+
+def _create_table(**kw) -> None:
+    op.create_table(
+        "store_offers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("store_name", sa.Text(), nullable=False),
+        sa.Column("product_name", sa.Text(), nullable=False),
+        sa.Column("quantity", sa.Numeric(), nullable=False),
+        sa.Column("unit", sa.Text(), nullable=False),
+        sa.Column("price", sa.Numeric(), nullable=False),
+        sa.Column("valid_from", sa.Date(), nullable=False),
+        sa.Column("valid_until", sa.Date(), nullable=False),
+        sa.Column("image", sa.Text(), nullable=True),
+        *(sa.Column(name, type_, nullable=True) for name, type_ in _UNIT_COLUMNS),
+        **kw,
+    )
+    op.create_index("ix_store_offers_id", "store_offers", ["id"], **kw)
+
+
+def upgrade() -> None:
+    if context.is_offline_mode():
+        # SQL script (alembic upgrade --sql): nothing to inspect, so rely on
+        # IF NOT EXISTS (PostgreSQL).
+        _create_table(if_not_exists=True)
+        for name, type_ in _UNIT_COLUMNS:
+            op.add_column("store_offers", sa.Column(name, type_, nullable=True), if_not_exists=True)
+        return
+
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("store_offers"):
+        _create_table()
+        return
+
+    existing = {column["name"] for column in inspector.get_columns("store_offers")}
+    missing = [(name, type_) for name, type_ in _UNIT_COLUMNS if name not in existing]
+    if missing:
+        with op.batch_alter_table("store_offers") as batch:
+            for name, type_ in missing:
+                batch.add_column(sa.Column(name, type_, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_table("store_offers")
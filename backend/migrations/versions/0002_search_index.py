@@ -0,0 +1,27 @@
+"""product-name search index (pg_trgm GIN / FTS5 trigram table)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+
+from app.search import POSTGRES_DDL, drop_search_index, ensure_search_index
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if context.is_offline_mode():
+        for ddl in POSTGRES_DDL:
+            op.execute(ddl)
+        return
+    # Idempotent; also builds the FTS5 table from existing rows.
+    ensure_search_index(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_search_index(op.get_bind())
@@ -0,0 +1,55 @@
+"""indexes for the hot query shapes
+
+- (product_name, valid_until), covering on PostgreSQL: the offers of the
+  requested products still valid today (/optimize, offer catalog)
+- (product_name, quantity, id): smallest package per product (/products,
+  distinct /search/products)
+- (store_name): DISTINCT store_name (/stores)
+- (valid_until): whole-catalog snapshot and expiry scans
+
+``valid_until >= today`` cannot be a partial-index predicate, since the
+date moves; expired rows are kept out of these indexes by archiving them
+instead.
+
+On PostgreSQL the indexes are built CONCURRENTLY so writes are not blocked.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+_INDEXES = (
+    (
+        "ix_store_offers_product_valid_until", ["product_name", "valid_until"],
+        {"postgresql_include": [
+            "id", "store_name", "price", "quantity", "unit", "valid_from", "image",
+            "base_unit", "base_quantity",
+        ]},
+    ),
+    ("ix_store_offers_product_quantity", ["product_name", "quantity", "id"], {}),
+    ("ix_store_offers_store_name", ["store_name"], {}),
+    ("ix_store_offers_valid_until", ["valid_until"], {}),
+)
+
+
+def _concurrently() -> dict:
+    return {"postgresql_concurrently": True} if op.get_bind().dialect.name == "postgresql" else {}
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        for name, columns, options in _INDEXES:
+            op.create_index(name, "store_offers", columns, if_not_exists=True, **options, **_concurrently())
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(_INDEXES):
+            op.drop_index(name, table_name="store_offers", if_exists=True, **_concurrently())
@@ -0,0 +1,35 @@
+"""index for the offer key lookups of the bulk ingest
+
+(product_name, store_name, valid_from) narrows the upsert/skip merge of
+app.ingest to the handful of packages a store lists for a product in one
+flyer week; quantity and unit are compared on those rows.
+
+Not unique: tables loaded before the ingest pipeline may hold duplicates.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _concurrently() -> dict:
+    return {"postgresql_concurrently": True} if op.get_bind().dialect.name == "postgresql" else {}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_store_offers_offer_key", "store_offers", ["product_name", "store_name", "valid_from"],
+            if_not_exists=True, **_concurrently(),
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_store_offers_offer_key", table_name="store_offers", if_exists=True, **_concurrently())
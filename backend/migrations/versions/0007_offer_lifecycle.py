@@ -0,0 +1,120 @@
+"""store_offers_archive; store_offers partitioned by month of valid_until
+
+Expired offers are moved to store_offers_archive by app.lifecycle.
+
+PostgreSQL only: store_offers becomes a table partitioned by range of
+valid_until, one partition per month (store_offers_pYYYYMM, see
+app.lifecycle) from the oldest offer to PARTITION_MONTHS_AHEAD months
+ahead, plus store_offers_default. The primary key becomes (id, valid_until)
+because it has to contain the partition key; ids stay unique through the
+same sequence. The rows are copied, so run it in a maintenance window on
+large tables.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from datetime import date, timedelta
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Written out rather than imported from the app, so the revision stays what
+# it was when the app's models, lifecycle or search code change.
+PARTITION_MONTHS_AHEAD = 3
+
+# The indexes of store_offers as of 0006 (0001, 0002, 0003 and 0005).
+_INDEXES = (
+    "CREATE INDEX ix_store_offers_id ON store_offers (id)",
+    "CREATE INDEX ix_store_offers_product_valid_until ON store_offers (product_name, valid_until)"
+    " INCLUDE (id, store_name, price, quantity, unit, valid_from, image, base_unit, base_quantity)",
+    "CREATE INDEX ix_store_offers_product_quantity ON store_offers (product_name, quantity, id)",
+    "CREATE INDEX ix_store_offers_store_name ON store_offers (store_name)",
+    "CREATE INDEX ix_store_offers_valid_until ON store_offers (valid_until)",
+    "CREATE INDEX ix_store_offers_offer_key ON store_offers (product_name, store_name, valid_from)",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX ix_store_offers_product_name_trgm ON store_offers USING gin (product_name gin_trgm_ops)",
+)
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _partition_ddl(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS store_offers_p{month:%Y%m} PARTITION OF store_offers "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+    )
+
+
+def _rebuild(old: str, partitioned: bool) -> None:
+    """Recreate store_offers (renamed to ``old``) with or without partitions and copy the rows."""
+    op.execute(f"ALTER TABLE store_offers RENAME TO {old}")
+    op.execute(
+        f"CREATE TABLE store_offers (LIKE {old} INCLUDING DEFAULTS)"
+        + (" PARTITION BY RANGE (valid_until)" if partitioned else "")
+    )
+    if partitioned:
+        op.execute("CREATE TABLE store_offers_default PARTITION OF store_offers DEFAULT")
+        today = date.today()
+        month = _month_start(today)
+        if not context.is_offline_mode():
+            oldest = op.get_bind().execute(sa.text(f"SELECT MIN(valid_until) FROM {old}")).scalar()
+            if oldest is not None:
+                month = min(month, _month_start(oldest))
+        last = _month_start(today)
+        for _ in range(PARTITION_MONTHS_AHEAD):
+            last = _next_month(last)
+        while month <= last:
+            op.execute(_partition_ddl(month))
+            month = _next_month(month)
+    op.execute(f"INSERT INTO store_offers SELECT * FROM {old}")
+    # keep the id sequence when the old table is dropped
+    op.execute("ALTER SEQUENCE IF EXISTS store_offers_id_seq OWNED BY store_offers.id")
+    op.execute(f"DROP TABLE {old} CASCADE")
+    # after the drop: the old primary key still holds the store_offers_pkey name until then
+    op.execute(f"ALTER TABLE store_offers ADD PRIMARY KEY ({'id, valid_until' if partitioned else 'id'})")
+    for ddl in _INDEXES:
+        op.execute(ddl)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "store_offers_archive",
+        sa.Column("archive_id", sa.Integer(), primary_key=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("store_name", sa.Text(), nullable=False),
+        sa.Column("product_name", sa.Text(), nullable=False),
+        sa.Column("quantity", sa.Numeric(), nullable=False),
+        sa.Column("unit", sa.Text(), nullable=False),
+        sa.Column("price", sa.Numeric(), nullable=False),
+        sa.Column("valid_from", sa.Date(), nullable=False),
+        sa.Column("valid_until", sa.Date(), nullable=False),
+        sa.Column("image", sa.Text(), nullable=True),
+        sa.Column("base_unit", sa.Text(), nullable=True),
+        sa.Column("base_quantity", sa.Float(), nullable=True),
+        sa.Column("unit_price", sa.Float(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_store_offers_archive_product_valid_from", "store_offers_archive", ["product_name", "valid_from"],
+    )
+    if op.get_context().dialect.name == "postgresql":
+        _rebuild("store_offers_unpartitioned", partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        _rebuild("store_offers_partitioned", partitioned=False)
+    op.drop_index("ix_store_offers_archive_product_valid_from", table_name="store_offers_archive")
+    op.drop_table("store_offers_archive")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Move expired offers from store_offers to store_offers_archive.
+Usage:
+  python -m scripts.archive_offers
+  python -m scripts.archive_offers --keep-days 14 --json
+
+Offers that expired more than --keep-days days ago are moved in batches
+(see app.lifecycle). On PostgreSQL the emptied monthly partitions are
+dropped and the partitions of the coming months created, so run it daily,
+e.g. from cron.
+"""
+import argparse
+import json
+
+from app import migrations
+from app.db import DATABASE_URL, engine
+from app.lifecycle import archive_expired_offers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keep-days", type=int, default=7, help="keep offers that expired this recently")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args()
+
+    # ensure the schema is at the latest migration
+    migrations.upgrade(DATABASE_URL)
+
+    result = archive_expired_offers(engine, keep_days=args.keep_days, batch_size=args.batch_size)
+    print(
+        f"Archived {result.archived} offers that expired before {result.cutoff} in {result.seconds:.2f} s"
+        f" ({result.batches} batches); partitions created: {len(result.partitions_created)},"
+        f" dropped: {len(result.partitions_dropped)}."
+    )
+    if args.json:
+        print(json.dumps(result.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
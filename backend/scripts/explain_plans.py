@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Print the query plan of every endpoint's SQL before and after the index
+migration (0003).
+
+By default a synthetic SQLite database is built in a temp directory. With
+--database-url the given database is migrated down to 0002 and back up to
+head, i.e. the 0003 indexes are dropped and rebuilt: only point it at a
+copy of production.
+
+Usage (from backend/):
+  python -m scripts.explain_plans
+  python -m scripts.explain_plans --database-url postgresql+psycopg2://... --analyze
+"""
+import argparse
+import os
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+BEFORE_INDEXES = "0002"
+
+
+def _queries(engine):
+    """(endpoint, SQL, parameters) for each hot query shape."""
+    from app.api.optimizer import PRODUCTS_QUERY, STORES_QUERY, products_query
+    from app.catalog import offers_statement
+    from app.search import search_query
+
+    today = date.today()
+    with engine.connect() as conn:
+        names = [row[0] for row in conn.execute(text(
+            "SELECT DISTINCT product_name FROM store_offers ORDER BY product_name LIMIT 15"
+        ))]
+
+    def literal(stmt):
+        return str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+    search_sql, search_params = search_query(engine, "milch", True, 100)
+    page_sql, page_params = products_query(names[-1], 100)
+    return [
+        ("/optimize (catalog disabled)", literal(offers_statement(today, names)), {}),
+        ("offer catalog refresh", literal(offers_statement(today)), {}),
+        ("/search/products?distinct=true", search_sql.text, search_params),
+        ("/products", PRODUCTS_QUERY.text, {}),
+        ("/products?limit=100&cursor=..", page_sql.text, page_params),
+        ("/stores", STORES_QUERY.text, {}),
+    ]
+
+
+def _explain(engine, analyze: bool) -> None:
+    sqlite = engine.dialect.name == "sqlite"
+    if sqlite:
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    for endpoint, sql, params in _queries(engine):
+        print(f"--- {endpoint}")
+        with engine.connect() as conn:
+            for row in conn.execute(text(prefix + sql), params):
+                # SQLite: (id, parent, notused, detail); PostgreSQL: one text column
+                print("   ", row[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", help="database to explain against (default: synthetic SQLite)")
+    parser.add_argument("--analyze", action="store_true", help="PostgreSQL: EXPLAIN (ANALYZE, BUFFERS)")
+    parser.add_argument("--stores", type=int, default=30)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--offers-per-product", type=int, default=10)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        url = f"sqlite:///{Path(tempfile.mkdtemp(prefix='explain_')) / 'explain.db'}"
+    os.environ["DATABASE_URL"] = url
+
+    from app import migrations
+    from app.search import detect_search_index
+    from benchmarks.synthetic import generate_offers, grocery_names, populate
+
+    engine = create_engine(url)
+    if args.database_url is None:
+        # populate() needs the catalog_version table (0004)
+        migrations.upgrade(url, "head")
+        names = grocery_names(args.products)
+        populate(engine, generate_offers(args.stores, args.products, args.offers_per_product, names=names))
+    migrations.downgrade(url, BEFORE_INDEXES)
+    with engine.begin() as conn:
+        detect_search_index(conn)
+        conn.execute(text("ANALYZE"))
+
+    print(f"=== before (revision {BEFORE_INDEXES})")
+    _explain(engine, args.analyze)
+
+    migrations.upgrade(url, "head")
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    print("\n=== after (head)")
+    _explain(engine, args.analyze)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
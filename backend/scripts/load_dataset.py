@@ -1,70 +1,78 @@
 #!/usr/bin/env python3
 """
-Simple loader for a JSON dataset of store offers into the project's database.
+Bulk loader for store offer datasets (flyer dumps) into the project's database.
 Usage:
-  python scripts/load_dataset.py data/offers.json
+  python -m scripts.load_dataset data/offers.json
+  python -m scripts.load_dataset offers.ndjson.gz --mode upsert --batch-size 10000
 
-Expected JSON format: an array of objects with keys:
-  store_name, product_name, quantity, unit, price, valid_from, valid_until, image (optional)
-Dates should be YYYY-MM-DD. quantity and price can be numbers or strings.
+Input formats (by extension, optionally gzip-compressed with .gz):
+  .json            an array of objects
+  .ndjson / .jsonl one object per line
+  .csv             a header row with the field names
+
+Fields: store_name, product_name, quantity, unit, price, valid_from,
+valid_until, image (optional). Dates are YYYY-MM-DD; quantity and price can
+be numbers or strings. Files are streamed in batches (see app.ingest), so
+their size does not matter; invalid rows are counted and skipped.
 """
-import sys
+import argparse
 import json
-from datetime import datetime
+import sys
 from pathlib import Path
 
-from app.db import engine, SessionLocal, Base
-from app.models import StoreOffer
+from app import migrations
+from app.db import DATABASE_URL, engine
+from app.ingest import FORMATS, MODES, IngestStats, ingest_file
 
 
-def parse_date(s):
-    if s is None:
-        return None
-    if isinstance(s, (datetime,)):
-        return s.date()
-    return datetime.strptime(str(s), "%Y-%m-%d").date()
+def _progress(every: int):
+    state = {"next": every}
 
+    def report(stats: IngestStats) -> None:
+        if stats.read >= state["next"]:
+            state["next"] = stats.read + every
+            print(f"  {stats.read:>12,d} rows read  {stats.rows_per_second:>10,.0f} rows/s", file=sys.stderr)
 
-def load(path: Path):
+    return report
+
+
+def load(path: Path, mode: str = "upsert", batch_size: int = 5000, fmt=None, progress_every: int = 0):
     if not path.exists():
         print(f"File not found: {path}")
-        return
-
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    # ensure tables exist
-    Base.metadata.create_all(bind=engine)
-
-    db = SessionLocal()
-    inserted = 0
-    try:
-        for obj in data:
-            offer = StoreOffer(
-                store_name=obj.get("store_name") or obj.get("store") or obj.get("storeName"),
-                product_name=obj.get("product_name") or obj.get("product") or obj.get("productName"),
-                quantity=obj.get("quantity"),
-                unit=obj.get("unit"),
-                price=obj.get("price"),
-                valid_from=parse_date(obj.get("valid_from") or obj.get("validFrom")),
-                valid_until=parse_date(obj.get("valid_until") or obj.get("validUntil")),
-                image=obj.get("image"),
-            )
-            db.add(offer)
-            inserted += 1
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        db.close()
-
-    print(f"Inserted {inserted} offers into the database.")
+        return None
 
+    # ensure the schema is at the latest migration
+    migrations.upgrade(DATABASE_URL)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python scripts/load_dataset.py path/to/offers.json")
+    stats = ingest_file(
+        engine, path, fmt, mode=mode, batch_size=batch_size,
+        progress=_progress(progress_every) if progress_every else None,
+    )
+    print(
+        f"Read {stats.read} rows in {stats.seconds:.1f} s ({stats.rows_per_second:,.0f} rows/s): "
+        f"{stats.inserted} inserted, {stats.updated} updated, {stats.duplicates} duplicates, "
+        f"{sum(stats.rejected.values())} rejected."
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--mode", choices=MODES, default="upsert",
+                        help="append: insert all rows; upsert: update existing offers; skip: keep existing offers")
+    parser.add_argument("--format", dest="fmt", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--progress-every", type=int, default=100_000, help="rows between progress lines (0: off)")
+    parser.add_argument("--json", action="store_true", help="print the final stats as JSON")
+    args = parser.parse_args()
+
+    stats = load(args.path, args.mode, args.batch_size, args.fmt, args.progress_every)
+    if stats is None:
         sys.exit(1)
-    p = Path(sys.argv[1])
-    load(p)
+    if args.json:
+        print(json.dumps(stats.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Replay a captured /optimize request (see app.profiling) against a snapshot
+of the catalog.
+Usage:
+  python -m scripts.replay_profile profiles/20261018T101500-1a2b3c4d.json
+  python -m scripts.replay_profile capture.json --snapshot catalog.snapshot --repeat 20 --output replay.prof
+
+The snapshot is the columnar file given by --snapshot (python -m
+scripts.export_catalog), or else the captured products read from
+DATABASE_URL with the offers valid on the capture's date (--date to
+override). A different catalog version than the capture's is reported, as
+the offers may have changed since. The basket is timed --repeat times and
+profiled once more; the profile is printed and written to --output.
+"""
+import argparse
+import cProfile
+import json
+import pstats
+import statistics
+import time
+from datetime import date
+
+from fastapi import HTTPException
+
+from app import schemas
+from app.api.optimizer import OptimizeOptions, optimize_basket
+from app.catalog import load_snapshot
+from app.db import SessionLocal
+
+
+def _run(payload, snapshot, options):
+    try:
+        result = optimize_basket(payload, snapshot, options)
+    except HTTPException as exc:
+        return exc.status_code, exc.detail
+    return 200, f"total_price {result['total_price']:.2f} at {', '.join(result['stores'])}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("capture", help="<id>.json written by the profiler")
+    parser.add_argument("--snapshot", help="catalog snapshot file; default: read DATABASE_URL")
+    parser.add_argument("--date", type=date.fromisoformat, help="offer date (default: the capture's)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25, help="functions of the profile to print")
+    parser.add_argument("--output", help="write the replay profile (pstats) here")
+    args = parser.parse_args()
+
+    with open(args.capture) as f:
+        capture = json.load(f)
+    payload = schemas.GroceryListRequest(**capture["payload"])
+    options = OptimizeOptions(
+        mode=schemas.OptimizationMode(capture["options"]["mode"]),
+        max_stores=capture["options"]["max_stores"],
+        store_visit_cost=capture["options"]["store_visit_cost"],
+        top=capture["options"].get("top", 0),
+    )
+
+    start = time.perf_counter()
+    if args.snapshot:
+        from app.catalog_file import read_catalog_file
+
+        snapshot = read_catalog_file(args.snapshot)
+    else:
+        day = args.date or date.fromisoformat(capture["catalog"]["built_on"])
+        db = SessionLocal()
+        try:
+            snapshot = load_snapshot(db, day, {item.name for item in payload.items})
+        finally:
+            db.close()
+    print(
+        f"Snapshot of {snapshot.built_on} (catalog version {snapshot.version}) "
+        f"loaded in {time.perf_counter() - start:.2f} s."
+    )
+    if snapshot.version != capture["catalog"]["version"]:
+        print(f"Note: the capture ran on catalog version {capture['catalog']['version']}.")
+
+    offers = {item.name: len(snapshot.get(item.name) or ()) for item in payload.items}
+    print(f"{len(payload.items)} items, {sum(offers.values())} offers; mode {options.mode.value}")
+    for name, count in offers.items():
+        captured = capture["catalog"]["offers"].get(name)
+        note = f" (captured: {captured})" if captured is not None and captured != count else ""
+        print(f"  {name}: {count} offers{note}")
+
+    latencies = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        status, detail = _run(payload, snapshot, options)
+        latencies.append((time.perf_counter() - t0) * 1e3)
+    print(f"Captured: {capture['status']} in {capture['ms']:.2f} ms ({capture['reason']}, {capture['captured_at']})")
+    print(
+        f"Replayed: {status} {detail}; min {min(latencies):.2f} ms, "
+        f"median {statistics.median(latencies):.2f} ms over {args.repeat} runs"
+    )
+
+    profile = cProfile.Profile()
+    profile.runcall(_run, payload, snapshot, options)
+    stats = pstats.Stats(profile)
+    if args.output:
+        stats.dump_stats(args.output)
+        print(f"Profile written to {args.output}")
+    stats.sort_stats("cumulative").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
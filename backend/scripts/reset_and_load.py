@@ -12,14 +12,19 @@ from pathlib import Path
 # Force using test.db to avoid touching production
 os.environ["DATABASE_URL"] = "sqlite:///./test.db"
 
+from sqlalchemy import text
+
+from app import migrations
 from app.db import engine, Base, SessionLocal
 from scripts.load_dataset import load
 
 if __name__ == "__main__":
     print("Resetting database at:", os.environ["DATABASE_URL"])
-    # Drop and recreate all tables
+    # Drop all tables and recreate them through the migrations
     Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    migrations.upgrade(os.environ["DATABASE_URL"])
 
     data_path = Path(__file__).resolve().parents[0] / ".." / "data" / "sample_offers.json"
     data_path = data_path.resolve()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Production entry point: preload the app once and fork uvicorn workers.
+Usage:
+  python -m scripts.serve --workers 4 --port 8000 --migrate
+
+The master runs the migrations (--migrate), exports the catalog snapshot
+file (--catalog-file, default CATALOG_SNAPSHOT_PATH or ./catalog.snapshot)
+unless it is current, imports the app and maps the catalog, then forks the
+workers; see app.prefork. The workers start warm and share the catalog
+pages. Readiness: GET /ops/ready on the port.
+
+The snapshot TTL defaults to 0 here (CATALOG_TTL_SECONDS): a TTL reload of
+a mapped snapshot reads store_offers in every worker, while writes are
+noticed through the catalog version anyway.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--migrate", action="store_true", help="run the Alembic migrations first")
+    parser.add_argument("--catalog-file", default=os.getenv("CATALOG_SNAPSHOT_PATH") or "catalog.snapshot")
+    parser.add_argument("--refresh-seconds", type=float, default=5.0,
+                        help="how often the master checks whether the snapshot file is outdated")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    os.environ.setdefault("CATALOG_TTL_SECONDS", "0")
+
+    from app.prefork import PreforkServer, bind_socket, preload
+
+    start = time.perf_counter()
+    app = preload(migrate=args.migrate, snapshot_path=args.catalog_file)
+    logging.info("Preloaded in %.2f s", time.perf_counter() - start)
+    server = PreforkServer(
+        app,
+        bind_socket(args.host, args.port),
+        workers=args.workers,
+        snapshot_path=args.catalog_file,
+        refresh_seconds=args.refresh_seconds,
+        graceful_timeout=args.graceful_timeout,
+        log_level=args.log_level,
+        access_log=args.access_log,
+    )
+    sys.exit(server.run())
+
+
+if __name__ == "__main__":
+    main()
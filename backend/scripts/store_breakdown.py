@@ -2,6 +2,7 @@ import os
 from datetime import date
 from app.db import SessionLocal, engine, Base
 from app.models import StoreOffer
+from app.units import to_base_qty
 import math
 
 # Use test.db
@@ -14,37 +15,17 @@ requested = [
     {"name": "Yogurt", "quantity": 150, "unit": "g"}
 ]
 
-# Helpers copied from optimizer
-def _normalize_unit(unit: str) -> str:
-    if not unit:
-        return unit
-    u = unit.strip().lower()
-    if u in ("g", "gram", "grams", "gramm", "gramm."):
-        return "g"
-    if u in ("kg", "kilogram", "kilograms", "kg."):
-        return "kg"
-    if u in ("l", "liter", "litre", "liters", "litres", "l."):
-        return "l"
-    if u in ("ml", "milliliter", "millilitre", "milliliters", "millilitres", "ml."):
-        return "ml"
-    if u in ("piece", "pieces", "stk", "pcs", "stück"):
-        return "piece"
-    return u
+def _base_qty(offer):
+    if offer.base_quantity is None or offer.base_unit is None:
+        return to_base_qty(float(offer.quantity), offer.unit)
+    return offer.base_quantity, offer.base_unit
 
 
-def _to_base_qty(qty: float, unit: str):
-    u = _normalize_unit(unit)
-    if u == "kg":
-        return qty * 1000.0, "g"
-    if u == "g":
-        return qty, "g"
-    if u == "l":
-        return qty * 1000.0, "ml"
-    if u == "ml":
-        return qty, "ml"
-    if u == "piece":
-        return qty, "piece"
-    return qty, u
+def _unit_price(offer):
+    if offer.unit_price is not None:
+        return offer.unit_price
+    base_qty, _ = _base_qty(offer)
+    return float(offer.price) / base_qty if base_qty > 0 else float('inf')
 
 
 def compute():
@@ -56,7 +37,11 @@ def compute():
 
     offers = (
         db.query(StoreOffer)
-        .filter(StoreOffer.product_name.in_(names), StoreOffer.valid_until >= today)
+        .filter(
+            StoreOffer.product_name.in_(names),
+            StoreOffer.valid_from <= today,
+            StoreOffer.valid_until >= today,
+        )
         .all()
     )
 
@@ -67,22 +52,11 @@ def compute():
         prod = off.product_name
         store_map.setdefault(st, {})
         existing = store_map[st].get(prod)
-        # compute per-base-unit price
-        try:
-            off_qty_base, off_base_unit = _to_base_qty(float(off.quantity), off.unit)
-            off_unit_price = float(off.price) / off_qty_base if off_qty_base > 0 else float('inf')
-        except Exception:
-            off_unit_price = float(off.price) / float(off.quantity) if float(off.quantity) else float('inf')
+        # compare by the per-base-unit price stored at ingest time
         if existing is None:
             store_map[st][prod] = off
-        else:
-            try:
-                ex_qty_base, ex_base_unit = _to_base_qty(float(existing.quantity), existing.unit)
-                ex_unit_price = float(existing.price) / ex_qty_base if ex_qty_base > 0 else float('inf')
-            except Exception:
-                ex_unit_price = float(existing.price) / float(existing.quantity) if float(existing.quantity) else float('inf')
-            if off_unit_price < ex_unit_price:
-                store_map[st][prod] = off
+        elif _unit_price(off) < _unit_price(existing):
+            store_map[st][prod] = off
 
     # compute totals per store where all products present
     results = []
@@ -96,8 +70,8 @@ def compute():
             price_f = float(offer.price)
             qty_req = req_qty[name]
             unit_req = req_unit[name]
-            req_qty_base, req_base_unit = _to_base_qty(qty_req, unit_req)
-            offer_qty_base, offer_base_unit = _to_base_qty(float(offer.quantity), offer.unit)
+            req_qty_base, req_base_unit = to_base_qty(qty_req, unit_req)
+            offer_qty_base, offer_base_unit = _base_qty(offer)
 
             if req_base_unit == offer_base_unit and offer_qty_base > 0:
                 packages = math.ceil(req_qty_base / offer_qty_base)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Apply a full flyer dataset to the project's database as a delta.
+Usage:
+  python -m scripts.sync_dataset week42.ndjson.gz
+  python -m scripts.sync_dataset week42.json --scope all --dry-run
+
+Offers new in the dataset are inserted, changed ones updated, and live
+offers missing from it expired (see app.sync); unchanged offers are not
+touched, so the catalog and the response cache only refresh the products
+that changed. The formats are those of scripts.load_dataset.
+--scope stores (default) expires only offers of stores present in the
+dataset; --scope all treats the dataset as the whole catalog.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from app import migrations
+from app.db import DATABASE_URL, engine
+from app.ingest import FORMATS
+from app.sync import SCOPES, sync_file
+
+
+def sync(path: Path, scope: str = "stores", batch_size: int = 5000, fmt=None, dry_run: bool = False):
+    if not path.exists():
+        print(f"File not found: {path}")
+        return None
+
+    # ensure the schema is at the latest migration
+    migrations.upgrade(DATABASE_URL)
+
+    changes = sync_file(engine, path, fmt, scope=scope, batch_size=batch_size, dry_run=dry_run)
+    print(
+        f"{'Would apply' if dry_run else 'Applied'} {path.name} in {changes.seconds:.2f} s: "
+        f"{changes.inserted} inserted, {changes.updated} updated, {changes.expired} expired, "
+        f"{changes.unchanged} unchanged ({len(changes.products)} products, {len(changes.stores)} stores); "
+        f"{sum(changes.stats.rejected.values())} rejected."
+    )
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--scope", choices=SCOPES, default="stores",
+                        help="stores: expire only offers of the stores in the dataset; all: of every store")
+    parser.add_argument("--format", dest="fmt", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="compute the changes and roll them back")
+    parser.add_argument("--json", action="store_true", help="print the change set as JSON")
+    args = parser.parse_args()
+
+    changes = sync(args.path, args.scope, args.batch_size, args.fmt, args.dry_run)
+    if changes is None:
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(changes.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# The app creates its engine on import: point it at a SQLite file in a
+# temporary directory (a file, so all connections see the same database),
+# never at the checked-in test.db.
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='smart_grocery_tests_'), 'test.db')}"
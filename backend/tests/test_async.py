@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import optimizer_async
+from app.catalog import offer_catalog
+from app.db import SessionLocal, engine, Base
+from app.db_async import async_database_url
+from app.main import app
+from app.models import StoreOffer
+
+client = TestClient(app)
+
+async_app = FastAPI()
+async_app.include_router(optimizer_async.router)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    today = date.today()
+    for store, product, quantity, unit, price in (
+        ("ALDI", "Milk", 1, "l", 0.95),
+        ("LIDL", "Milk", 1, "l", 0.89),
+        ("ALDI", "Cheese", 250, "g", 2.29),
+        ("LIDL", "Cheese", 200, "g", 1.99),
+    ):
+        db.add(StoreOffer(
+            store_name=store,
+            product_name=product,
+            quantity=quantity,
+            unit=unit,
+            price=price,
+            valid_from=today - timedelta(days=1),
+            valid_until=today + timedelta(days=10),
+        ))
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_database_url("postgresql+asyncpg://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+@pytest.mark.parametrize("catalog_enabled", [True, False])
+def test_async_router_matches_sync(monkeypatch, catalog_enabled):
+    monkeypatch.setattr(offer_catalog, "enabled", catalog_enabled)
+    basket = {"items": [{"name": "Milk", "quantity": 2, "unit": "l"}, {"name": "Cheese", "quantity": 400, "unit": "g"}]}
+
+    with TestClient(async_app) as async_client:
+        for mode in ("single_store", "multi_store", "max_stores"):
+            expected = client.post(f"/optimize?mode={mode}", json=basket)
+            actual = async_client.post(f"/optimize?mode={mode}", json=basket)
+            assert actual.status_code == expected.status_code == 200
+            assert actual.json() == expected.json()
+
+        for path in ("/stores", "/search/products?name=mil&distinct=false", "/products?limit=1"):
+            assert async_client.get(path).json() == client.get(path).json()
+        for path in ("/products?format=ndjson", "/search/products?name=ch&format=ndjson"):
+            assert async_client.get(path).content == client.get(path).content
+
+        missing = async_client.post("/optimize", json={"items": [{"name": "Caviar", "quantity": 1, "unit": "pcs"}]})
+        assert missing.status_code == 404
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    today = date.today()
+    for store, product, quantity, unit, price in (
+        ("ALDI", "Milk", 1, "l", 0.95),
+        ("LIDL", "Milk", 1, "l", 0.89),
+        ("ALDI", "Cheese", 250, "g", 2.29),
+        ("LIDL", "Cheese", 200, "g", 1.99),
+        ("ALDI", "Eggs", 10, "pcs", 1.49),
+    ):
+        db.add(StoreOffer(
+            store_name=store,
+            product_name=product,
+            quantity=quantity,
+            unit=unit,
+            price=price,
+            valid_from=today - timedelta(days=1),
+            valid_until=today + timedelta(days=10),
+        ))
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+BASKETS = [
+    {"items": [{"name": "Milk", "quantity": 2, "unit": "l"}, {"name": "Cheese", "quantity": 400, "unit": "g"}]},
+    {"items": [{"name": "Milk", "quantity": 2, "unit": "l"}, {"name": "Eggs", "quantity": 6, "unit": "pcs"}]},
+]
+
+
+def test_batch_matches_individual_calls():
+    for mode in ("single_store", "multi_store"):
+        resp = client.post(f"/optimize/batch?mode={mode}", json={"baskets": BASKETS})
+        assert resp.status_code == 200, resp.text
+        results = resp.json()
+        assert len(results) == len(BASKETS)
+        for basket, result in zip(BASKETS, results):
+            single = client.post(f"/optimize?mode={mode}", json=basket)
+            assert single.status_code == 200, single.text
+            assert result == single.json()
+
+
+def test_batch_reports_failing_list():
+    baskets = BASKETS + [{"items": [{"name": "Caviar", "quantity": 1, "unit": "pcs"}]}]
+    resp = client.post("/optimize/batch", json={"baskets": baskets})
+    assert resp.status_code == 404
+    assert resp.json()["detail"].startswith("Grocery list 2:")
@@ -0,0 +1,101 @@
+from collections import namedtuple
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.best_value import BestValueIndex
+from app.catalog import build_snapshot, offer_catalog, patch_snapshot
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app.units import offer_unit_columns
+
+client = TestClient(app)
+
+Row = namedtuple(
+    "Row",
+    "id store_name product_name quantity unit price valid_from valid_until image base_unit base_quantity",
+)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    offer_catalog.invalidate()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def _row(offer_id, store, product, quantity, unit, price):
+    today = date.today()
+    cols = offer_unit_columns(quantity, unit, price)
+    return Row(
+        offer_id, store, product, quantity, unit, price, today, today + timedelta(days=7), None,
+        cols["base_unit"], cols["base_quantity"],
+    )
+
+
+def test_ranking_per_base_unit_and_patch_reuse():
+    rows = [
+        _row(1, "ALDI", "Milk", 1, "l", 1.2),       # 0.0012 / ml
+        _row(2, "LIDL", "Milk", 500, "ml", 0.5),    # 0.0010 / ml
+        _row(3, "REWE", "Milk", 6, "pcs", 3.0),     # per piece: its own group
+        _row(4, "EDEKA", "Milk", 0, "ml", 1.0),     # empty package: no unit price
+        _row(5, "REWE", "Oat Milk", 1, "l", 1.0),   # 0.0010 / ml, later id than LIDL
+        _row(6, "ALDI", "Cheese", 250, "g", 2.5),
+    ]
+    snapshot = build_snapshot(rows, date.today())
+    index = BestValueIndex(snapshot)
+
+    groups = index.best("Milk", k=5)
+    assert [(g["base_unit"], [o["offer_id"] for o in g["offers"]]) for g in groups] == [
+        ("ml", [2, 1]), ("piece", [3]),
+    ]
+    assert groups[0]["offers"][0]["unit_price"] == 0.001
+    assert index.best("Milk", k=1, base_unit="ml")[0]["offers"][0]["store_name"] == "LIDL"
+    assert index.best("Bread", k=5) == []
+
+    # several products ranked together; ties by offer id
+    groups = index.best_of(["Milk", "Oat Milk"], "milk", k=2, base_unit="ml")
+    assert [(o["product_name"], o["offer_id"]) for o in groups[0]["offers"]] == [("Milk", 2), ("Oat Milk", 5)]
+
+    # a patch re-ranks only the products it re-read
+    patched = patch_snapshot(snapshot, [_row(7, "LIDL", "Cheese", 1, "kg", 8.0)], frozenset({"Cheese"}), 0, 1)
+    updated = BestValueIndex(patched, index)
+    assert updated.products["Milk"] is index.products["Milk"]
+    assert [o["offer_id"] for o in updated.best("Cheese", k=5)[0]["offers"]] == [7]
+
+
+def test_best_value_endpoint():
+    db = SessionLocal()
+    today = date.today()
+    for store, product, quantity, unit, price in (
+        ("ALDI", "Vollmilch", 1, "l", 1.1),
+        ("LIDL", "Vollmilch", 2, "l", 1.8),
+        ("REWE", "Hafermilch", 1, "l", 0.85),
+        ("REWE", "Butter", 250, "g", 2.2),
+    ):
+        db.add(StoreOffer(
+            store_name=store, product_name=product, quantity=quantity, unit=unit, price=price,
+            valid_from=today - timedelta(days=1), valid_until=today + timedelta(days=10),
+        ))
+    db.commit()
+    db.close()
+
+    resp = client.get("/products/best-value?product=Vollmilch&product=Butter&k=1")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [(g["name"], g["base_unit"], g["offers"][0]["store_name"]) for g in body] == [
+        ("Vollmilch", "ml", "LIDL"), ("Butter", "g", "REWE"),
+    ]
+    assert body[0]["offers"][0]["unit_price"] == 0.0009
+
+    resp = client.get("/products/best-value?q=milch&unit=Liter")
+    assert resp.status_code == 200
+    assert [(o["product_name"], o["store_name"]) for o in resp.json()[0]["offers"]] == [
+        ("Hafermilch", "REWE"), ("Vollmilch", "LIDL"), ("Vollmilch", "ALDI"),
+    ]
+    assert client.get("/ops/ready").json()["best_value_index"] is True
+
+    assert client.get("/products/best-value?q=milch&unit=kg").status_code == 404
+    assert client.get("/products/best-value").status_code == 400
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.catalog import offer_catalog
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    offer_catalog.enabled = True
+    Base.metadata.drop_all(bind=engine)
+
+
+def _add_offer(**kwargs):
+    today = date.today()
+    db = SessionLocal()
+    db.add(StoreOffer(
+        valid_from=today - timedelta(days=1),
+        valid_until=today + timedelta(days=10),
+        **kwargs,
+    ))
+    db.commit()
+    db.close()
+
+
+def test_catalog_refreshes_after_commit():
+    _add_offer(store_name="ALDI", product_name="Butter", quantity=250, unit="g", price=2.0)
+    payload = {"items": [{"name": "Butter", "quantity": 250, "unit": "g"}]}
+
+    resp = client.post("/optimize", json=payload)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["stores"] == ["ALDI"]
+    generation = offer_catalog.snapshot.generation
+
+    # A cheaper offer committed afterwards must be visible on the next call.
+    _add_offer(store_name="LIDL", product_name="Butter", quantity=250, unit="g", price=1.5)
+
+    resp = client.post("/optimize", json=payload)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["stores"] == ["LIDL"]
+    assert offer_catalog.snapshot.generation > generation
+
+
+def test_catalog_matches_database_path():
+    _add_offer(store_name="ALDI", product_name="Butter", quantity=250, unit="g", price=2.0)
+    _add_offer(store_name="ALDI", product_name="Flour", quantity=1, unit="kg", price=0.9)
+    _add_offer(store_name="LIDL", product_name="Flour", quantity=500, unit="g", price=0.5)
+    payload = {
+        "items": [
+            {"name": "Butter", "quantity": 500, "unit": "g"},
+            {"name": "Flour", "quantity": 1.5, "unit": "kg"},
+        ]
+    }
+
+    for mode in ("single_store", "multi_store"):
+        offer_catalog.enabled = True
+        from_catalog = client.post(f"/optimize?mode={mode}", json=payload)
+        offer_catalog.enabled = False
+        from_database = client.post(f"/optimize?mode={mode}", json=payload)
+        assert from_catalog.status_code == 200, from_catalog.text
+        assert from_catalog.json() == from_database.json()
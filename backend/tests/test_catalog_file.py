@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.catalog import OfferCatalog, bump_catalog_version, offer_catalog
+from app.catalog_file import export_catalog, read_catalog_file
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app.response_cache import response_cache
+
+client = TestClient(app)
+
+TODAY = date.today()
+BASKET = {"items": [
+    {"name": "Milk", "quantity": 2, "unit": "l"},
+    {"name": "Cheese", "quantity": 400, "unit": "g"},
+    {"name": "Bread", "quantity": 1, "unit": "pcs"},
+]}
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    for store, product, quantity, unit, price, image in (
+        ("ALDI", "Milk", 1, "Liter", 0.95, None),
+        ("LIDL", "Milk", 1, "l", 0.89, "https://example.com/milk.png"),
+        ("ALDI", "Cheese", 250, "g", 2.29, None),
+        ("LIDL", "Cheese", 0.2, "kg", 1.99, None),
+        ("ALDI", "Bread", 500, "g", 1.49, None),
+        ("NETTO", "Bread", 1, "Stück", 1.79, None),
+    ):
+        db.add(StoreOffer(
+            store_name=store, product_name=product, quantity=quantity, unit=unit, price=price, image=image,
+            valid_from=TODAY - timedelta(days=1), valid_until=TODAY + timedelta(days=6),
+        ))
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    offer_catalog.snapshot_path = None
+    offer_catalog.invalidate()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _export(path):
+    db = SessionLocal()
+    try:
+        return export_catalog(db, path)
+    finally:
+        db.close()
+
+
+def test_file_round_trips_the_snapshot(tmp_path):
+    built = _export(tmp_path / "catalog.snapshot")
+    mapped = read_catalog_file(tmp_path / "catalog.snapshot")
+    assert (mapped.stores, mapped.unit_codes, mapped.version, mapped.built_on) == (
+        built.stores, built.unit_codes, built.version, built.built_on,
+    )
+    assert sorted(mapped.products) == sorted(built.products)
+    for name, offers in built.products.items():
+        other = mapped.get(name)
+        assert not other.prices.flags.writeable
+        for column in ("ids", "prices", "quantities", "base_qtys", "store_idx", "base_unit_codes",
+                       "offer_stores", "first_offer_ids"):
+            assert getattr(other, column).tolist() == getattr(offers, column).tolist(), column
+        for column in ("stores", "units", "base_units", "valid_from", "valid_until", "images"):
+            assert list(getattr(other, column)) == list(getattr(offers, column)), column
+
+
+def test_optimize_from_the_mapped_file_matches_the_database(tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    _export(path)
+    results = {}
+    for snapshot_path in (None, path):
+        offer_catalog.snapshot_path = snapshot_path
+        offer_catalog._snapshot = None
+        for mode in ("single_store", "multi_store", "max_stores"):
+            response_cache.clear()
+            resp = client.post(f"/optimize?mode={mode}", json=BASKET)
+            assert resp.status_code == 200, resp.text
+            results.setdefault(mode, []).append(resp.json())
+        mapped = snapshot_path is not None
+        assert offer_catalog.snapshot.get("Milk").prices.flags.writeable is not mapped
+    for mode, (database, mapped) in results.items():
+        assert database == mapped, mode
+
+
+def test_file_of_an_older_version_is_ignored(tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    _export(path)
+    catalog = OfferCatalog(ttl=0, snapshot_path=path)
+    assert not catalog.get().get("Milk").prices.flags.writeable
+
+    db = SessionLocal()
+    bump_catalog_version(db)
+    db.commit()
+    db.close()
+    catalog.invalidate()
+    assert catalog.get().get("Milk").prices.flags.writeable
+    # after a TTL or invalidate() reload at the same version the database is read
+    _export(path)
+    catalog.invalidate()
+    assert catalog.get().get("Milk").prices.flags.writeable
@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import NullPool
+from app.db import engine_options
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_engine_options_pooled(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "8")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "2")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "0")
+    options = engine_options("postgresql+psycopg2://u:p@db/app")
+    assert options["pool_size"] == 8
+    assert options["max_overflow"] == 2
+    assert options["pool_pre_ping"] is False
+    assert "poolclass" not in options
+
+
+def test_engine_options_null_pool_and_memory_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_POOL_CLASS", "null")
+    assert engine_options("postgresql+psycopg2://u:p@db/app")["poolclass"] is NullPool
+
+    options = engine_options("sqlite:///:memory:")
+    assert options["connect_args"] == {"check_same_thread": False}
+    assert "pool_size" not in options and "poolclass" not in options
+
+
+def test_pool_status_endpoint():
+    resp = client.get("/ops/pool")
+    assert resp.status_code == 200, resp.text
+    primary = resp.json()["primary"]
+    assert primary["pool"] == "QueuePool"
+    assert {"checkedout", "connects", "checkouts"} <= set(primary)
@@ -0,0 +1,139 @@
+import math
+import random
+from collections import namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.catalog import build_snapshot
+from app.engine import BasketCosts, RequestedItem, cheapest_single_store
+from app.units import offer_unit_columns, to_base_qty
+
+Row = namedtuple(
+    "Row",
+    "id store_name product_name quantity unit price valid_from valid_until image base_unit base_quantity",
+)
+
+UNITS = ("g", "kg", "ml", "Liter", "pcs", "box")
+
+
+def _catalog(n_stores, n_products, n_offers, seed=0):
+    rnd = random.Random(seed)
+    today = date.today()
+    rows = []
+    for i in range(1, n_offers + 1):
+        quantity = rnd.choice((0.5, 1, 2, 6, 250, 500, 1000))
+        unit = rnd.choice(UNITS)
+        price = round(rnd.uniform(0.2, 9.0), 2)
+        cols = offer_unit_columns(quantity, unit, price)
+        rows.append(Row(
+            i, f"S{rnd.randrange(n_stores)}", f"P{rnd.randrange(n_products)}", quantity, unit, price,
+            today, today + timedelta(days=7), None, cols["base_unit"], cols["base_quantity"],
+        ))
+    return rows
+
+
+def _reference(rows, items):
+    """Straightforward per-offer loop the engine must agree with."""
+    requested = {item.name: item for item in items}
+    per_store, cheapest = {}, {}
+    for row in rows:
+        item = requested.get(row.product_name)
+        if item is None:
+            continue
+        req_base, req_unit = to_base_qty(item.quantity, item.unit)
+        if req_unit == row.base_unit and row.base_quantity > 0:
+            cost = float(row.price) * math.ceil(req_base / row.base_quantity)
+        else:
+            cost = float(row.price) * item.quantity
+        entry = per_store.setdefault(row.store_name, {})
+        if row.product_name not in entry or cost < entry[row.product_name][0]:
+            entry[row.product_name] = (cost, row.id)
+        if row.product_name not in cheapest or cost < cheapest[row.product_name][0]:
+            cheapest[row.product_name] = (cost, row.id)
+    return per_store, cheapest
+
+
+def test_engine_matches_reference_on_large_basket():
+    rows = _catalog(n_stores=40, n_products=300, n_offers=120_000)
+    snapshot = build_snapshot(rows, date.today())
+    rnd = random.Random(1)
+    items = [
+        RequestedItem(f"P{p}", rnd.choice((1, 3, 500, 1.5)), rnd.choice(UNITS))
+        for p in rnd.sample(range(300), 100)
+    ]
+    basket = BasketCosts(snapshot, items)
+    per_store, cheapest = _reference(rows, items)
+
+    for name, (cost, offer_id) in cheapest.items():
+        best_cost, _, i = basket.cheapest[name]
+        assert best_cost == cost
+        assert basket.products[name].ids[i] == offer_id
+
+    for row in range(len(basket.store_rows)):
+        store = basket.store_name(row)
+        for name, col in basket.columns.items():
+            expected = per_store[store].get(name)
+            if expected is None:
+                assert basket.cost[row, col] == np.inf
+            else:
+                assert basket.cost[row, col] == expected[0]
+                assert basket.products[name].ids[basket.offer_index[row, col]] == expected[1]
+
+    names = [item.name for item in items]
+    totals = basket.store_totals(names)
+    for row in range(len(basket.store_rows)):
+        entry = per_store[basket.store_name(row)]
+        if all(name in entry for name in names):
+            total = 0.0
+            for name in names:
+                total += entry[name][0]
+            assert totals[row] == total
+        else:
+            assert totals[row] == np.inf
+
+
+def test_stores_ordered_by_first_offer():
+    rows = _catalog(n_stores=5, n_products=3, n_offers=200, seed=3)
+    snapshot = build_snapshot(rows, date.today())
+    basket = BasketCosts(snapshot, [RequestedItem("P1", 1, "pcs"), RequestedItem("P2", 1, "g")])
+    first = {}
+    for row in rows:
+        if row.product_name in ("P1", "P2"):
+            first.setdefault(row.store_name, row.id)
+    expected = sorted(first, key=first.get)
+    assert [basket.store_name(r) for r in range(len(basket.store_rows))] == expected
+
+
+def test_single_store_choice_matches_cost_matrix():
+    # few stores and products with rounded prices: complete stores and tied totals
+    for seed in range(20):
+        rows = _catalog(n_stores=6, n_products=4, n_offers=150, seed=seed)
+        snapshot = build_snapshot(rows, date.today())
+        rnd = random.Random(seed)
+        items = [
+            RequestedItem(f"P{rnd.randrange(4)}", rnd.choice((1, 2, 500)), rnd.choice(UNITS))
+            for _ in range(rnd.randint(1, 5))
+        ]
+        names = [item.name for item in items]
+        basket = BasketCosts(snapshot, items)
+        totals = basket.store_totals(names)
+        choice = cheapest_single_store(snapshot, items, names)
+        if not np.isfinite(totals.min()):
+            assert choice is None
+            continue
+        row = int(np.argmin(totals))
+        assert snapshot.stores[choice.store] == basket.store_name(row)
+        assert choice.total == totals[row]
+        for name, (i, packages) in choice.picks.items():
+            col = basket.columns[name]
+            assert (i, packages) == (basket.offer_index[row, col], basket.packages[row, col])
+
+        # the top 3, ties in store row order
+        rows = [r for r in np.argsort(totals, kind="stable")[:3] if np.isfinite(totals[r])]
+        ranked = cheapest_single_store(snapshot, items, names, top=3).ranked
+        assert [(snapshot.stores[store], total) for store, total in ranked] == [
+            (basket.store_name(r), totals[r]) for r in rows
+        ]
+
+    assert cheapest_single_store(snapshot, [RequestedItem("Missing", 1, "pcs")], ["Missing"]) is None
@@ -0,0 +1,98 @@
+import gzip
+import json
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.db import SessionLocal, engine, Base
+from app.http_cache import CachedBody
+from app.main import app
+from app.models import StoreOffer
+
+client = TestClient(app)
+
+
+def _add_offer(store, product, quantity=1, price=1.0):
+    db = SessionLocal()
+    db.add(StoreOffer(
+        store_name=store, product_name=product, price=price, quantity=quantity, unit="pcs",
+        valid_from=date.today(), valid_until=date.today() + timedelta(days=7),
+    ))
+    db.commit()
+    db.close()
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    for i in range(40):
+        _add_offer(f"Store {i % 3}", f"Product {i:02d}", quantity=i % 4 + 1)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_listing_sets_validators_and_matches_model_serialization():
+    resp = client.get("/stores")
+    assert resp.status_code == 200
+    assert resp.json() == ["Store 0", "Store 1", "Store 2"]
+    assert resp.content == b'["Store 0","Store 1","Store 2"]'
+    assert resp.headers["etag"].startswith('"')
+    assert "last-modified" in resp.headers
+    assert resp.headers["cache-control"].startswith("public, max-age=")
+
+    products = client.get("/products", headers={"Accept-Encoding": "identity"})
+    first = products.json()[0]
+    assert first["product_name"] == "Product 00"
+    assert first["valid_from"] == date.today().isoformat()
+    assert first["image"] is None
+
+
+def test_if_none_match_and_if_modified_since_return_304():
+    first = client.get("/products")
+    etag = first.headers["etag"]
+
+    resp = client.get("/products", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+
+    resp = client.get("/products", headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert resp.status_code == 304
+
+    resp = client.get("/products", headers={"If-Modified-Since": first.headers["last-modified"]})
+    assert resp.status_code == 304
+
+    resp = client.get("/products", headers={"If-Modified-Since": "Thu, 01 Jan 1998 00:00:00 GMT"})
+    assert resp.status_code == 200
+
+
+def test_gzip_variant_has_its_own_etag():
+    plain = client.get("/products", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/products", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["vary"] == "Accept-Encoding"
+    assert zipped.headers["etag"] != plain.headers["etag"]
+    # the test client decodes transparently
+    assert zipped.content == plain.content
+
+    resp = client.get("/products", headers={"If-None-Match": zipped.headers["etag"]})
+    assert resp.status_code == 304
+
+
+def test_ingest_changes_the_etag():
+    before = client.get("/stores")
+    _add_offer("Store 9", "Product 99")
+
+    resp = client.get("/stores", headers={"If-None-Match": before.headers["etag"]})
+    assert resp.status_code == 200
+    assert resp.json()[-1] == "Store 9"
+    assert resp.headers["etag"] != before.headers["etag"]
+
+
+def test_cached_body_variants():
+    body = CachedBody([{"name": "x" * 10}] * 100, version=3, updated_at=None)
+    assert json.loads(gzip.decompress(body.variants["gzip"])) == json.loads(body.variants["identity"])
+    assert body.encoding_for("gzip;q=0, deflate") == "identity"
+    assert body.encoding_for("deflate, gzip") == "gzip"
+    assert CachedBody(["small"], version=3, updated_at=None).encoding_for("gzip") == "identity"
@@ -0,0 +1,130 @@
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+from app.catalog import changed_products, read_catalog_version
+from app.db import SessionLocal, engine, Base
+from app.ingest import ingest, iter_records, normalize_record
+from app.main import app
+from app.models import StoreOffer
+
+client = TestClient(app)
+
+OFFERS = [
+    {"store_name": "ALDI", "product_name": "Milch", "quantity": 1, "unit": "Liter", "price": 0.99,
+     "valid_from": "2026-01-01", "valid_until": "2099-01-07"},
+    {"store": "LIDL", "product": "Milch", "quantity": "0,5", "unit": "l", "price": "0.59",
+     "validFrom": "2026-01-01", "validUntil": "2099-01-07", "image": "https://example.com/milch.png"},
+    {"store_name": "ALDI", "product_name": "Butter", "quantity": 250, "unit": " g ", "price": 1.79,
+     "valid_from": "2026-01-01", "valid_until": "2099-01-07"},
+]
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def setup_function(function):
+    db = SessionLocal()
+    db.query(StoreOffer).delete()
+    db.commit()
+    db.close()
+
+
+def _offers():
+    db = SessionLocal()
+    try:
+        return sorted(
+            (o.store_name, o.product_name, float(o.quantity), o.unit, float(o.price), o.base_unit)
+            for o in db.query(StoreOffer)
+        )
+    finally:
+        db.close()
+
+
+def test_reads_json_array_ndjson_and_csv(tmp_path):
+    array = tmp_path / "offers.json"
+    array.write_text(json.dumps(OFFERS, indent=2))
+    ndjson = tmp_path / "offers.ndjson.gz"
+    with gzip.open(ndjson, "wt") as f:
+        f.writelines(json.dumps(offer) + "\n" for offer in OFFERS)
+    csv_file = tmp_path / "offers.csv"
+    csv_file.write_text(
+        "store_name,product_name,quantity,unit,price,valid_from,valid_until\n"
+        "ALDI,Milch,1,Liter,0.99,2026-01-01,2099-01-07\n"
+    )
+    assert list(iter_records(array)) == OFFERS
+    assert list(iter_records(ndjson)) == OFFERS
+    assert list(iter_records(csv_file))[0]["unit"] == "Liter"
+
+
+def test_json_array_is_decoded_across_read_chunks(tmp_path, monkeypatch):
+    from app import ingest as ingest_module
+
+    monkeypatch.setattr(ingest_module, "_READ_CHUNK", 7)
+    path = tmp_path / "offers.json"
+    path.write_text(json.dumps(OFFERS * 5))
+    assert list(iter_records(path)) == OFFERS * 5
+
+
+def test_normalize_record_validates_and_derives_unit_columns():
+    row = normalize_record(OFFERS[1])
+    assert (row["store_name"], row["quantity"], row["price"]) == ("LIDL", 0.5, 0.59)
+    assert (row["base_unit"], row["base_quantity"]) == ("ml", 500.0)
+    assert normalize_record(OFFERS[2])["unit"] == "g"
+
+    for broken, reason in (
+        ({**OFFERS[0], "price": "abc"}, "invalid price"),
+        ({**OFFERS[0], "quantity": -1}, "invalid quantity"),
+        ({k: v for k, v in OFFERS[0].items() if k != "store_name"}, "missing store_name"),
+        ({**OFFERS[0], "valid_until": "2025-12-31"}, "valid_until before valid_from"),
+    ):
+        try:
+            normalize_record(broken)
+        except ValueError as exc:
+            assert str(exc).startswith(reason)
+        else:
+            raise AssertionError(f"{broken} accepted")
+
+
+def test_upsert_updates_existing_offers_and_dedups_the_file():
+    with engine.connect() as conn:
+        version = read_catalog_version(conn)
+    stats = ingest(engine, OFFERS + [{**OFFERS[0], "price": 0.89}, {"price": 1}], batch_size=2)
+    assert (stats.read, stats.inserted, stats.updated) == (5, 3, 1)
+    assert stats.rejected == {"missing store_name": 1}
+    assert ("ALDI", "Milch", 1.0, "Liter", 0.89, "ml") in _offers()
+
+    stats = ingest(engine, [{**OFFERS[2], "price": 1.49}])
+    assert (stats.inserted, stats.updated) == (0, 1)
+    assert ("ALDI", "Butter", 250.0, "g", 1.49, "g") in _offers()
+    assert len(_offers()) == 3
+    with engine.connect() as conn:
+        assert read_catalog_version(conn) == version + 2
+        # change sets, so the offer catalog patches instead of rebuilding
+        assert changed_products(conn, version, version + 1) == {"Milch", "Butter"}
+        assert changed_products(conn, version + 1, version + 2) == {"Butter"}
+
+
+def test_skip_keeps_existing_and_append_inserts_everything():
+    ingest(engine, OFFERS)
+    stats = ingest(engine, [{**OFFERS[0], "price": 5.0}, {**OFFERS[0], "valid_from": "2026-01-02"}], mode="skip")
+    assert (stats.inserted, stats.updated, stats.duplicates) == (1, 0, 1)
+    assert ("ALDI", "Milch", 1.0, "Liter", 0.99, "ml") in _offers()
+
+    stats = ingest(engine, OFFERS, mode="append")
+    assert stats.inserted == 3
+    assert len(_offers()) == 7
+
+
+def test_ingested_offers_are_served():
+    ingest(engine, OFFERS)
+    resp = client.get("/search/products?name=milch&distinct=false")
+    assert resp.status_code == 200
+    assert [row["store_name"] for row in resp.json()] == ["LIDL", "ALDI"]
+    basket = {"items": [{"name": "Milch", "quantity": 1, "unit": "l"}]}
+    assert client.post("/optimize?mode=multi_store", json=basket).json()["total_price"] == 0.99
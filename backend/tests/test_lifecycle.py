@@ -0,0 +1,143 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.catalog import changed_products, offer_catalog, read_catalog_version
+from app.db import SessionLocal, engine, Base
+from app.lifecycle import archive_expired_offers, ensure_partitions, next_month
+from app.main import app
+from app.models import StoreOffer, StoreOfferArchive
+from app.response_cache import response_cache
+
+client = TestClient(app)
+
+TODAY = date.today()
+BASKET = {"items": [{"name": "Milk", "quantity": 1, "unit": "l"}]}
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    offer_catalog.enabled = True
+    Base.metadata.drop_all(bind=engine)
+
+
+def setup_function(function):
+    db = SessionLocal()
+    db.query(StoreOffer).delete()
+    db.query(StoreOfferArchive).delete()
+    for store, price, starts, ends in (
+        ("ALDI", 0.95, -3, 4),      # live
+        ("LIDL", 0.49, 1, 8),       # starts tomorrow
+        ("NETTO", 0.39, -20, -10),  # expired ten days ago
+        ("PENNY", 0.45, -9, -2),    # expired two days ago
+    ):
+        db.add(StoreOffer(
+            store_name=store, product_name="Milk", quantity=1, unit="l", price=price,
+            valid_from=TODAY + timedelta(days=starts), valid_until=TODAY + timedelta(days=ends),
+        ))
+    db.commit()
+    db.close()
+
+
+def _stores(model):
+    db = SessionLocal()
+    try:
+        return sorted(offer.store_name for offer in db.query(model))
+    finally:
+        db.close()
+
+
+def test_offers_are_served_only_once_they_started():
+    for enabled in (True, False):
+        offer_catalog.enabled = enabled
+        response_cache.clear()
+        resp = client.post("/optimize", json=BASKET)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["stores"] == ["ALDI"]
+    offer_catalog.enabled = True
+
+
+def test_archive_moves_offers_expired_before_the_cutoff():
+    db = SessionLocal()
+    version = read_catalog_version(db)
+    netto_id = db.query(StoreOffer.id).filter_by(store_name="NETTO").scalar()
+    db.close()
+
+    result = archive_expired_offers(engine, today=TODAY, keep_days=7, batch_size=1)
+    assert (result.archived, result.batches, result.cutoff) == (1, 1, TODAY - timedelta(days=7))
+    assert _stores(StoreOffer) == ["ALDI", "LIDL", "PENNY"]
+    assert _stores(StoreOfferArchive) == ["NETTO"]
+
+    db = SessionLocal()
+    try:
+        archived = db.query(StoreOfferArchive).one()
+        assert archived.id == netto_id and archived.archived_at is not None
+        # the listings see a new version; the live catalog did not change
+        assert read_catalog_version(db) == version + 1
+        assert changed_products(db, version, version + 1) == frozenset()
+    finally:
+        db.close()
+
+    result = archive_expired_offers(engine, today=TODAY, keep_days=0, batch_size=1)
+    assert result.archived == 1
+    assert _stores(StoreOfferArchive) == ["NETTO", "PENNY"]
+
+
+def test_archive_takes_offers_with_reused_ids():
+    archive_expired_offers(engine, today=TODAY, keep_days=0)
+    db = SessionLocal()
+    archived_ids = {offer_id for offer_id, in db.query(StoreOfferArchive.id)}
+    # SQLite hands out the ids after the highest remaining one again
+    offer = StoreOffer(
+        store_name="NETTO", product_name="Milk", quantity=1, unit="l", price=0.41,
+        valid_from=TODAY - timedelta(days=6), valid_until=TODAY - timedelta(days=1),
+    )
+    db.add(offer)
+    db.commit()
+    assert offer.id in archived_ids
+    db.close()
+
+    assert archive_expired_offers(engine, today=TODAY, keep_days=0).archived == 1
+    assert _stores(StoreOfferArchive) == ["NETTO", "NETTO", "PENNY"]
+
+
+def test_archiving_keeps_cached_answers():
+    response_cache.clear()
+    assert client.post("/optimize", json=BASKET).headers["x-cache"] == "miss"
+    archive_expired_offers(engine, today=TODAY, keep_days=0)
+    assert client.post("/optimize", json=BASKET).headers["x-cache"] == "hit"
+    assert client.get("/stores").json() == ["ALDI", "LIDL"]
+
+
+class _RecordingConnection:
+    """Records the statements run on it; the partitions query returns ``names``."""
+
+    def __init__(self, names):
+        self.names = names
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return self
+
+    def scalars(self):
+        return iter(self.names)
+
+
+def test_monthly_partitions():
+    assert next_month(date(2026, 12, 31)) == date(2027, 1, 1)
+
+    conn = _RecordingConnection(["store_offers_default", "store_offers_p202611"])
+    created = ensure_partitions(conn, date(2026, 11, 15), months_ahead=2)
+    assert created == ["store_offers_p202612", "store_offers_p202701"]
+    # each new partition takes over its rows from the default partition before it is attached
+    statements = conn.statements[1:]
+    assert len(statements) == 6
+    assert statements[0] == "CREATE TABLE store_offers_p202612 (LIKE store_offers INCLUDING DEFAULTS)"
+    assert "DELETE FROM store_offers_default" in statements[1]
+    assert statements[5] == (
+        "ALTER TABLE store_offers ATTACH PARTITION store_offers_p202701 "
+        "FOR VALUES FROM ('2027-01-01') TO ('2027-02-01')"
+    )
@@ -0,0 +1,35 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+
+from app import migrations
+from app.db import Base
+from app.search import FTS_TABLE
+
+HOT_INDEXES = {
+    "ix_store_offers_product_valid_until",
+    "ix_store_offers_product_quantity",
+    "ix_store_offers_store_name",
+    "ix_store_offers_valid_until",
+}
+
+
+def test_migrations_match_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    migrations.upgrade(url)
+    engine = create_engine(url)
+    inspector = inspect(engine)
+    assert HOT_INDEXES <= {index["name"] for index in inspector.get_indexes("store_offers")}
+    assert inspector.has_table(FTS_TABLE)
+
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+        diff = [
+            op for op in compare_metadata(context, Base.metadata)
+            if not (op[0] == "remove_table" and op[1].name.startswith(FTS_TABLE))
+        ]
+    assert diff == []
+
+    migrations.downgrade(url, "0002")
+    assert not HOT_INDEXES & {index["name"] for index in inspect(engine).get_indexes("store_offers")}
+    engine.dispose()
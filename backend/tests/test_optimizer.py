@@ -1,9 +1,5 @@
-import os
 from datetime import date, timedelta
 
-# Use a temporary file-based sqlite for tests to avoid separate in-memory connections
-os.environ["DATABASE_URL"] = "sqlite:///./test.db"
-
 from fastapi.testclient import TestClient
 from app.db import SessionLocal, engine, Base
 from app.main import app
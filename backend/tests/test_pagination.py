@@ -0,0 +1,95 @@
+import json
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app.pagination import encode_cursor
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    today = date.today()
+    for i in range(25):
+        for quantity in (2, 1):
+            db.add(StoreOffer(
+                store_name=f"Store {i % 3}",
+                product_name=f"Milch {i:02d}" if i % 2 else f"Vollmilch {i:02d}",
+                quantity=quantity,
+                unit="l",
+                price=1.0,
+                valid_from=today - timedelta(days=1),
+                valid_until=today + timedelta(days=10),
+            ))
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def _walk(path):
+    """All pages of ``path`` following X-Next-Cursor."""
+    rows, pages = [], 0
+    while True:
+        resp = client.get(path)
+        assert resp.status_code == 200, resp.text
+        rows += resp.json()
+        pages += 1
+        if "x-next-cursor" not in resp.headers:
+            return rows, pages
+        assert resp.headers["link"].endswith('; rel="next"')
+        path = resp.headers["link"][1:resp.headers["link"].index(">")]
+
+
+def test_products_keyset_pages_cover_the_listing():
+    full = client.get("/products").json()
+    rows, pages = _walk("/products?limit=7")
+    assert rows == full
+    assert pages == 4
+    assert len({row["product_name"] for row in rows}) == 25
+
+
+def test_search_keyset_pages_follow_the_ranking():
+    for term in ("milch", "mi"):  # FTS5 and the short-term LIKE fallback
+        for distinct in ("true", "false"):
+            full = client.get(f"/search/products?name={term}&distinct={distinct}&limit=1000").json()
+            rows, _ = _walk(f"/search/products?name={term}&distinct={distinct}&limit=4")
+            assert rows == full
+
+
+def test_search_pages_after_an_offset_miss_no_rows():
+    full = client.get("/search/products?name=milch&limit=1000").json()
+    rows, _ = _walk("/search/products?name=milch&limit=4&offset=3")
+    assert rows == full[3:]
+    # a cursor taken from an offset page with the offset still on it
+    resp = client.get("/search/products?name=milch&limit=4&offset=3")
+    rows = client.get(f"/search/products?name=milch&limit=4&offset=3&cursor={resp.headers['x-next-cursor']}").json()
+    assert rows == full[7:11]
+
+
+def test_ndjson_streams_the_same_rows():
+    resp = client.get("/products?format=ndjson")
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in resp.text.splitlines()] == client.get("/products").json()
+
+    page = client.get("/products?format=ndjson&limit=3&cursor=" + encode_cursor(["Milch 05"]))
+    assert [json.loads(line)["product_name"] for line in page.text.splitlines()] == [
+        "Milch 07", "Milch 09", "Milch 11",
+    ]
+
+    search = client.get("/search/products?name=vollmilch&format=ndjson&limit=1000")
+    assert [json.loads(line) for line in search.text.splitlines()] == \
+        client.get("/search/products?name=vollmilch&limit=1000").json()
+
+
+def test_cursor_past_the_end_and_invalid_cursor():
+    assert client.get("/products?cursor=" + encode_cursor(["zzz"])).json() == []
+    assert client.get("/products?cursor=not-a-cursor").status_code == 400
+    assert client.get("/search/products?name=milch&cursor=" + encode_cursor(["x"])).status_code == 400
+    assert client.get("/products?limit=0").status_code == 422
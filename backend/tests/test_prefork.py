@@ -0,0 +1,99 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import httpx
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from app import migrations
+from app.catalog import bump_catalog_version, offer_catalog
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+
+client = TestClient(app)
+
+TODAY = date.today()
+OFFERS = [
+    {"store_name": store, "product_name": "Milk", "quantity": 1, "unit": "l", "price": price,
+     "valid_from": TODAY - timedelta(days=1), "valid_until": TODAY + timedelta(days=6)}
+    for store, price in (("ALDI", 0.95), ("LIDL", 0.89))
+]
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    for offer in OFFERS:
+        db.add(StoreOffer(**offer))
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    offer_catalog.invalidate()
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_ready_reports_the_warm_catalog():
+    offer_catalog.get()
+    response = client.get("/ops/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] and body["pid"] == os.getpid()
+    assert body["catalog"]["offers"] == 2 and body["catalog"]["mapped_from"] is None
+    assert body["suggest_index"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_serve_forks_warm_workers_and_stops_them(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'serve.db'}"
+    migrations.upgrade(database_url)
+    other = create_engine(database_url)
+    with other.begin() as conn:
+        bump_catalog_version(conn)
+        conn.execute(insert(StoreOffer), OFFERS)
+    other.dispose()
+
+    path = tmp_path / "catalog.snapshot"
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "scripts.serve", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", "2", "--catalog-file", str(path), "--log-level", "warning"],
+        env=dict(os.environ, DATABASE_URL=database_url),
+    )
+    try:
+        pids = set()
+        deadline = time.time() + 60
+        while len(pids) < 2 and time.time() < deadline:
+            try:
+                ready = httpx.get(f"http://127.0.0.1:{port}/ops/ready", timeout=2.0)
+            except httpx.HTTPError:
+                time.sleep(0.2)
+                continue
+            # workers are forked warm: the first answer is already ready
+            assert ready.status_code == 200
+            body = ready.json()
+            assert body["catalog"]["mapped_from"] == str(path)
+            pids.add(body["pid"])
+        assert len(pids) == 2 and proc.pid not in pids
+
+        response = httpx.post(
+            f"http://127.0.0.1:{port}/optimize?mode=multi_store",
+            json={"items": [{"name": "Milk", "quantity": 1, "unit": "l"}]},
+        )
+        assert response.json()["stores"] == ["LIDL"]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=30) == 0
+    for pid in pids:
+        assert not os.path.exists(f"/proc/{pid}")
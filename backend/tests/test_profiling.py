@@ -0,0 +1,100 @@
+import json
+import sys
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app.profiling import profiler
+from scripts import replay_profile
+
+client = TestClient(app)
+
+TODAY = date.today()
+BASKET = {"items": [
+    {"name": "Milk", "quantity": 2, "unit": "l"},
+    {"name": "Cheese", "quantity": 400, "unit": "g"},
+]}
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    for store, product, quantity, unit, price in (
+        ("ALDI", "Milk", 1, "l", 0.95),
+        ("LIDL", "Milk", 1, "l", 0.89),
+        ("ALDI", "Cheese", 250, "g", 2.29),
+    ):
+        db.add(StoreOffer(
+            store_name=store, product_name=product, quantity=quantity, unit=unit, price=price,
+            valid_from=TODAY - timedelta(days=1), valid_until=TODAY + timedelta(days=6),
+        ))
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    profiler.token = None
+    Base.metadata.drop_all(bind=engine)
+
+
+def _profile(tmp_path, **kwargs):
+    profiler.directory = tmp_path
+    profiler.token = "secret"
+    return client.post("/optimize?mode=multi_store", json=BASKET, headers={"X-Profile": "secret"}, **kwargs)
+
+
+def test_profiling_token_captures_the_request(tmp_path):
+    client.post("/optimize?mode=multi_store", json=BASKET)
+    response = _profile(tmp_path)
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "miss"
+    capture_id = response.headers["X-Profile-Id"]
+    assert (tmp_path / f"{capture_id}.prof").exists()
+    capture = json.loads((tmp_path / f"{capture_id}.json").read_text())
+    assert capture["payload"]["items"][0]["name"] == "Milk"
+    assert capture["options"]["mode"] == "multi_store"
+    assert (capture["status"], capture["reason"]) == (200, "header")
+    assert capture["catalog"]["offers"] == {"Milk": 2, "Cheese": 1}
+    assert any("optimize_basket" in row["function"] for row in capture["top"])
+
+
+def test_wrong_token_is_not_profiled(tmp_path):
+    profiler.directory = tmp_path
+    profiler.token = "secret"
+    response = client.post("/optimize", json=BASKET, headers={"X-Profile": "guess"})
+    assert "X-Profile-Id" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_failed_requests_are_captured_and_pruned(tmp_path):
+    profiler.max_captures = 2
+    try:
+        for _ in range(3):
+            profiler.directory = tmp_path
+            profiler.token = "secret"
+            response = client.post(
+                "/optimize?mode=single_store",
+                json={"items": BASKET["items"] + [{"name": "Caviar", "quantity": 1, "unit": "pcs"}]},
+                headers={"X-Profile": "secret"},
+            )
+            assert response.status_code == 404
+    finally:
+        profiler.max_captures = 200
+    captures = sorted(tmp_path.glob("*.json"))
+    assert len(captures) == 2 and len(list(tmp_path.glob("*.prof"))) == 2
+    assert json.loads(captures[-1].read_text())["status"] == 404
+
+
+def test_replay_runs_the_captured_basket(tmp_path, monkeypatch, capsys):
+    capture_id = _profile(tmp_path).headers["X-Profile-Id"]
+    output = tmp_path / "replay.prof"
+    monkeypatch.setattr(sys, "argv", [
+        "replay_profile", str(tmp_path / f"{capture_id}.json"), "--repeat", "2", "--output", str(output),
+    ])
+    replay_profile.main()
+    printed = capsys.readouterr().out
+    assert "Replayed: 200 total_price" in printed
+    assert "Milk: 2 offers" in printed
+    assert output.exists()
@@ -0,0 +1,146 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app import schemas
+from app.api.optimizer import OptimizeOptions
+from app.catalog import bump_catalog_version, catalog_version, offer_catalog
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app.response_cache import ResponseCache, _SharedStore, response_cache
+from app.serialization import dumps
+
+client = TestClient(app)
+
+BASKET = {"items": [
+    {"name": "Milk", "quantity": 2, "unit": "l"},
+    {"name": "Cheese", "quantity": 400, "unit": "g"},
+    {"name": "Bread", "quantity": 1, "unit": "pcs"},
+]}
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    for store, product, quantity, unit, price in (
+        ("ALDI", "Milk", 1, "l", 0.95),
+        ("LIDL", "Milk", 1, "l", 0.89),
+        ("ALDI", "Cheese", 250, "g", 2.29),
+        ("LIDL", "Cheese", 200, "g", 1.99),
+        ("ALDI", "Bread", 500, "g", 1.49),
+        ("LIDL", "Bread", 750, "g", 1.79),
+    ):
+        _add_offer(store, product, quantity, unit, price)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def _add_offer(store, product, quantity, unit, price):
+    db = SessionLocal()
+    today = date.today()
+    db.add(StoreOffer(
+        store_name=store,
+        product_name=product,
+        quantity=quantity,
+        unit=unit,
+        price=price,
+        valid_from=today - timedelta(days=1),
+        valid_until=today + timedelta(days=10),
+    ))
+    db.commit()
+    db.close()
+
+
+def _optimize(body, mode="multi_store"):
+    resp = client.post(f"/optimize?mode={mode}", json=body)
+    assert resp.status_code == 200, resp.text
+    return resp.headers["x-cache"], resp.json()
+
+
+def test_reordered_and_respelled_baskets_hit():
+    for mode in ("single_store", "multi_store", "max_stores"):
+        response_cache.clear()
+        assert _optimize(BASKET, mode)[0] == "miss"
+
+        variant = {"items": [
+            {"name": "Bread", "quantity": 1, "unit": "Stück"},
+            {"name": "Milk", "quantity": 2, "unit": "Liter"},
+            {"name": "Cheese", "quantity": 400, "unit": "g"},
+        ]}
+        status, cached = _optimize(variant, mode)
+        assert status == "hit"
+        response_cache.enabled = False
+        try:
+            assert cached == _optimize(variant, mode)[1]
+        finally:
+            response_cache.enabled = True
+
+
+def test_ingest_invalidates():
+    response_cache.clear()
+    before = _optimize(BASKET)[1]
+    assert _optimize(BASKET)[0] == "hit"
+    _add_offer("NETTO", "Milk", 1, "l", 0.49)
+    status, after = _optimize(BASKET)
+    assert status == "miss"
+    assert after["total_price"] < before["total_price"]
+
+
+def test_external_version_bump_invalidates(monkeypatch):
+    monkeypatch.setattr(offer_catalog, "enabled", False)
+    monkeypatch.setattr(catalog_version, "interval", 0.0)
+    response_cache.clear()
+    _optimize(BASKET)
+    assert _optimize(BASKET)[0] == "hit"
+    # another process ingesting offers
+    with engine.begin() as conn:
+        bump_catalog_version(conn)
+    assert _optimize(BASKET)[0] == "miss"
+
+    stats = client.get("/ops/cache").json()
+    assert stats["hits"] >= 1 and stats["misses"] >= 1
+
+
+def test_lru_bound_and_shared_backend(tmp_path):
+    options = OptimizeOptions(schemas.OptimizationMode.MULTI_STORE, 2, 0.0, 0)
+    snapshot = offer_catalog.get()
+    scope = (snapshot.version, snapshot.built_on)
+    baskets = [
+        schemas.GroceryListRequest(items=[{"name": "Milk", "quantity": q, "unit": "l"}])
+        for q in (1, 2, 3)
+    ]
+    responses = [client.post("/optimize?mode=multi_store", json=b.model_dump(exclude_none=True)).json() for b in baskets]
+    size = len(dumps(responses[0]))
+
+    local = ResponseCache(max_bytes=2 * size + 10)
+    for basket, response in zip(baskets, responses):
+        local.put(scope, basket, options, response, snapshot)
+    assert local.get(scope, baskets[0], options) is None
+    assert local.get(scope, baskets[2], options) == responses[2]
+    assert local.counters["evictions"] == 1
+
+    path = str(tmp_path / "cache.db")
+    writer = ResponseCache(shared=_SharedStore(path, 1 << 20))
+    reader = ResponseCache(shared=_SharedStore(path, 1 << 20))
+    writer.put(scope, baskets[1], options, responses[1], snapshot)
+    assert reader.get(scope, baskets[1], options) == responses[1]
+    assert reader.counters["shared_hits"] == 1
+    assert reader.get((scope[0] + 1, scope[1]), baskets[1], options) is None
+
+
+def test_shared_backend_keeps_other_scopes(tmp_path):
+    # two workers on either side of a catalog version change
+    options = OptimizeOptions(schemas.OptimizationMode.MULTI_STORE, 2, 0.0, 0)
+    snapshot = offer_catalog.get()
+    old, new = (snapshot.version, snapshot.built_on), (snapshot.version + 1, snapshot.built_on)
+    basket = schemas.GroceryListRequest(items=[{"name": "Milk", "quantity": 1, "unit": "l"}])
+    response = client.post("/optimize?mode=multi_store", json=basket.model_dump(exclude_none=True)).json()
+
+    path = str(tmp_path / "cache.db")
+    behind = ResponseCache(shared=_SharedStore(path, 1 << 20))
+    ahead = ResponseCache(shared=_SharedStore(path, 1 << 20))
+    behind.put(old, basket, options, response, snapshot)
+    ahead.put(new, basket, options, response, snapshot)
+    assert ResponseCache(shared=behind.shared).get(old, basket, options) == response
+    assert ResponseCache(shared=ahead.shared).get(new, basket, options) == response
@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app.search import has_search_index
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    today = date.today()
+    for store, product, quantity in (
+        ("ALDI", "Vollmilch", 1),
+        ("ALDI", "Milch", 1),
+        ("LIDL", "Milch", 0.5),
+        ("LIDL", "Bio Milchreis", 1),
+        ("ALDI", "Quark 40%", 0.25),
+        ("LIDL", "Quark", 0.5),
+    ):
+        db.add(StoreOffer(
+            store_name=store,
+            product_name=product,
+            quantity=quantity,
+            unit="kg",
+            price=1.0,
+            valid_from=today - timedelta(days=1),
+            valid_until=today + timedelta(days=10),
+        ))
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def _names(path):
+    resp = client.get(path)
+    assert resp.status_code == 200, resp.text
+    return [(row["product_name"], row["quantity"]) for row in resp.json()]
+
+
+def test_search_uses_index_and_ranks_results():
+    assert has_search_index(engine)
+    # exact match, then prefix match, then the rest
+    assert _names("/search/products?name=milch") == [
+        ("Milch", 0.5), ("Vollmilch", 1.0), ("Bio Milchreis", 1.0),
+    ]
+    assert _names("/search/products?name=MILCH&distinct=false")[:2] == [("Milch", 0.5), ("Milch", 1.0)]
+
+
+def test_search_pagination_and_short_terms():
+    assert _names("/search/products?name=milch&limit=1&offset=1") == [("Vollmilch", 1.0)]
+    # below the trigram length: plain LIKE scan, same ranking
+    assert _names("/search/products?name=mi")[0] == ("Milch", 0.5)
+    # LIKE wildcards in the term are matched literally
+    assert _names("/search/products?name=40%25") == [("Quark 40%", 0.25)]
+    assert client.get("/search/products?name=milch&limit=0").status_code == 422
+
+
+def test_search_index_follows_updates():
+    db = SessionLocal()
+    db.query(StoreOffer).filter(StoreOffer.product_name == "Vollmilch").update({"product_name": "Sahne"})
+    db.query(StoreOffer).filter(StoreOffer.product_name == "Bio Milchreis").delete()
+    db.commit()
+    db.close()
+    assert _names("/search/products?name=milch") == [("Milch", 0.5)]
+    assert _names("/search/products?name=sahne") == [("Sahne", 1.0)]
@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+from typing import List
+
+from fastapi import Response
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from app import schemas, serialization
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app.response_cache import response_cache
+
+client = TestClient(app)
+
+TODAY = date.today()
+BASKET = {"items": [
+    {"name": "Vollmilch", "quantity": 2, "unit": "l"},
+    {"name": "Käse", "quantity": 400, "unit": "g"},
+    {"name": "Brötchen", "quantity": 3, "unit": "Bund"},
+]}
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    for store, product, quantity, unit, price, image in (
+        ("ALDI SÜD", "Vollmilch", 1, "Liter", 0.95, None),
+        ("LIDL", "Vollmilch", 0.5, "l", 0.59, "https://example.com/milch.png"),
+        ("ALDI SÜD", "Käse", 250, "g", 2.29, None),
+        ("LIDL", "Käse", 0.2, "kg", 1.99, None),
+        ("ALDI SÜD", "Brötchen", 6, "Stück", 1.49, None),
+        ("LIDL", "Brötchen", 10, "pcs", 2.19, None),
+        ("ALDI SÜD", "Mineralwasser", 1.5, "l", 0.13, None),  # 0.0000867 per ml
+    ):
+        db.add(StoreOffer(
+            store_name=store, product_name=product, quantity=quantity, unit=unit, price=price, image=image,
+            valid_from=TODAY - timedelta(days=1), valid_until=TODAY + timedelta(days=6),
+        ))
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def _as_models(body: bytes, model) -> bytes:
+    """``body`` validated into the response model and serialized by pydantic."""
+    adapter = TypeAdapter(model)
+    return adapter.dump_json(adapter.validate_json(body))
+
+
+def test_optimize_bodies_match_the_response_model():
+    response_cache.clear()
+    for mode in ("single_store", "multi_store", "max_stores"):
+        for _ in range(2):  # a miss, then a hit
+            response = client.post(f"/optimize?mode={mode}", json=BASKET)
+            assert response.status_code == 200, response.text
+            assert response.headers["content-type"] == "application/json"
+            assert response.content == _as_models(response.content, schemas.OptimizationResponse)
+    response = client.post("/optimize/batch?mode=multi_store", json={"baskets": [BASKET, BASKET]})
+    assert response.content == _as_models(response.content, List[schemas.OptimizationResponse])
+
+
+def test_listing_bodies_match_the_response_model():
+    for url in ("/products", "/products?limit=2", "/search/products?name=e"):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.content == _as_models(response.content, List[schemas.ItemAssignment])
+    lines = client.get("/products?format=ndjson").content.splitlines()
+    assert lines == [_as_models(line, schemas.ItemAssignment) for line in lines]
+
+
+def test_best_value_body_matches_the_response_model():
+    response = client.get("/products/best-value?product=Mineralwasser&product=Käse")
+    assert response.status_code == 200
+    assert response.json()[0]["offers"][0]["unit_price"] < 1e-4
+    assert response.content == _as_models(response.content, List[schemas.BestValueGroup])
+
+
+def test_injected_status_code_is_kept():
+    injected = Response()
+    injected.status_code = 203
+    injected.headers["X-Cache"] = "hit"
+    lean = serialization.json_response({"a": 1}, injected)
+    assert (lean.status_code, lean.headers["x-cache"], lean.body) == (203, "hit", b'{"a":1}')
+    assert serialization.json_response([]).status_code == 200
+
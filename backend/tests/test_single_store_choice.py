@@ -1,9 +1,5 @@
-import os
 from datetime import date, timedelta
 
-# Use a temporary file-based sqlite for tests to avoid separate in-memory connections
-os.environ["DATABASE_URL"] = "sqlite:///./test.db"
-
 from fastapi.testclient import TestClient
 from app.db import SessionLocal, engine, Base
 from app.main import app
@@ -20,8 +16,10 @@ def teardown_module(module):
     Base.metadata.drop_all(bind=engine)
 
 
-def test_single_store_prefers_cheaper_store():
+def _add_offers():
+    """ALDI and LIDL both sell Milk and Bread, LIDL cheaper in total."""
     db = SessionLocal()
+    db.query(StoreOffer).delete()
     today = date.today()
 
     # ALDI offers (more expensive)
@@ -67,6 +65,10 @@ def test_single_store_prefers_cheaper_store():
     db.commit()
     db.close()
 
+
+def test_single_store_prefers_cheaper_store():
+    _add_offers()
+
     payload = {
         "items": [
             {"name": "Milk", "quantity": 1, "unit": "l"},
@@ -83,3 +85,28 @@ def test_single_store_prefers_cheaper_store():
     assert len(data["stores"]) == 1
     assert data["stores"][0] == "LIDL"
     assert abs(float(data["total_price"]) - 3.8) < 1e-6
+
+
+def test_ranked_stores_and_offers():
+    _add_offers()
+
+    payload = {
+        "items": [
+            {"name": "Milk", "quantity": 1, "unit": "l"},
+            {"name": "Bread", "quantity": 1, "unit": "piece"},
+        ]
+    }
+    data = client.post("/optimize?mode=single_store&top=3", json=payload).json()
+    assert data["ranked_stores"] == [
+        {"store_name": "LIDL", "total_price": data["total_price"]},
+        {"store_name": "ALDI", "total_price": 6.0},
+    ]
+    assert data["ranked_offers"] is None
+
+    data = client.post("/optimize?mode=multi_store&top=2", json=payload).json()
+    milk = data["ranked_offers"]["Milk"]
+    assert [(a["product"]["store_name"], a["product"]["price"]) for a in milk] == [("LIDL", 1.8), ("ALDI", 2.5)]
+    assert milk[0] == data["items"][0]
+
+    data = client.post("/optimize?mode=single_store", json=payload).json()
+    assert data["ranked_stores"] is None
@@ -0,0 +1,111 @@
+import itertools
+from datetime import date, timedelta
+
+import numpy as np
+
+from fastapi.testclient import TestClient
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app.store_subset import best_store_subset
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def _brute_force(cost, weights, max_stores, visit_cost):
+    best = np.inf
+    for size in range(1, max_stores + 1):
+        for rows in itertools.combinations(range(cost.shape[0]), size):
+            cheapest = cost[list(rows)].min(axis=0)
+            if not np.isinf(cheapest).any():
+                best = min(best, float(weights @ cheapest) + visit_cost * size)
+    return best
+
+
+def test_best_store_subset_is_optimal():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n_stores, n_items = rng.integers(1, 9), rng.integers(1, 7)
+        cost = np.round(rng.uniform(0.5, 5.0, (n_stores, n_items)), 2)
+        cost[rng.random((n_stores, n_items)) < 0.35] = np.inf
+        weights = rng.integers(1, 3, n_items).astype(float)
+        max_stores = int(rng.integers(1, 4))
+        visit_cost = float(rng.choice([0.0, 0.5, 2.0]))
+
+        expected = _brute_force(cost, weights, max_stores, visit_cost)
+        result = best_store_subset(cost, weights, max_stores, visit_cost)
+        if expected == np.inf:
+            assert result is None
+            continue
+        assert len(result.rows) <= max_stores
+        value = float(weights @ cost[result.rows].min(axis=0)) + visit_cost * len(result.rows)
+        assert abs(value - expected) < 1e-9
+
+
+def test_node_budget_returns_the_best_subset_found():
+    rng = np.random.default_rng(1)
+    cost = np.round(rng.uniform(0.5, 6.0, (25, 30)), 2)
+    cost[rng.random(cost.shape) < 0.15] = np.inf
+    weights = np.ones(30)
+
+    exact = best_store_subset(cost, weights, 5)
+    budgeted = best_store_subset(cost, weights, 5, node_budget=100)
+    assert exact.exhaustive and not budgeted.exhaustive
+    assert budgeted.nodes == 100
+    assert len(budgeted.rows) <= 5
+    value = float(weights @ cost[budgeted.rows].min(axis=0))
+    assert abs(value - budgeted.objective) < 1e-9
+    assert budgeted.objective >= exact.objective - 1e-9
+
+
+def test_max_stores_mode():
+    db = SessionLocal()
+    today = date.today()
+    prices = {
+        "ALDI": {"Milk": 0.9, "Bread": 3.0, "Eggs": 1.2},
+        "LIDL": {"Milk": 2.0, "Bread": 1.0, "Eggs": 3.0},
+        "REWE": {"Milk": 2.0, "Bread": 3.0, "Eggs": 1.5},
+    }
+    for store, products in prices.items():
+        for product, price in products.items():
+            db.add(StoreOffer(
+                store_name=store,
+                product_name=product,
+                quantity=1,
+                unit="piece",
+                price=price,
+                valid_from=today - timedelta(days=1),
+                valid_until=today + timedelta(days=10),
+            ))
+    db.commit()
+    db.close()
+
+    payload = {
+        "items": [
+            {"name": "Milk", "quantity": 1, "unit": "piece"},
+            {"name": "Bread", "quantity": 1, "unit": "piece"},
+            {"name": "Eggs", "quantity": 1, "unit": "piece"},
+        ]
+    }
+
+    resp = client.post("/optimize?mode=max_stores&max_stores=2", json=payload)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    # ALDI + LIDL = 0.9 + 1.0 + 1.2 beats every other pair
+    assert sorted(data["stores"]) == ["ALDI", "LIDL"]
+    assert abs(data["total_price"] - 3.1) < 1e-9
+    assert data["search_nodes"] >= 0 and data["search_exhaustive"] is True
+    assert client.post("/optimize?mode=max_stores&max_stores=11", json=payload).status_code == 422
+
+    # A high visit cost makes a single store the better choice.
+    resp = client.post("/optimize?mode=max_stores&max_stores=3&store_visit_cost=5", json=payload)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["stores"] == ["ALDI"]
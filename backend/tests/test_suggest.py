@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.catalog import offer_catalog
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app import suggest
+from app.suggest import SuggestIndex
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    offer_catalog.invalidate()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def _add_offer(product):
+    db = SessionLocal()
+    today = date.today()
+    db.add(StoreOffer(
+        store_name="ALDI",
+        product_name=product,
+        quantity=1,
+        unit="l",
+        price=1.0,
+        valid_from=today - timedelta(days=1),
+        valid_until=today + timedelta(days=10),
+    ))
+    db.commit()
+    db.close()
+
+
+def test_suggest_index_ranking():
+    index = SuggestIndex(["Vollmilch", "Milch", "Bio Milchreis", "Milchschokolade", "Käse", "Hafer-Milch"])
+    # prefix of the name, then prefix of a later word, then substring
+    assert index.suggest("milch") == ["Milch", "Milchschokolade", "Hafer-Milch", "Bio Milchreis", "Vollmilch"]
+    assert index.suggest("  MILCH  ", limit=2) == ["Milch", "Milchschokolade"]
+    assert index.suggest("m") == ["Milch", "Milchschokolade", "Hafer-Milch", "Bio Milchreis"]
+    assert index.suggest("ilchr") == ["Bio Milchreis"]
+    assert index.suggest("xyz") == []
+    assert len(index) == 6
+
+
+def test_suggest_endpoint_follows_catalog():
+    _add_offer("Vollmilch")
+    resp = client.get("/search/suggest?q=mil")
+    assert resp.status_code == 200
+    assert resp.json() == ["Vollmilch"]
+    assert resp.headers["cache-control"].startswith("public")
+
+    # committing offers refreshes the catalog and with it the index
+    _add_offer("Milch")
+    assert client.get("/search/suggest?q=mil").json() == ["Milch", "Vollmilch"]
+    assert client.get("/search/suggest?q=mil&limit=1").json() == ["Milch"]
+    assert client.get("/search/suggest?q=").status_code == 422
+
+
+def test_index_kept_when_names_unchanged():
+    _add_offer("Butter")
+    client.get("/search/suggest?q=but")
+    index = suggest._current[1]
+
+    # another offer of a known product: same names, same index
+    _add_offer("Butter")
+    assert client.get("/search/suggest?q=but").json() == ["Butter"]
+    assert suggest._current[1] is index
+
+    _add_offer("Buttermilch")
+    assert client.get("/search/suggest?q=but").json() == ["Butter", "Buttermilch"]
+    assert suggest._current[1] is not index
@@ -0,0 +1,172 @@
+import json
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.catalog import changed_products, offer_catalog, read_catalog_version
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import CatalogChange, StoreOffer
+from app.response_cache import response_cache
+from app.sync import sync_file, sync_offers
+
+client = TestClient(app)
+
+TODAY = date.today()
+
+
+def _offer(store, product, price, quantity=1, unit="l", valid_from=None, valid_until=None):
+    return {
+        "store_name": store, "product_name": product, "quantity": quantity, "unit": unit, "price": price,
+        "valid_from": (valid_from or TODAY - timedelta(days=3)).isoformat(),
+        "valid_until": (valid_until or TODAY + timedelta(days=4)).isoformat(),
+    }
+
+
+WEEK = [
+    _offer("ALDI", "Milk", 0.95),
+    _offer("LIDL", "Milk", 0.89),
+    _offer("ALDI", "Cheese", 2.29, 250, "g"),
+    _offer("LIDL", "Cheese", 1.99, 200, "g"),
+    _offer("ALDI", "Bread", 1.49, 500, "g"),
+    _offer("LIDL", "Bread", 1.79, 750, "g"),
+]
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def setup_function(function):
+    db = SessionLocal()
+    db.query(StoreOffer).delete()
+    db.query(CatalogChange).delete()
+    db.commit()
+    db.close()
+    sync_offers(engine, WEEK, today=TODAY)
+
+
+def _offers():
+    db = SessionLocal()
+    try:
+        return sorted(
+            (o.store_name, o.product_name, float(o.price), o.valid_until)
+            for o in db.query(StoreOffer)
+        )
+    finally:
+        db.close()
+
+
+def test_sync_applies_only_the_differences():
+    before = _offers()
+    assert not sync_offers(engine, WEEK, today=TODAY)
+
+    changes = sync_offers(engine, [
+        *WEEK[:5],
+        _offer("ALDI", "Milk", 0.85),  # later duplicate wins
+        _offer("NETTO", "Eggs", 2.49, 10, "pcs"),
+    ], today=TODAY)
+    assert (changes.inserted, changes.updated, changes.expired, changes.unchanged) == (1, 1, 1, 4)
+    assert changes.products == ["Bread", "Eggs", "Milk"]
+    assert changes.stores == ["ALDI", "LIDL", "NETTO"]
+
+    after = _offers()
+    assert ("ALDI", "Milk", 0.85, TODAY + timedelta(days=4)) in after
+    assert ("LIDL", "Bread", 1.79, TODAY - timedelta(days=1)) in after  # expired, not deleted
+    assert ("NETTO", "Eggs", 2.49, TODAY + timedelta(days=4)) in after
+    assert len(after) == len(before) + 1
+
+
+def test_offers_that_have_not_started_are_withdrawn():
+    upcoming = _offer("ALDI", "Butter", 1.69, 250, "g", valid_from=TODAY + timedelta(days=2))
+    sync_offers(engine, WEEK + [upcoming], today=TODAY)
+    changes = sync_offers(engine, WEEK, today=TODAY)
+    assert changes.expired == 1
+    assert "Butter" not in {offer[1] for offer in _offers()}
+
+
+def test_scope_limits_expiry_to_the_stores_in_the_dataset():
+    aldi = [offer for offer in WEEK if offer["store_name"] == "ALDI"]
+    assert not sync_offers(engine, aldi, today=TODAY)
+
+    changes = sync_offers(engine, aldi, scope="all", today=TODAY)
+    assert changes.expired == 3
+    assert changes.stores == ["LIDL"]
+
+
+def test_dry_run_rolls_back(tmp_path):
+    path = tmp_path / "week.ndjson"
+    path.write_text("".join(json.dumps(offer) + "\n" for offer in WEEK[:2]))
+    before, version = _offers(), _version()
+    changes = sync_file(engine, path, scope="all", today=TODAY, dry_run=True)
+    assert changes.expired == 4 and changes.version is None
+    assert (_offers(), _version()) == (before, version)
+
+
+def test_change_set_is_recorded_under_the_new_version():
+    version = _version()
+    changes = sync_offers(engine, WEEK[:5] + [_offer("ALDI", "Milk", 0.85)], today=TODAY)
+    assert changes.version == _version() == version + 1
+
+    db = SessionLocal()
+    try:
+        assert changed_products(db, version, version + 1) == {"Bread", "Milk"}
+        # a version bump without a change set cannot be patched
+        assert changed_products(db, version - 1, version + 1) is not None
+        assert changed_products(db, version + 1, version + 2) is None
+    finally:
+        db.close()
+
+
+def test_offer_catalog_patches_the_changed_products():
+    offer_catalog.invalidate()
+    base = offer_catalog.get()
+    sync_offers(engine, WEEK[:5] + [_offer("ALDI", "Milk", 0.85), _offer("NETTO", "Eggs", 2.49, 10, "pcs")],
+                today=TODAY)
+
+    patched = offer_catalog.get()
+    assert patched.changes == (base.version, {"Bread", "Eggs", "Milk"})
+    assert patched.get("Cheese") is base.get("Cheese")
+
+    body = {"items": [
+        {"name": "Milk", "quantity": 2, "unit": "l"},
+        {"name": "Bread", "quantity": 1, "unit": "pcs"},
+        {"name": "Eggs", "quantity": 10, "unit": "pcs"},
+    ]}
+    results = {}
+    for mode in ("single_store", "multi_store", "max_stores"):
+        response_cache.clear()
+        results[mode] = client.post(f"/optimize?mode={mode}", json=body).json()
+
+    offer_catalog.invalidate()
+    assert offer_catalog.get().changes is None
+    for mode, result in results.items():
+        response_cache.clear()
+        assert client.post(f"/optimize?mode={mode}", json=body).json() == result
+
+
+def test_response_cache_keeps_unaffected_baskets():
+    offer_catalog.invalidate()
+    response_cache.clear()
+    cheese = {"items": [{"name": "Cheese", "quantity": 400, "unit": "g"}]}
+    milk = {"items": [{"name": "Milk", "quantity": 2, "unit": "l"}]}
+    for body in (cheese, milk):
+        assert client.post("/optimize", json=body).headers["x-cache"] == "miss"
+
+    sync_offers(engine, WEEK[1:] + [_offer("ALDI", "Milk", 0.85)], today=TODAY)
+    offer_catalog.get()
+    assert client.post("/optimize", json=cheese).headers["x-cache"] == "hit"
+    resp = client.post("/optimize", json=milk)
+    assert resp.headers["x-cache"] == "miss"
+    assert resp.json()["total_price"] == 1.70
+
+
+def _version():
+    db = SessionLocal()
+    try:
+        return read_catalog_version(db)
+    finally:
+        db.close()
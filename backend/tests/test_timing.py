@@ -0,0 +1,66 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.db import SessionLocal, engine, Base
+from app.main import app
+from app.models import StoreOffer
+from app.response_cache import response_cache
+from app.timing import metrics, request_timing
+
+client = TestClient(app)
+
+TODAY = date.today()
+BASKET = {"items": [{"name": "Milk", "quantity": 2, "unit": "l"}]}
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    for store, price in (("ALDI", 0.95), ("LIDL", 0.89)):
+        db.add(StoreOffer(
+            store_name=store, product_name="Milk", quantity=1, unit="l", price=price,
+            valid_from=TODAY - timedelta(days=1), valid_until=TODAY + timedelta(days=6),
+        ))
+    db.commit()
+    db.close()
+    request_timing.enabled = True
+    metrics.clear()
+
+
+def teardown_module(module):
+    request_timing.enabled = False
+    metrics.clear()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _phases(header):
+    return {entry.split(";")[0] for entry in header.split(", ")}
+
+
+def test_optimize_reports_its_phases():
+    response_cache.clear()
+    response = client.post("/optimize?mode=multi_store", json=BASKET)
+    assert response.status_code == 200
+    assert {"catalog", "cache", "optimize", "costs", "framework", "app"} <= _phases(
+        response.headers["server-timing"]
+    )
+
+
+def test_metrics_exposes_histograms_per_route_and_mode():
+    client.post("/optimize?mode=multi_store", json=BASKET)
+    client.get("/stores")
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/optimize",mode="multi_store",status="200",le="+Inf"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/stores",mode="",status="200"}' in body
+    assert 'http_request_phase_duration_seconds_bucket{route="/optimize",mode="multi_store",phase="optimize"' in body
+
+
+def test_disabled_timing_adds_nothing():
+    request_timing.enabled = False
+    try:
+        metrics.clear()
+        response = client.post("/optimize", json=BASKET)
+        assert "server-timing" not in response.headers
+        assert "http_request_duration_seconds_bucket" not in client.get("/metrics").text
+    finally:
+        request_timing.enabled = True
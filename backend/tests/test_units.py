@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+from app.db import SessionLocal, engine, Base
+from app.models import StoreOffer
+from app.units import normalize_unit, offer_unit_columns, to_base_qty
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_normalize_unit_aliases():
+    assert normalize_unit(" Gramm ") == "g"
+    assert normalize_unit("Liter") == "l"
+    assert normalize_unit("Stück") == "piece"
+    assert normalize_unit("box") == "box"
+    assert normalize_unit("") == ""
+
+
+def test_to_base_qty():
+    assert to_base_qty(1.5, "kg") == (1500.0, "g")
+    assert to_base_qty(2, "Liter") == (2000.0, "ml")
+    assert to_base_qty(6, "pcs") == (6, "piece")
+
+
+def test_offer_unit_columns():
+    assert offer_unit_columns(2, "kg", 5.0) == {
+        "base_unit": "g",
+        "base_quantity": 2000.0,
+        "unit_price": 0.0025,
+    }
+    assert offer_unit_columns(0, "g", 1.0)["unit_price"] is None
+
+
+def test_orm_writes_fill_unit_columns():
+    db = SessionLocal()
+    today = date.today()
+    offer = StoreOffer(
+        store_name="ALDI",
+        product_name="Milk",
+        quantity=1,
+        unit="Liter",
+        price=0.95,
+        valid_from=today,
+        valid_until=today + timedelta(days=7),
+    )
+    db.add(offer)
+    db.commit()
+    assert (offer.base_unit, offer.base_quantity) == ("ml", 1000.0)
+
+    offer.quantity = 2
+    db.commit()
+    assert offer.base_quantity == 2000.0
+    assert abs(offer.unit_price - 0.95 / 2000.0) < 1e-12
+    db.close()
@@ -18,6 +18,9 @@ CREATE TABLE IF NOT EXISTS public.store_offers
     valid_from date NOT NULL,
     valid_until date NOT NULL,
     image text COLLATE pg_catalog."default",
+    base_unit text COLLATE pg_catalog."default",
+    base_quantity double precision,
+    unit_price double precision,
     CONSTRAINT store_offers_pkey PRIMARY KEY (id)
 )
 
@@ -25,6 +28,13 @@ TABLESPACE pg_default;
 
 ALTER TABLE IF EXISTS public.store_offers
     OWNER to postgres;
+
+-- Derived unit columns (filled at ingest time, see backend/app/units.py).
+-- For tables created before these columns existed:
+ALTER TABLE IF EXISTS public.store_offers
+    ADD COLUMN IF NOT EXISTS base_unit text COLLATE pg_catalog."default",
+    ADD COLUMN IF NOT EXISTS base_quantity double precision,
+    ADD COLUMN IF NOT EXISTS unit_price double precision;
 -- Index: ix_store_offers_id
 
 -- DROP INDEX IF EXISTS public.ix_store_offers_id;
@@ -33,4 +43,96 @@ CREATE INDEX IF NOT EXISTS ix_store_offers_id
     ON public.store_offers USING btree
     (id ASC NULLS LAST)
     WITH (fillfactor=100, deduplicate_items=True)
-    TABLESPACE pg_default;
\ No newline at end of file
+    TABLESPACE pg_default;
+-- Index: ix_store_offers_product_name_trgm
+-- Trigram index for /search/products (ILIKE '%term%'), see backend/app/search.py.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS ix_store_offers_product_name_trgm
+    ON public.store_offers USING gin
+    (product_name gin_trgm_ops)
+    TABLESPACE pg_default;
+
+-- Indexes for the hot query shapes (migration 0003, see backend/migrations/).
+-- The migrations are the reference schema: prefer `alembic upgrade head`.
+
+CREATE INDEX IF NOT EXISTS ix_store_offers_product_valid_until
+    ON public.store_offers USING btree
+    (product_name, valid_until)
+    INCLUDE (id, store_name, price, quantity, unit, valid_from, image, base_unit, base_quantity);
+
+CREATE INDEX IF NOT EXISTS ix_store_offers_product_quantity
+    ON public.store_offers USING btree
+    (product_name, quantity, id);
+
+CREATE INDEX IF NOT EXISTS ix_store_offers_store_name
+    ON public.store_offers USING btree
+    (store_name);
+
+CREATE INDEX IF NOT EXISTS ix_store_offers_valid_until
+    ON public.store_offers USING btree
+    (valid_until);
+
+-- Catalog version counter (migration 0004, see backend/app/catalog.py).
+-- Bumped by every write to store_offers; processes poll it to notice
+-- writes of other processes. Exactly one row, id = 1.
+
+CREATE TABLE IF NOT EXISTS public.catalog_version
+(
+    id integer NOT NULL,
+    version bigint NOT NULL,
+    updated_at timestamp without time zone NOT NULL DEFAULT now(),
+    CONSTRAINT catalog_version_pkey PRIMARY KEY (id)
+);
+
+INSERT INTO public.catalog_version (id, version)
+    VALUES (1, 0)
+    ON CONFLICT (id) DO NOTHING;
+
+-- Offer key lookups of the bulk ingest (migration 0005).
+
+CREATE INDEX IF NOT EXISTS ix_store_offers_offer_key
+    ON public.store_offers USING btree
+    (product_name, store_name, valid_from);
+
+-- Change set of each incremental sync (migration 0006), read by the offer
+-- catalog to patch its snapshot instead of rebuilding it.
+
+CREATE TABLE IF NOT EXISTS public.catalog_changes
+(
+    version bigint NOT NULL,
+    created_at timestamp without time zone NOT NULL DEFAULT now(),
+    inserted integer NOT NULL,
+    updated integer NOT NULL,
+    expired integer NOT NULL,
+    products text NOT NULL,
+    stores text NOT NULL,
+    CONSTRAINT catalog_changes_pkey PRIMARY KEY (version)
+);
+
+-- Archive of expired offers (migration 0007, moved there by app.lifecycle).
+-- Migration 0007 also partitions store_offers by month of valid_until.
+
+CREATE TABLE IF NOT EXISTS public.store_offers_archive
+(
+    archive_id serial NOT NULL,
+    id integer NOT NULL,
+    store_name text NOT NULL,
+    product_name text NOT NULL,
+    quantity numeric NOT NULL,
+    unit text NOT NULL,
+    price numeric NOT NULL,
+    valid_from date NOT NULL,
+    valid_until date NOT NULL,
+    image text,
+    base_unit text,
+    base_quantity double precision,
+    unit_price double precision,
+    archived_at timestamp without time zone NOT NULL DEFAULT now(),
+    CONSTRAINT store_offers_archive_pkey PRIMARY KEY (archive_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_store_offers_archive_product_valid_from
+    ON public.store_offers_archive USING btree
+    (product_name, valid_from);